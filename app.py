@@ -1,29 +1,42 @@
 import streamlit as st
-import sys
-import yfinance as yf
-import plotly.graph_objects as go
+import import_timing
+
+# Every module imported from here on is timed; the report is written to stderr once per process.
+# Heavy libraries (plotly, matplotlib, nltk, yfinance, selenium, bs4) are imported by the code that
+# uses them, so a cold start only loads what the first run needs
+import_timing.install()
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+import io
 import logging
-import subprocess
+import time
 import crud
+import news_clusters
+import news_events
+import snapshot
 
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.feature_extraction.text import TfidfVectorizer
-from datetime import datetime
+from price_cache import PriceCache
+from providers import YahooPriceProvider
+from market_data import fetch_tickers, throttled
+from company_metadata import CompanyMetadataCache
+from indicators import IncrementalIndicators, compute_indicators, load_incremental, save_incremental
+from downsampling import DEFAULT_POINT_BUDGET, OHLCPyramid, downsample_line
+
+import_timing.log_startup_report()
 
 # Configure logging
 logging.basicConfig(filename="error_log.txt", level=logging.ERROR, format="%(asctime)s - %(message)s")
 
-# Set pate go wide 
+# Set pate go wide
 st.set_page_config(layout="wide")
 
 # Streamlit App Title
 st.title("📈 Stock Market and News Sentiment Analysis")
 
+# Every section below is a fragment: its own widgets rerun only that section. The inputs here are
+# shared by several sections, so changing them reruns the whole page (sections then reuse their
+# memoized artifacts wherever their own inputs are unchanged)
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
@@ -43,160 +56,314 @@ with col4:
     selected_interval = st.selectbox("Select Time Interval", interval_options, index=6)  # Default: "1d"
 
 
-# Toggle for Bollinger Bands & SMA
-show_bb = st.toggle("Show Bollinger Bands", value=False)
-show_sma = st.toggle("Show Simple Moving Average (SMA)", value=False)
+# Shared provider (rate limited + retried) and read-through cache over the stock_prices table
+@st.cache_resource
+def get_price_provider():
+    return throttled(YahooPriceProvider())
+
+@st.cache_resource
+def get_price_cache():
+    return PriceCache(get_price_provider())
 
-# Function to Fetch Stock Data with Error Handling
+@st.cache_resource
+def get_metadata_cache():
+    return CompanyMetadataCache(get_price_provider())
+
+# Function to Fetch Stock Data and Company Names for all tickers concurrently
 @st.cache_data
-def get_stock_data(ticker, start, end, interval):
-    try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(start=start, end=end, interval=interval)
-
-        if data.empty:
-            raise ValueError(f"{ticker}: No data found for selected interval ({interval}). Yahoo Finance restriction.")
-
-        return data
-    except Exception as e:
-        error_message = f"⚠️ Error fetching {ticker} data: {str(e)}"
-        logging.error(error_message)
-        return None  # Return None if there's an error
-
-# Function to Calculate Bollinger Bands
-def calculate_bollinger_bands(data, period=20):
-    data["BB_Middle"] = data["Close"].rolling(window=period).mean()
-    data["BB_Upper"] = data["BB_Middle"] + (data["Close"].rolling(window=period).std() * 2)
-    data["BB_Lower"] = data["BB_Middle"] - (data["Close"].rolling(window=period).std() * 2)
-    return data
-
-# Function to Calculate SMA with Validation
-def calculate_sma(data, period):
-    if period > 0 and period <= len(data):
-        data[f"SMA_{period}"] = data["Close"].rolling(window=period).mean()
+def fetch_market_data(tickers, start, end, interval):
+    return fetch_tickers(tickers, start, end, interval, get_price_provider(),
+                         cache=get_price_cache(), metadata=get_metadata_cache())
+
+# Function to read stored news for a ticker; `since` is rounded so reruns within a minute hit the cache
+@st.cache_data(ttl=60)
+def load_news(ticker, since):
+    return crud.query_news(tickers=[ticker] if ticker else None, since=since)
+
+# Function to run the news column filters against the full-text index, best matches first
+@st.cache_data(ttl=60)
+def search_news(ticker, since, filters):
+    return crud.query_news(tickers=[ticker] if ticker else None, since=since, filters=dict(filters),
+                           limit=NEWS_SEARCH_LIMIT)
+
+NEWS_SEARCH_LIMIT = 1000
+
+# Persisted sentiment snapshots older than this are dropped
+SENTIMENT_RETENTION_DAYS = 365
+
+# Rows of a persisted snapshot, in the order of the sentiment chart
+SNAPSHOT_COLUMNS = ["Bullish", "Neutral", "Bearish", "Combined Score"]
+
+NEWS_WINDOWS = {"Last 24 hours": 24 * 3600, "Last 7 days": 7 * 24 * 3600, "Last 30 days": 30 * 24 * 3600, "All": None}
+
+# Function to reuse a derived artifact (frame, figure, chart) of this session while its inputs are unchanged.
+# Unlike st.cache_data nothing is hashed or copied: `inputs` is compared as is, and every slot keeps
+# only its latest artifact. Slots are named "<section>/<what>" so a section can drop its own
+def session_memo(slot, inputs, build):
+    cache = st.session_state.setdefault("session_memo", {})
+    cached = cache.get(slot)
+    if cached is None or cached[0] != inputs:
+        cached = cache[slot] = (inputs, build())
+    return cached[1]
+
+# Function to drop the memoized artifacts of a section after its data changed
+def forget_session_memo(section):
+    cache = st.session_state.setdefault("session_memo", {})
+    for slot in [slot for slot in cache if slot.startswith(f"{section}/")]:
+        del cache[slot]
+
+# Function to identify a version of a series cheaply: new or corrected bars change it
+def bars_signature(data):
+    return len(data), data.index[0], data.index[-1], data["Close"].iloc[-1]
+
+# Function to add indicator columns, computing only bars that arrived since the previous rerun.
+# The engine state stops one bar short because the latest bar may still change on the next fetch.
+def indicators_for(ticker, interval, data, specs):
+    cache = st.session_state.setdefault("indicator_engines", {})
+    key = (ticker, interval, tuple(specs))
+    engine, closed = cache.get(key, (None, None))
+
+    if engine is None or closed.empty or closed.index[0] != data.index[0]:
+        # A new session picks up the state saved with the series (💾 Persist Data), so the engine only
+        # steps through the bars after it; the bars it already covers still need their values for the
+        # chart, computed in one vectorized pass
+        engine = load_incremental(ticker, interval, specs, data.index[:-1])
+        covered = data.loc[:engine.last_index] if engine.last_index is not None else data.iloc[:0]
+        closed = pd.concat([compute_indicators(covered, specs), engine.update(data.iloc[:-1])])
     else:
-        data[f"SMA_{period}"] = np.nan  # Invalid period, set to NaN
-    return data
-
-# Process multiple tickers
-ticker_list = [t.strip().upper() for t in tickers.split(",") if t.strip()]
+        closed = pd.concat([closed, engine.update(data.iloc[:-1])])
+    cache[key] = (engine, closed)
+
+    latest = IncrementalIndicators.from_state(engine.to_state()).update(data.iloc[-1:])
+    frame = pd.concat([closed, latest]).reindex(data.index)
+    return pd.concat([data.drop(columns=frame.columns, errors="ignore"), frame], axis=1)
+
+# Function to get the chart pyramid of a series, rebuilt only when the bars changed since the previous rerun
+def chart_pyramid(ticker, interval, data):
+    cache = st.session_state.setdefault("chart_pyramids", {})
+    key = (ticker, interval)
+    signature = bars_signature(data)
+    pyramid, cached_signature = cache.get(key, (None, None))
+    if pyramid is None or cached_signature != signature:
+        pyramid = OHLCPyramid(data)
+        cache[key] = (pyramid, signature)
+    return pyramid
+
+# Function to build the candlestick chart of the bars in [chart_start, chart_end] with the enabled overlays.
+# Only a point budget's worth of bars goes to the browser: merged OHLC bars from the pyramid,
+# LTTB-reduced overlays; zooming in picks a finer pyramid level
+def candlestick_figure(ticker, company_name, interval, data, chart_start, chart_end, show_bb, sma_period):
+    import plotly.graph_objects as go
+
+    bars = chart_pyramid(ticker, interval, data).view(chart_start, chart_end)
+    visible = data.loc[chart_start:chart_end]
+
+    # Candlestick Chart (No Range Slider)
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(
+        x=bars.index,
+        open=bars['Open'],
+        high=bars['High'],
+        low=bars['Low'],
+        close=bars['Close'],
+        name="Candlestick"
+    ))
+
+    # Add Bollinger Bands if enabled
+    if show_bb:
+        upper, lower = downsample_line(visible["BB_Upper"]), downsample_line(visible["BB_Lower"])
+        fig.add_trace(go.Scatter(
+            x=upper.index, y=upper, mode="lines", name="Upper Bollinger Band", line=dict(color='rgb(20, 10, 130)')
+        ))
+        fig.add_trace(go.Scatter(
+            x=lower.index, y=lower, mode="lines", name="Lower Bollinger Band", line=dict(color='rgb(20, 10, 130)')
+        ))
+
+    # Add SMA if enabled
+    if sma_period:
+        sma = downsample_line(visible[f"SMA_{sma_period}"])
+        fig.add_trace(go.Scatter(
+            x=sma.index, y=sma, mode="lines", name=f"SMA ({sma_period})", line=dict(color='blue')
+        ))
+
+    fig.update_layout(
+        title=f"{company_name} | Candlestick Chart ({interval} interval)",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        xaxis_rangeslider_visible=False  # Remove lower slicer
+    )
+    return fig
+
+# Function to render a matplotlib figure to PNG once: st.pyplot would rasterize it again on every rerun,
+# which costs more than the rest of a section's rerun
+def figure_png(fig):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+# Function to draw the sentiment distribution of the stored news
+def sentiment_distribution_chart(sentiment_data):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(7, 5))
+    ax.bar(sentiment_data["Sentiment"], sentiment_data["Count"], color=["green", "gray", "red", "blue"])
+    ax.set_xlabel("Sentiment Category")
+    ax.set_ylabel("Score")
+    ax.set_title("Sentiment Distribution and Combined Score")
+    return figure_png(fig)
+
+# Function to draw the stored combined sentiment score of every ticker
+def sentiment_summary_chart(sentiment_agg, start_date, end_date):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    bars = ax.bar(sentiment_agg["ticker"], sentiment_agg["combined_score"], color="royalblue")
+
+    # Add data labels on top of bars
+    for bar in bars:
+        ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height(),
+                f"{bar.get_height():.2f}", ha="center", va="bottom", fontsize=10, fontweight="bold")
+
+    ax.set_xlabel("Ticker", fontsize=12)
+    ax.set_ylabel("Combined Sentiment Score", fontsize=12)
+    ax.set_title(f"Sentiment Score by Ticker ({start_date} to {end_date})", fontsize=14)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    return figure_png(fig)
+
+
+@st.fragment
+def price_section(ticker_list, start_date, end_date, selected_interval):
+    # Toggle for Bollinger Bands & SMA
+    show_bb = st.toggle("Show Bollinger Bands", value=False)
+    show_sma = st.toggle("Show Simple Moving Average (SMA)", value=False)
+
+    if not ticker_list:
+        return
+    fetched = session_memo("prices/fetched", (ticker_list, start_date, end_date, selected_interval),
+                           lambda: fetch_market_data(ticker_list, start_date, end_date, selected_interval))
 
-if ticker_list:
     for ticker in ticker_list:
-        company_data = yf.Ticker(ticker)
-        company_name = company_data.info['longName']
+        company_name = fetched[ticker].name
         st.subheader(f"📊 {company_name} - {selected_interval} Interval Data")
+        st.caption(" · ".join(f"{kind} {seconds * 1000:.0f} ms" for kind, seconds in fetched[ticker].latency.items()))
 
-        data = get_stock_data(ticker, start_date, end_date, selected_interval)
+        data = fetched[ticker].data
 
         if data is None:
             st.error(f"⚠️ Error: No data available for {ticker} at {selected_interval} interval. Check the date range.")
+            continue
+
+        # Validate SMA Period Input only if SMA toggle is enabled
+        if show_sma:
+            max_period = len(data)
+            sma_period = st.number_input(
+                f"Enter SMA Period for {ticker}:",
+                min_value=1,
+                max_value=max_period,
+                value=min(20, max_period),  # Default to 20 or max available data
+                step=1
+            )
         else:
-            # Validate SMA Period Input only if SMA toggle is enabled
-            if show_sma:
-                max_period = len(data)
-                sma_period = st.number_input(
-                    f"Enter SMA Period for {ticker}:",
-                    min_value=1,
-                    max_value=max_period,
-                    value=min(20, max_period),  # Default to 20 or max available data
-                    step=1
-                )
+            sma_period = None  # If SMA is disabled, no period is needed
+
+        # Calculate all enabled indicators in a single pass
+        indicator_specs = []
+        if show_bb:
+            indicator_specs.append(("bollinger", 20, 2.0))
+        if show_sma and sma_period:
+            indicator_specs.append(("sma", sma_period))
+        if indicator_specs:
+            data = session_memo(f"prices/indicators/{ticker}",
+                                (selected_interval, tuple(indicator_specs), bars_signature(data)),
+                                lambda: indicators_for(ticker, selected_interval, data, indicator_specs))
+
+        with st.expander(f"📋 Show Data for {ticker}"):
+            st.write(data)
+
+        if st.button(f"💾 Persist Data for {ticker}"):
+            if not data.empty:
+                crud.save_stock_data_to_db(ticker, data, interval=selected_interval)
+                if indicator_specs:
+                    engine, _ = st.session_state.indicator_engines[(ticker, selected_interval, tuple(indicator_specs))]
+                    save_incremental(ticker, selected_interval, engine)
+                forget_session_memo("stored_prices")
+                st.success(f"✅ Stock price data for {ticker} has been saved to the database!")
             else:
-                sma_period = None  # If SMA is disabled, no period is needed
-
-            # Calculate Indicators if enabled
-            if show_bb:
-                data = calculate_bollinger_bands(data)
-            if show_sma and sma_period:
-                data = calculate_sma(data, sma_period)
-
-            with st.expander(f"📋 Show Data for {ticker}"):
-                st.write(data)
-
-            if st.button(f"💾 Persist Data for {ticker}"):
-                if not data.empty:
-                    crud.save_stock_data_to_db(ticker, data)
-                    st.success(f"✅ Stock price data for {ticker} has been saved to the database!")
-                else:
-                    st.warning(f"⚠️ No data available for {ticker} to save.")
-
-            if st.button(f"🗑️ Delete {ticker} Data"):
-                if not data.empty:
-                    crud.delete_stock_data(ticker)
-                    st.success(f"✅ Stock price data for {ticker} has been deleted from the database!")
-                else:
-                    st.warning(f"⚠️ No data available for {ticker} to save.")
-            
-
-            # Candlestick Chart (No Range Slider)
-            fig = go.Figure()
-            fig.add_trace(go.Candlestick(
-                x=data.index,
-                open=data['Open'],
-                high=data['High'],
-                low=data['Low'],
-                close=data['Close'],
-                name="Candlestick"
-            ))
-
-            # Add Bollinger Bands if enabled
-            if show_bb:
-                fig.add_trace(go.Scatter(
-                    x=data.index, y=data["BB_Upper"], mode="lines", name="Upper Bollinger Band", line=dict(color='rgb(20, 10, 130)')
-                ))
-                fig.add_trace(go.Scatter(
-                    x=data.index, y=data["BB_Lower"], mode="lines", name="Lower Bollinger Band", line=dict(color='rgb(20, 10, 130)')
-                ))
-
-            # Add SMA if enabled
-            if show_sma and sma_period:
-                fig.add_trace(go.Scatter(
-                    x=data.index, y=data[f"SMA_{sma_period}"], mode="lines", name=f"SMA ({sma_period})", line=dict(color='blue')
-                ))
-
-            fig.update_layout(
-                title=f"{company_name} | Candlestick Chart ({selected_interval} interval)",
-                xaxis_title="Date",
-                yaxis_title="Price",
-                xaxis_rangeslider_visible=False  # Remove lower slicer
-            )
-
-            st.plotly_chart(fig)
-
-
-st.markdown('''------''')
+                st.warning(f"⚠️ No data available for {ticker} to save.")
 
-# Section for Scraping Yahoo Finance News
-st.subheader("📢 Latest News & Sentiment Analysis")
-
-# User input for ticker to scrape news
-scrape_ticker = st.text_input("Enter Ticker Symbol for News Scraping:")
-
-# Separate button to scrape news without refreshing the whole app
-if st.button("📰 Scrape News"):
-    if scrape_ticker:
-        with st.spinner(f"Scraping news for {scrape_ticker} ..."):
-            result = subprocess.run(["python", "newsData.py", scrape_ticker], capture_output=True, text=True)
-            if result.returncode == 0:
-                st.success(f"✅ Successfully scraped news for {scrape_ticker}!")
-
-                # sentiment analysis
-                # subprocess.run(["python", "sentimentAnalysis.py", "news_articles_by_ticker.csv"], check=True)
-                subprocess.run([sys.executable, "sentimentAnalysis.py", "news_articles_by_ticker.csv"], check=True)
+        if st.button(f"🗑️ Delete {ticker} Data"):
+            if not data.empty:
+                crud.delete_stock_data(ticker)
+                forget_session_memo("stored_prices")
+                st.success(f"✅ Stock price data for {ticker} has been deleted from the database!")
             else:
-                st.error(f"⚠️ Error occurred: {result.stderr}")
-    else:
-        st.error("⚠️ Please enter a valid ticker symbol.")
-
+                st.warning(f"⚠️ No data available for {ticker} to save.")
+
+        chart_start, chart_end = data.index[0], data.index[-1]
+        if len(data) > DEFAULT_POINT_BUDGET:
+            zoom = st.slider(f"Chart Range for {ticker}", min_value=chart_start.to_pydatetime(),
+                             max_value=chart_end.to_pydatetime(), value=(chart_start.to_pydatetime(), chart_end.to_pydatetime()))
+            chart_start, chart_end = (pd.Timestamp(value).tz_localize(None).tz_localize(data.index.tz) for value in zoom)
+        fig = session_memo(f"prices/figure/{ticker}",
+                           (company_name, selected_interval, bars_signature(data), chart_start, chart_end,
+                            show_bb, show_sma and sma_period),
+                           lambda: candlestick_figure(ticker, company_name, selected_interval, data, chart_start,
+                                                      chart_end, show_bb, show_sma and sma_period))
+        st.plotly_chart(fig)
+
+
+@st.fragment
+def news_section():
+    # Section for Scraping Yahoo Finance News
+    st.subheader("📢 Latest News & Sentiment Analysis")
+
+    # User input for ticker to scrape news
+    scrape_ticker = st.text_input("Enter Ticker Symbol for News Scraping:")
+    news_ticker = scrape_ticker.strip().upper()
+
+    # Separate button to scrape news without refreshing the whole app
+    if st.button("📰 Scrape News"):
+        if scrape_ticker:
+            with st.spinner(f"Scraping news for {scrape_ticker} ..."):
+                try:
+                    from news_pipeline import run_news_pipeline  # the scraper and VADER load on first scrape
+
+                    # Scrape, extract, score and append the new articles to the news store in this process
+                    run = run_news_pipeline(news_ticker)
+                    timings = " · ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in run.timings.items())
+                    if run.articles.empty:
+                        st.info(f"No new news for {scrape_ticker} ({run.known} articles already stored).")
+                        st.caption(timings)
+                    else:
+                        load_news.clear()
+                        search_news.clear()
+                        # Once the news is clustered, new articles join their clusters as they are stored
+                        if crud.get_news_cluster_model():
+                            news_clusters.update_clusters()
+                        forget_session_memo("news")
+                        st.success(f"✅ Stored {len(run.articles)} new articles for {scrape_ticker} "
+                                   f"({run.known} already stored)!")
+                        st.caption(timings + f" · sentiment cache hit rate {run.articles.attrs['sentiment_cache']['hit_rate']:.0%}")
+                except Exception as e:
+                    logging.error(f"⚠️ Error scraping news for {scrape_ticker}: {e}")
+                    st.error(f"⚠️ Error occurred: {e}")
+        else:
+            st.error("⚠️ Please enter a valid ticker symbol.")
 
-try:
-    # Add table
-    file_name = "news_articles_by_ticker.csv"
-    ticker_news = pd.read_csv(file_name)
-    columns_to_drop = ["Affected Tickers"]
-    ticker_news = ticker_news.drop(columns_to_drop, axis=1)
+    news_window = st.selectbox("News Window", list(NEWS_WINDOWS), index=1)
+    # The minute is part of every news memo key, so articles stored by the ingest daemon show up within a minute
+    minute = int(time.time() // 60 * 60)
+    news_since = None
+    if NEWS_WINDOWS[news_window] is not None:
+        news_since = minute - NEWS_WINDOWS[news_window]
+    stored_news = session_memo("news/stored", (news_ticker, news_since, minute),
+                               lambda: load_news(news_ticker, news_since))
 
+    if stored_news.empty:
+        return
 
     # Column-wise search filters in a single row
     st.subheader("🔍 Filter News by Column")
@@ -210,142 +377,261 @@ try:
         with filter_cols_ticker[i]:  # Place each search box in the corresponding column
             search_filters_ticker[col_name] = st.text_input(f"Filter by {col_name}", "").strip()
 
-    # Apply search filters dynamically
-    for col, search_text in search_filters_ticker.items():
-        if search_text:
-            ticker_news = ticker_news[ticker_news[col].astype(str).str.contains(search_text, case=False, na=False)]
+    # Apply search filters as one indexed query (word prefixes, ranked by relevance)
+    active_filters = tuple((col, text) for col, text in search_filters_ticker.items() if text)
+    wordless = [col for col, text in active_filters if crud.news_match({col: text}) is None]
+    if wordless:
+        st.warning(f"No words to search for in the {', '.join(wordless)} filter, so no news matches it.")
 
-    st.subheader(f"📰 News & Sentiment Analysis")
-    st.dataframe(ticker_news, width=2000, height=600)  # Customize width & height
+    def filtered_news():
+        matches = search_news(news_ticker, news_since, active_filters) if active_filters else stored_news
+        return matches.drop(["Affected Tickers", "First Seen", "Published At"], axis=1)
 
-except FileNotFoundError:
-    pass
-    # st.warning(f"⚠️ {ticker_news} not found. Select a ticker to download the news for.")
+    ticker_news = session_memo("news/table", (news_ticker, news_since, minute, active_filters), filtered_news)
+    if active_filters and len(ticker_news) == NEWS_SEARCH_LIMIT:
+        st.caption(f"Showing the {NEWS_SEARCH_LIMIT} best matches.")
 
-news_file = "news_articles_by_ticker.csv"
+    st.subheader(f"📰 News & Sentiment Analysis")
+    st.dataframe(ticker_news, width=2000, height=600)  # Customize width & height
 
-try:
-    # Load data
-    df = pd.read_csv(news_file)
+    df = stored_news
 
     # Ensure the Sentiment column exists
     if "Sentiment" not in df.columns:
         st.error("❌ 'Sentiment' column not found in dataset!")
+        return
+
+    # Count occurrences of each sentiment category
+    sentiment_counts = df["Sentiment"].value_counts()
+
+    # Define sentiment weights
+    sentiment_weights = np.array([1, 0, -1])  # Bullish = 1, Neutral = 0, Bearish = -1
+    sentiment_values = np.array([
+        sentiment_counts.get("Bullish", 0),
+        sentiment_counts.get("Neutral", 0),
+        sentiment_counts.get("Bearish", 0)
+    ])
+
+    # Compute the combined sentiment score using a dot product
+    combined_score = np.dot(sentiment_values, sentiment_weights)
+
+    # Create a DataFrame for visualization
+    sentiment_data = pd.DataFrame({
+        "Sentiment": ["Bullish", "Neutral", "Bearish", "Combined Score"],
+        "Count": np.append(sentiment_values, combined_score)  # Append combined score as fourth bar
+    })
+
+    st.markdown('''------''')
+
+    # Streamlit App Title
+    st.subheader("📊 Sentiment Cluster Analysis")
+
+    if st.button("💾 Persist Sentiment Data"):
+        crud.save_sentiment_rows(news_ticker, zip(sentiment_data["Sentiment"], sentiment_data["Count"]))
+        crud.prune_sentiment_data(SENTIMENT_RETENTION_DAYS)
+        st.success("Data successfully saved to db.")
+
+    # Generate the Bar Chart, redrawn only when the counts change
+    chart = session_memo("news/sentiment_chart", tuple(sentiment_data["Count"].tolist()),
+                         lambda: sentiment_distribution_chart(sentiment_data))
+
+    # Display Bar Chart
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.image(chart, width="stretch")
+
+    # Topic clusters of the stored news, updated incrementally: only articles stored since the last
+    # update are vectorized and fitted, nothing already clustered is read again
+    if st.button("🧩 Update News Clusters"):
+        with st.spinner("Clustering new articles ..."):
+            assigned = news_clusters.update_clusters()
+        forget_session_memo("news")
+        st.success(f"✅ Clustered {assigned} new articles.")
+
+    clusters = session_memo("news/clusters", (news_ticker, minute),
+                            lambda: news_clusters.cluster_summary([news_ticker] if news_ticker else None))
+    if clusters.empty:
+        st.info("No news clusters yet: update them to group the stored articles by topic.")
     else:
-        # Count occurrences of each sentiment category
-        sentiment_counts = df["Sentiment"].value_counts()
-
-        # Define sentiment weights
-        sentiment_weights = np.array([1, 0, -1])  # Bullish = 1, Neutral = 0, Bearish = -1
-        sentiment_values = np.array([
-            sentiment_counts.get("Bullish", 0),
-            sentiment_counts.get("Neutral", 0),
-            sentiment_counts.get("Bearish", 0)
-        ])
-
-        # Compute the combined sentiment score using a dot product
-        combined_score = np.dot(sentiment_values, sentiment_weights)
-
-        # Create a DataFrame for visualization
-        sentiment_data = pd.DataFrame({
-            "Sentiment": ["Bullish", "Neutral", "Bearish", "Combined Score"],
-            "Count": np.append(sentiment_values, combined_score)  # Append combined score as fourth bar
-        })
-
-        st.markdown('''------''')
-
-        # Streamlit App Title
-        st.subheader("📊 Sentiment Cluster Analysis")
-
-        if st.button("💾 Persist Sentiment Data"):
-            for _, row in sentiment_data.iterrows():
-                crud.save_sentiment_to_db(scrape_ticker, row["Sentiment"], row["Count"])
-            st.success("Data successfully saved to db.")
+        st.caption(f"Sentiment of the stored articles per topic cluster"
+                   f"{f' (articles about {news_ticker})' if news_ticker else ''}.")
+        st.dataframe(clusters.rename(columns={
+            "cluster": "Cluster", "top_terms": "Top Terms", "articles": "Articles", "bullish": "Bullish",
+            "neutral": "Neutral", "bearish": "Bearish", "combined_score": "Combined Score",
+            "mean_compound": "Mean Compound"}), width=2000, hide_index=True)
+
+
+@st.fragment
+def stored_prices_section():
+    st.subheader("📊 Stored Stock Data")
+
+    db_filter_cols = st.columns(3)
+    with db_filter_cols[0]:
+        db_tickers = st.text_input("Filter Stored Tickers (comma-separated):", "")
+    with db_filter_cols[1]:
+        db_interval = st.selectbox("Stored Interval", ["All"] + interval_options, index=0)
+    with db_filter_cols[2]:
+        db_page_size = st.number_input("Rows per Page", min_value=100, max_value=10000, value=1000, step=100)
+
+    db_ticker_list = [t.strip().upper() for t in db_tickers.split(",") if t.strip()]
+    db_filters = (tuple(db_ticker_list), db_interval, db_page_size)
+
+    # Keyset cursors of the pages visited so far; changing a filter starts over at the first page
+    if st.session_state.get("db_filters") != db_filters:
+        st.session_state.db_filters = db_filters
+        st.session_state.db_page_keys = [None]
+
+    if st.button("🛢Load Data from DB"):
+        st.session_state.db_loaded = True
+        st.session_state.db_page_keys = [None]
+        forget_session_memo("stored_prices")
+
+    if st.session_state.get("db_loaded"):
+        page_keys = st.session_state.db_page_keys
+        stored_data = session_memo("stored_prices/page", (db_filters, page_keys[-1]), lambda: crud.query_stock_data(
+            tickers=db_ticker_list or None,
+            interval=None if db_interval == "All" else db_interval,
+            after=page_keys[-1],
+            limit=db_page_size,
+        ))
+        st.caption(f"Page {len(page_keys)}")
+        st.dataframe(stored_data)
+
+        # Callbacks run before the section reruns, so the new page shows on this click
+        prev_col, next_col = st.columns(2)
+        with prev_col:
+            st.button("⬅️ Previous Page", disabled=len(page_keys) == 1, on_click=page_keys.pop)
+        with next_col:
+            st.button("Next Page ➡️", disabled=len(stored_data) < db_page_size,
+                      on_click=page_keys.append, args=(crud.page_key(stored_data),))
+
+    if st.button("🗑️ Delete Data from DB"):
+        crud.truncate_stock_data()
+        st.session_state.db_page_keys = [None]
+        forget_session_memo("stored_prices")
+        st.success("All data was successfully deleted.")
+
+
+@st.fragment
+def stored_sentiment_section(start_date, end_date):
+    st.subheader("📊 Stored Sentiment Analysis")
+    sentiment_filter_cols = st.columns(2)
+    with sentiment_filter_cols[0]:
+        sentiment_tickers = st.text_input("Filter Sentiment Tickers (comma-separated):", "")
+    with sentiment_filter_cols[1]:
+        sentiment_window = st.selectbox("Moving Window (days)", [1, 7, 30], index=1)
+    sentiment_ticker_list = [t.strip().upper() for t in sentiment_tickers.split(",") if t.strip()]
+
+    if st.button("🛢 Load Sentiment Data"):
+        with st.spinner("Fetching sentiment data... ⏳"):
+            # Daily rollups are maintained as articles are stored, so this only reads precomputed aggregates
+            inputs = (tuple(sentiment_ticker_list), start_date, end_date, int(time.time() // 60))
+            sentiment_agg = session_memo("sentiment/summary", inputs,
+                                         lambda: crud.get_sentiment_summary(sentiment_ticker_list, start_date, end_date))
+
+            if sentiment_agg.empty:
+                st.warning("⚠️ No sentiment data available.")
+            else:
+                st.success("✅ Sentiment data loaded successfully!")
+
+                # Plot bar chart
+                chart = session_memo("sentiment/summary_chart", inputs,
+                                     lambda: sentiment_summary_chart(sentiment_agg, start_date, end_date))
+
+                # Display chart in Streamlit
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col2:
+                    st.image(chart, width="stretch")
+
+                # Trailing combined score per ticker over the selected window
+                sentiment_daily = session_memo(
+                    "sentiment/daily", (inputs, sentiment_window),
+                    lambda: crud.get_sentiment_daily(sentiment_ticker_list, start_date, end_date, sentiment_window)
+                    .pivot(index="day", columns="ticker", values="combined_window"))
+                st.line_chart(sentiment_daily)
+
+            # Snapshots saved with "Persist Sentiment Data", the latest of every ticker and day
+            snapshots = crud.get_sentiment_data_from_db()
+            if sentiment_ticker_list:
+                snapshots = snapshots[snapshots["ticker"].isin(sentiment_ticker_list)]
+            if not snapshots.empty:
+                st.caption("💾 Persisted sentiment snapshots")
+                st.dataframe(snapshots.pivot_table(index=["date", "ticker"], columns="sentiment",
+                                                   values="sentiment_score", aggfunc="last")
+                             .reindex(columns=SNAPSHOT_COLUMNS).sort_index(ascending=[False, True]), width=2000)
+
+    # Stored news joined onto the next stored price bar of every ticker it is about
+    # Bars come from the price snapshot as last refreshed (python snapshot.py, or the ingest snapshot job)
+    if st.button("📈 Does Sentiment Lead Price?"):
+        try:
+            prices = snapshot.PriceSnapshot()
+        except FileNotFoundError:
+            st.warning("⚠️ No price snapshot yet. Create it with `python snapshot.py` "
+                       "(or the `snapshot` job of ingest.py), then try again.")
+        else:
+            with st.spinner("Joining news onto price bars... ⏳"):
+                sentiment_lead = news_events.sentiment_lead(sentiment_ticker_list or None, interval="1d",
+                                                            prices=prices)
+            if not sentiment_lead["events"].any():
+                st.warning("⚠️ No stored article has daily prices after it in the price snapshot. "
+                           "Refresh it with `python snapshot.py` if prices were stored since.")
+            else:
+                st.caption("Forward return from the open of the first daily bar after publication, over N bars.")
+                st.dataframe(sentiment_lead, width=2000)
+
+    if st.button("🧹 Clean Sentiment DB"):
+        crud.clean_sentiment_data()
+        forget_session_memo("sentiment")
+        st.success("Records with missing data were deleted.")
+
+    if st.button("🗑️ Delete Sentiment Data"):
+        crud.delete_sentiment_data()
+        forget_session_memo("sentiment")
+        st.success("All data was successfully deleted.")
+
+
+@st.fragment
+def status_section():
+    # Show the last run of every background ingestion job (python ingest.py)
+    if st.button("🕒 Show Ingestion Status"):
+        ingest_runs = pd.DataFrame(crud.get_ingest_runs().values())
+        if ingest_runs.empty:
+            st.info("No ingestion job has run yet.")
+        else:
+            for column in ("last_started", "last_finished", "last_success"):
+                ingest_runs[column] = pd.to_datetime(ingest_runs[column], unit="s")
+            st.dataframe(ingest_runs.sort_values("job"), width=2000)
 
-        # Generate the Bar Chart
-        fig, ax = plt.subplots(figsize=(7, 5))
-        ax.bar(sentiment_data["Sentiment"], sentiment_data["Count"], color=["green", "gray", "red", "blue"])
-        ax.set_xlabel("Sentiment Category")
-        ax.set_ylabel("Score")
-        ax.set_title("Sentiment Distribution and Combined Score")
+    # Cost of every module this process imported, including the ones sections loaded on first use
+    if st.button("📦 Show Import Times"):
+        st.caption(import_timing.format_report())
+        st.dataframe(import_timing.report(nested=True), width=2000)
 
-        # Display Bar Chart
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            st.pyplot(fig)
+    # Show Error Log Button
+    if st.button("Show Error Log"):
+        try:
+            with open("error_log.txt", "r") as file:
+                st.text(file.read())
+        except FileNotFoundError:
+            st.warning("No errors logged yet.")
 
-except FileNotFoundError:
-    pass
 
+# Process multiple tickers
+ticker_list = tuple(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+price_section(ticker_list, start_date, end_date, selected_interval)
 
 st.markdown('''------''')
 
-
-st.subheader("📊 Stored Stock Data")
-
-if st.button("🛢Load Data from DB"):
-    stored_data = crud.get_stock_data_from_db()
-    st.dataframe(stored_data)
-
-if st.button("🗑️ Delete Data from DB"):
-    crud.truncate_stock_data()
-    st.success("All data was successfully deleted.")
-    
+news_section()
 
 st.markdown('''------''')
 
+stored_prices_section()
 
-st.subheader("📊 Stored Sentiment Analysis")
-if st.button("🛢 Load Sentiment Data"):
-    sentiment_data = crud.get_sentiment_data_from_db()
-
-    with st.spinner("Fetching sentiment data... ⏳"):
-        sentiment_df = crud.get_sentiment_data_from_db()
-
-        if sentiment_df.empty:
-            st.warning("⚠️ No sentiment data available.")
-        else:
-            st.success("✅ Sentiment data loaded successfully!")
-
-            # Aggregate data by ticker (sum sentiment scores per ticker)
-            sentiment_agg = sentiment_df[sentiment_df["sentiment"] == "Combined Score"]  # sentiment_df.groupby("ticker")["sentiment_score"].sum().reset_index()
-            sentiment_agg = sentiment_agg.groupby("ticker")["sentiment_score"].mean().reset_index()
-
-            # Plot bar chart
-            fig, ax = plt.subplots(figsize=(10, 5))
-            bars = ax.bar(sentiment_agg["ticker"], sentiment_agg["sentiment_score"], color="royalblue")
-
-            # Add data labels on top of bars
-            for bar in bars:
-                ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height(),
-                        f"{bar.get_height():.2f}", ha="center", va="bottom", fontsize=10, fontweight="bold")
-
-            ax.set_xlabel("Ticker", fontsize=12)
-            ax.set_ylabel("Combined Sentiment Score", fontsize=12)
-            ax.set_title("Sentiment Score by Ticker", fontsize=14)
-            ax.grid(axis="y", linestyle="--", alpha=0.7)
-
-            # Display chart in Streamlit
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                st.pyplot(fig)
-
-
-if st.button("🧹 Clean Sentiment DB"):
-    crud.clean_sentiment_data()
-    st.success("Records with missing data were deleted.")
-
-if st.button("🗑️ Delete Sentiment Data"):
-    crud.delete_sentiment_data()
-    st.success("All data was successfully deleted.")
+st.markdown('''------''')
 
+stored_sentiment_section(start_date, end_date)
 
 st.markdown('''------''')
 
-# Show Error Log Button
-if st.button("Show Error Log"):
-    try:
-        with open("error_log.txt", "r") as file:
-            st.text(file.read())
-    except FileNotFoundError:
-        st.warning("No errors logged yet.")
+status_section()
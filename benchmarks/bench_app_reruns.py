@@ -0,0 +1,115 @@
+"""Latency of typical interactions with the Streamlit app, one script run per interaction (needs streamlit).
+
+Usage: python -m benchmarks.bench_app_reruns [--rev <git revision>] [repeats]
+
+The app runs offline against a temporary database holding synthetic daily bars of its default ticker
+(with their price coverage and company metadata, so nothing is fetched from Yahoo) and a few thousand
+scored articles. `--rev` runs app.py as of another revision against the same fixture, e.g.
+`--rev HEAD~1` for the layout before fragments. AppTest reruns the whole script for every interaction,
+so the numbers are what one interaction costs across all sections; in the browser a widget inside a
+fragment reruns only its own section.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import ROOT, random_headlines, random_walk_ohlcv, temp_database
+
+import crud
+
+TICKER = "MSFT"
+N_ARTICLES = 3_000
+APP_TIMEOUT_SECONDS = 120
+
+
+def store_fixture():
+    today = pd.Timestamp.today().normalize()
+    bars = random_walk_ohlcv(len(pd.bdate_range("2024-01-01", today)), start="2024-01-01", freq="B")
+    crud.save_stock_data_bulk(bars, ticker=TICKER)
+    crud.add_price_coverage(TICKER, "1d", "2024-01-01", today.strftime("%Y-%m-%d"))
+    crud.save_company_metadata([{"ticker": TICKER, "name": "Microsoft Corporation", "exchange": "NMS",
+                                 "currency": "USD", "sector": "Technology", "fetched_at": time.time()}])
+
+    rng = np.random.default_rng(0)
+    compound = rng.uniform(-1, 1, N_ARTICLES)
+    crud.save_news_articles(
+        [{"link_hash": f"h{i}", "title": title, "description": description, "source": "Reuters",
+          "published": "1h ago", "tickers": TICKER, "link": f"https://example.com/{i}", "compound": compound[i],
+          "sentiment": "Bullish" if compound[i] > 0.05 else "Bearish" if compound[i] < -0.05 else "Neutral"}
+         for i, (title, description) in enumerate(random_headlines(N_ARTICLES))],
+        [(TICKER, f"h{i}") for i in range(N_ARTICLES)])
+
+
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+# Typical interactions: (name, action applied to the AppTest before its run); `i` alternates the values
+ACTIONS = [
+    ("idle rerun", lambda at, i: at),
+    ("toggle Bollinger Bands", lambda at, i: widget(at.toggle, "Show Bollinger Bands").set_value(i % 2 == 0)),
+    ("type a news ticker", lambda at, i: widget(at.text_input, "Enter Ticker Symbol for News Scraping:")
+        .set_value(TICKER if i % 2 == 0 else TICKER.lower() + " ")),
+    ("type a news title filter", lambda at, i: widget(at.text_input, "Filter by Title")
+        .set_value(["rally", "slump", "surge"][i % 3])),
+    ("change the news window", lambda at, i: widget(at.selectbox, "News Window")
+        .set_value(["Last 30 days", "All"][i % 2])),
+    ("load stored prices", lambda at, i: widget(at.button, "🛢Load Data from DB").click()),
+    ("change the sentiment window", lambda at, i: widget(at.selectbox, "Moving Window (days)")
+        .set_value([1, 30][i % 2])),
+]
+
+
+def app_source(rev):
+    if rev is None:
+        return os.path.join(ROOT, "app.py")
+    source = subprocess.run(["git", "show", f"{rev}:app.py"], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout
+    path = os.path.join(tempfile.mkdtemp(), "app.py")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(source)
+    return path
+
+
+def run(rev=None, repeats=5):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    with temp_database() as db_path:
+        crud.configure(db_path)
+        store_fixture()
+        st.cache_data.clear()
+        st.cache_resource.clear()
+
+        at = AppTest.from_file(app_source(rev), default_timeout=APP_TIMEOUT_SECONDS)
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+        print(f"app.py at {rev or 'the working tree'}: first run {first * 1000:.0f} ms")
+        for name, action in ACTIONS:
+            timings = []
+            for i in range(repeats):
+                action(at, i)
+                start = time.perf_counter()
+                at.run()
+                timings.append(time.perf_counter() - start)
+            print(f"  {name:<30} median {statistics.median(timings) * 1000:8.1f} ms  "
+                  f"min {min(timings) * 1000:8.1f} ms")
+        crud.get_db().close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    rev = None
+    if args[:1] == ["--rev"]:
+        rev, args = args[1], args[2:]
+    run(rev, *[int(arg) for arg in args[:1]])
@@ -0,0 +1,66 @@
+"""Candlestick + Bollinger/SMA chart payload: every bar vs the downsampled level-of-detail view.
+
+Reports the Plotly JSON size sent to the browser and the time to prepare it (indicators excluded).
+Usage: python -m benchmarks.bench_chart [sizes...]
+"""
+import sys
+import time
+
+import plotly.graph_objects as go
+
+from benchmarks.common import random_walk_ohlcv
+
+from downsampling import OHLCPyramid, downsample_line
+from indicators import with_indicators
+
+SPECS = [("bollinger", 20, 2.0), ("sma", 50)]
+OVERLAYS = ["BB_Upper", "BB_Lower", "SMA_50"]
+
+
+def figure(bars, overlays):
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(x=bars.index, open=bars["Open"], high=bars["High"], low=bars["Low"],
+                                 close=bars["Close"], name="Candlestick"))
+    for name, line in overlays.items():
+        fig.add_trace(go.Scatter(x=line.index, y=line, mode="lines", name=name))
+    return fig.to_json()
+
+
+def full(data):
+    return figure(data, {name: data[name] for name in OVERLAYS})
+
+
+def downsampled(data, pyramid=None, start=None, end=None):
+    pyramid = pyramid or OHLCPyramid(data)
+    visible = data.loc[start:end]
+    return figure(pyramid.view(start, end), {name: downsample_line(visible[name]) for name in OVERLAYS})
+
+
+def best(fn, *args, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def run(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'bars':>10}{'full':>22}{'downsampled':>22}{'zoom (cached pyramid)':>26}")
+    for n in sizes:
+        data = with_indicators(random_walk_ohlcv(n, freq="min"), SPECS)
+        full_time, full_json = best(full, data, repeats=1 if n >= 1_000_000 else 3)
+        lod_time, lod_json = best(downsampled, data)
+
+        pyramid = OHLCPyramid(data)
+        start, end = data.index[n // 3], data.index[n // 3 + n // 10]
+        zoom_time, zoom_json = best(downsampled, data, pyramid, start, end)
+
+        def cell(seconds, payload):
+            return f"{len(payload) / 1e6:8.2f} MB {seconds * 1000:8.1f} ms"
+
+        print(f"{n:>10,}  {cell(full_time, full_json)}  {cell(lod_time, lod_json)}  {cell(zoom_time, zoom_json)}")
+
+
+if __name__ == "__main__":
+    run(*([[int(arg) for arg in sys.argv[1:]]] if sys.argv[1:] else []))
@@ -0,0 +1,84 @@
+"""Read throughput with N reader threads and one writer: pooled crud connections vs connect-per-call.
+
+Usage: python -m benchmarks.bench_concurrency [n_readers] [seconds]
+"""
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+from benchmarks.common import random_watchlist, temp_database
+
+import crud
+
+READ_SQL = '''
+    SELECT p.ts, p.close FROM tickers t JOIN stock_prices p ON p.ticker_id = t.id
+    WHERE t.symbol=? AND p.interval='1d' AND p.ts >= ? ORDER BY p.ts LIMIT 20
+'''
+START_TS = 1104537600  # 2005-01-01
+
+
+def pooled_read(db_path, ticker):
+    return crud.get_db().connection().execute(READ_SQL, (ticker, START_TS)).fetchone()
+
+
+# The original pattern: open, query, close on every call
+def per_call_read(db_path, ticker):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(READ_SQL, (ticker, START_TS)).fetchone()
+    finally:
+        conn.close()
+
+
+def run_mode(db_path, read, tickers, frames, n_readers, seconds):
+    stop = threading.Event()
+    reads = [0] * n_readers
+    writes = [0]
+
+    def reader(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            read(db_path, rng.choice(tickers))
+            reads[slot] += 1
+
+    def writer():
+        items = list(frames.items())
+        while not stop.is_set():
+            for ticker, frame in items:
+                if stop.is_set():
+                    break
+                crud.save_stock_data_bulk(frame, ticker=ticker, upsert=True)
+                writes[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(n_readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return sum(reads) / seconds, writes[0] / seconds
+
+
+def run(n_readers=8, seconds=5.0):
+    frames = random_watchlist(20, 5_000)
+    tickers = list(frames)
+    writer_frames = {ticker: frame.tail(50) for ticker, frame in frames.items()}
+
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        crud.save_stock_data_bulk(frames)
+
+        for name, read in [("connect-per-call", per_call_read), ("pooled", pooled_read)]:
+            read_rate, write_rate = run_mode(db_path, read, tickers, writer_frames, n_readers, seconds)
+            print(f"{name:>16}: {read_rate:10,.0f} reads/s  {write_rate:8,.1f} writes/s  ({n_readers} readers, 1 writer)")
+        db.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    run(int(args[0]) if args else 8, float(args[1]) if len(args) > 1 else 5.0)
@@ -0,0 +1,60 @@
+"""Article extraction: extract_articles (html.parser, per-field find) vs extract_articles_fast.
+
+Checks identical output on every page, then reports pages/sec for both implementations.
+Usage: python -m benchmarks.bench_extraction [saved_pages_dir] [--pages N]
+"""
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.common import yahoo_news_page
+
+import newsData
+
+
+def load_corpus(directory=None, n_pages=50):
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, "*.html")))
+        corpus = []
+        for path in paths:
+            with open(path, encoding="utf-8") as file:
+                corpus.append(file.read())
+        return corpus
+    return [yahoo_news_page(20 + (i * 7) % 100, seed=i) for i in range(n_pages)]
+
+
+def pages_per_second(extract, corpus, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for page in corpus:
+            extract(page)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def reference(page):
+    return newsData.extract_articles(BeautifulSoup(page, "html.parser"))
+
+
+def run(directory=None, n_pages=50):
+    corpus = load_corpus(directory, n_pages)
+    for i, page in enumerate(corpus):
+        assert newsData.extract_articles_fast(page) == reference(page), f"page {i} differs"
+    print(f"identical output on {len(corpus)} pages")
+
+    backend = "lxml + XPath" if newsData.lxml is not None else "html.parser + SoupStrainer"
+    print(f"{'extract_articles':>34}: {pages_per_second(reference, corpus):8.1f} pages/s")
+    print(f"{f'extract_articles_fast ({backend})':>34}: {pages_per_second(newsData.extract_articles_fast, corpus):8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    n_pages = 50
+    if "--pages" in args:
+        n_pages = int(args[args.index("--pages") + 1])
+        del args[args.index("--pages"):args.index("--pages") + 2]
+    run(args[0] if args else None, n_pages)
@@ -0,0 +1,48 @@
+"""Serial ticker loop vs the concurrent fetch stage, against a fake provider with artificial latency.
+
+Usage: python -m benchmarks.bench_fetch [n_tickers] [latency_seconds]
+"""
+import sys
+
+from benchmarks.common import random_walk_ohlcv, timed
+
+import market_data
+from providers import InMemoryPriceProvider
+
+
+def make_provider(n_tickers, latency):
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    frames = {(ticker, "1d"): random_walk_ohlcv(2_000, seed=i) for i, ticker in enumerate(tickers)}
+    infos = {ticker: {"longName": f"{ticker} Corp."} for ticker in tickers}
+    return tickers, InMemoryPriceProvider(frames, infos, latency=latency)
+
+
+def run(n_tickers=30, latency=0.2):
+    tickers, provider = make_provider(n_tickers, latency)
+    start, end = "2003-01-01", "2008-01-01"
+    results = {}
+
+    # The original loop: .info then history, one ticker after the other
+    with timed(results, "serial"):
+        for ticker in tickers:
+            provider.info(ticker)["longName"]
+            provider.history(ticker, start, end, "1d")
+
+    with timed(results, "concurrent"):
+        fetched = market_data.fetch_tickers(tickers, start, end, "1d", provider)
+
+    market_data.PROVIDER_RATE_LIMITS[provider.name] = 20.0
+    with timed(results, "concurrent, 20 req/s limit"):
+        market_data.fetch_tickers(tickers, start, end, "1d", provider)
+
+    print(f"{n_tickers} tickers, {latency * 1000:.0f} ms per request")
+    for name, seconds in results.items():
+        print(f"{name:>28}: {seconds:6.2f} s")
+
+    slowest = max(fetched.values(), key=lambda fetch: sum(fetch.latency.values()))
+    print(f"slowest ticker: {slowest.ticker} {slowest.latency}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    run(int(args[0]) if args else 30, float(args[1]) if len(args) > 1 else 0.2)
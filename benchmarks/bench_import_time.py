@@ -0,0 +1,96 @@
+"""Cold import time of the modules app.py imports at startup, checked against a budget.
+
+Usage: python -m benchmarks.bench_import_time [--budget-ms N] [--repeats N]
+
+Every measurement runs in a fresh interpreter that has already imported what the Streamlit server
+loads anyway (PRELOADED), then times the top-level imports of app.py with import_timing. Exits
+with status 1 when the median total is over the budget, or when any of DEFERRED gets imported at
+startup; both are regressions of the lazy imports the app relies on for a fast cold start.
+tests/test_import_time.py runs the same check with the test suite.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import ROOT
+
+# Milliseconds for all of app.py's startup imports together, beyond PRELOADED
+IMPORT_BUDGET_MS = 50
+
+PRELOADED = ["streamlit", "numpy", "pandas"]
+
+# Libraries only some sections need; they must load on first use, never at startup
+DEFERRED = ["nltk", "sklearn", "scipy", "yfinance", "selenium", "matplotlib", "seaborn", "bs4", "requests"]
+
+MEASURE = '''
+import json, sys
+for name in {preloaded!r}:
+    __import__(name)
+before = set(sys.modules)
+import import_timing
+import_timing.install()
+for name in {modules!r}:
+    __import__(name)
+import_timing.uninstall()
+imports = import_timing.report()
+print(json.dumps({{
+    "total_ms": float(imports["cumulative_ms"].sum()),
+    "modules": dict(zip(imports["module"], imports["cumulative_ms"].astype(float))),
+    "deferred_loaded": sorted(name for name in {deferred!r} if name in set(sys.modules) - before),
+}}))
+'''
+
+
+def startup_modules(path=os.path.join(ROOT, "app.py")):
+    """Modules imported at the top level of app.py (not inside functions), in order."""
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return [name for name in dict.fromkeys(modules) if name.split(".")[0] not in PRELOADED]
+
+
+def measure(modules):
+    code = MEASURE.format(preloaded=PRELOADED, modules=modules, deferred=DEFERRED)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help="budget for the median total (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    modules = startup_modules()
+    runs = [measure(modules) for _ in range(args.repeats)]
+    total = statistics.median(run["total_ms"] for run in runs)
+
+    print(f"app.py startup imports ({len(modules)} modules, after {', '.join(PRELOADED)}), "
+          f"median of {args.repeats} cold runs:")
+    for name in modules:
+        print(f"  {name:<24} {statistics.median(run['modules'].get(name, 0.0) for run in runs):8.1f} ms")
+    print(f"  {'total':<24} {total:8.1f} ms   budget {args.budget_ms:.0f} ms")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"startup imports take {total:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    loaded = sorted({name for run in runs for name in run["deferred_loaded"]})
+    if loaded:
+        failures.append(f"imported at startup but meant to load on first use: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
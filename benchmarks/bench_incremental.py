@@ -0,0 +1,51 @@
+"""Incremental indicator updates: per-tick cost vs recomputing the whole history.
+
+Usage: python -m benchmarks.bench_incremental [history_bars]
+
+tests/test_incremental_indicators.py checks that both give the same values.
+"""
+import sys
+import time
+
+from benchmarks.bench_indicators import SPECS
+from benchmarks.common import random_walk_ohlcv, temp_database
+
+import crud
+from indicators import IncrementalIndicators, compute_indicators, load_incremental, save_incremental
+
+
+def run(history_bars=1_000_000, ticks=200):
+    data = random_walk_ohlcv(history_bars + ticks, freq="min", seed=5)
+    engine = IncrementalIndicators(SPECS)
+    engine.update(data.iloc[:history_bars])
+
+    start = time.perf_counter()
+    for i in range(history_bars, history_bars + ticks):
+        engine.update(data.iloc[i:i + 1])
+    incremental = (time.perf_counter() - start) / ticks
+
+    start = time.perf_counter()
+    for i in range(history_bars, history_bars + 5):
+        compute_indicators(data.iloc[:i + 1], SPECS)
+    full = (time.perf_counter() - start) / 5
+
+    # A restarted process: load the saved state, step one bar, save it again
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        save_incremental("BENCH", "1m", engine)
+        start = time.perf_counter()
+        for i in range(history_bars + ticks - 20, history_bars + ticks):
+            resumed = load_incremental("BENCH", "1m", SPECS)
+            resumed.update(data.iloc[i:i + 1])
+            save_incremental("BENCH", "1m", resumed)
+        resume = (time.perf_counter() - start) / 20
+        db.close()
+
+    print(f"{history_bars:,} bars of history, {len(SPECS)} indicators")
+    print(f"  full recompute per tick: {full * 1000:9.2f} ms")
+    print(f"  incremental per tick:    {incremental * 1000:9.2f} ms")
+    print(f"  resumed from the database per tick: {resume * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,73 @@
+"""Rows/sec of the bulk ingest path versus the original one-INSERT-per-row loop.
+
+Usage: python -m benchmarks.bench_ingest [n_tickers] [bars_per_ticker]
+"""
+import sqlite3
+import sys
+
+from benchmarks.common import random_watchlist, temp_database, timed
+
+import crud
+
+
+# The original implementation, kept here as the baseline
+def legacy_save(db_path, ticker, data):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for index, row in data.iterrows():
+        cursor.execute('''
+            INSERT OR IGNORE INTO stock_prices (ticker, date, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (ticker, index.strftime("%Y-%m-%d"), row['Open'], row['High'], row['Low'], row['Close'], int(row['Volume'])))
+    conn.commit()
+    conn.close()
+
+
+def create_schema(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stock_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            date TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            UNIQUE(ticker, date)
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def run(n_tickers=200, bars_per_ticker=5_000):
+    frames = random_watchlist(n_tickers, bars_per_ticker)
+    n_rows = n_tickers * bars_per_ticker
+    results = {}
+
+    with temp_database() as db_path:
+        create_schema(db_path)
+        with timed(results, "legacy"):
+            for ticker, frame in frames.items():
+                legacy_save(db_path, ticker, frame)
+
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        with timed(results, "bulk"):
+            counts = crud.save_stock_data_bulk(frames)
+        with timed(results, "bulk_upsert_rerun"):
+            rerun = crud.save_stock_data_bulk(frames, upsert=True)
+        db.close()
+
+    print(f"{n_rows:,} rows across {n_tickers} tickers")
+    for name, seconds in results.items():
+        print(f"{name:>18}: {seconds:8.2f} s  {n_rows / seconds:12,.0f} rows/s")
+    print(f"first load: {counts}")
+    print(f"upsert rerun: {rerun}")
+    return results
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
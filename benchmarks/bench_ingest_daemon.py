@@ -0,0 +1,64 @@
+"""Headless ingestion end to end, offline: in-memory price provider + news pages from a local fixture server.
+
+Runs one full pass of the schedule with 1 and with N workers, then a second pass that finds nothing due.
+Usage: python -m benchmarks.bench_ingest_daemon [n_tickers] [workers] [latency]
+"""
+import sys
+
+import pandas as pd
+
+from benchmarks.common import random_walk_ohlcv, temp_database, timed, yahoo_news_page
+from benchmarks.fixture_server import FixtureServer
+
+import crud
+import newsData
+from ingest import IngestDaemon, Schedule, YAHOO_BASE_URL, print_runs
+from page_fetcher import HttpFetcher
+from providers import InMemoryPriceProvider
+
+
+def fixtures(tickers, latency):
+    today = pd.Timestamp.today().normalize()
+    frames = {(ticker, "1d"): random_walk_ohlcv(400, start=today - pd.Timedelta(days=399), seed=i)
+              for i, ticker in enumerate(tickers)}
+    infos = {ticker: {"longName": f"{ticker} Corp", "exchange": "NMS", "currency": "USD"} for ticker in tickers}
+    pages = {newsData.TICKER_NEWS_URL.format(ticker=ticker)[len(YAHOO_BASE_URL):]:
+             yahoo_news_page(30, seed=i, link_prefix=f"https://finance.yahoo.com/news/{ticker}-")
+             for i, ticker in enumerate(tickers)}
+    pages[newsData.GENERAL_NEWS_URL[len(YAHOO_BASE_URL):]] = yahoo_news_page(40, seed=999)
+    return InMemoryPriceProvider(frames, infos, latency=latency), pages
+
+
+def run(n_tickers=12, workers=8, latency=0.05):
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    schedule = Schedule(tickers=tickers, lookback_days=365)
+    elapsed = {}
+
+    for n_workers in (1, workers):
+        provider, pages = fixtures(tickers, latency)
+        with temp_database() as db_path, FixtureServer(pages, latency=latency) as server:
+            db = crud.configure(db_path)
+            fetcher = HttpFetcher()
+            daemon = IngestDaemon(schedule, provider=provider, fetcher=fetcher, news_base_url=server.base_url,
+                                  max_workers=n_workers, news_rate=100.0, retry_delay=0.01)
+            with timed(elapsed, n_workers):
+                runs = daemon.run_once()
+            failed = [job for job, run in runs.items() if run["status"] != "ok"]
+            assert not failed, failed
+
+            stored_bars = len(crud.query_stock_data(tickers=tickers))
+            stored_news = len(crud.query_news())
+            again = daemon.due_jobs()
+            fetcher.close()
+            db.close()
+
+        print(f"{n_workers} worker(s): {len(runs)} jobs in {elapsed[n_workers]:.2f} s, "
+              f"{stored_bars:,} bars and {stored_news} articles stored, {len(again)} jobs due right after")
+
+    print()
+    print_runs({job: run for job, run in sorted(runs.items())[:6]})
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(*[int(arg) for arg in args[:2]], *[float(arg) for arg in args[2:3]])
@@ -0,0 +1,52 @@
+"""Cold vs warm company-metadata lookups for a watchlist, plus the stale fallback when the provider is down.
+
+Usage: python -m benchmarks.bench_metadata [n_tickers] [latency_seconds]
+"""
+import sys
+
+from benchmarks.common import temp_database, timed
+
+import crud
+from company_metadata import CompanyMetadataCache
+from providers import InMemoryPriceProvider
+
+
+def run(n_tickers=100, latency=0.3):
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    infos = {
+        ticker: {"longName": f"{ticker} Corp.", "exchange": "NMS", "currency": "USD", "sector": "Technology"}
+        for ticker in tickers
+    }
+    provider = InMemoryPriceProvider({}, infos, latency=latency)
+    results = {}
+
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+
+        cache = CompanyMetadataCache(provider)
+        with timed(results, "cold (provider)"):
+            cache.prefetch(tickers)
+        with timed(results, "warm (memory LRU)"):
+            cache.get_many(tickers)
+
+        # A fresh process: empty LRU, entries come from the company_metadata table
+        restarted = CompanyMetadataCache(provider)
+        with timed(results, "warm (SQLite)"):
+            restarted.get_many(tickers)
+
+        # Expired entries and a provider that is down: stale rows are served
+        provider.infos = {}
+        expired = CompanyMetadataCache(provider, ttl=0)
+        with timed(results, "expired, provider down"):
+            expired.get_many(tickers)
+        db.close()
+
+    print(f"{n_tickers} tickers, {latency * 1000:.0f} ms per provider call")
+    for name, seconds in results.items():
+        print(f"{name:>24}: {seconds * 1000:9.1f} ms")
+    print(f"stale fallback stats: {expired.stats}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    run(int(args[0]) if args else 100, float(args[1]) if len(args) > 1 else 0.3)
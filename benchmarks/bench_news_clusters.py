@@ -0,0 +1,144 @@
+"""Topic clustering of stored news: hashing + mini-batch k-means updated in place, vs refitting
+TF-IDF + k-means whenever articles arrive.
+
+Usage: python -m benchmarks.bench_news_clusters [n_articles ...]
+
+Defaults to corpora of 10k, 100k and 1M synthetic headlines. For each size, in memory: the first
+incremental fit, adding NEW_ARTICLES more to it, and the full refit (TF-IDF vocabulary + k-means) that
+every update would take without partial_fit, up to REFIT_MAX articles. Then end to end through SQLite:
+news_clusters.update_clusters() over the stored corpus, and again after NEW_ARTICLES more are stored.
+Peak memory is what tracemalloc sees allocated during each step, from a separate untimed run.
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import random_headlines, temp_database
+
+import crud
+import news_clusters
+
+SIZES = [10_000, 100_000, 1_000_000]
+NEW_ARTICLES = 1_000
+REFIT_MAX = 100_000
+STORE_BATCH = 50_000
+
+
+def texts(n, seed=0):
+    return [f"{title} {description}" for title, description in random_headlines(n, seed=seed, distinct=min(n, 200_000))]
+
+
+def incremental_fit(corpus):
+    vectorizer, model = news_clusters.make_vectorizer(), news_clusters.make_model()
+    for lo in range(0, len(corpus), news_clusters.CHUNK_ARTICLES):
+        features = vectorizer.transform(corpus[lo:lo + news_clusters.CHUNK_ARTICLES])
+        for start in range(0, features.shape[0], news_clusters.BATCH_SIZE):
+            model.partial_fit(features[start:start + news_clusters.BATCH_SIZE])
+        model.predict(features)
+    return model
+
+
+def incremental_update(model, new):
+    features = news_clusters.make_vectorizer().transform(new)
+    model.partial_fit(features)
+    return model.predict(features)
+
+
+def full_refit(corpus):
+    from sklearn.cluster import KMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    features = TfidfVectorizer(stop_words="english", dtype=np.float32).fit_transform(corpus)
+    return KMeans(n_clusters=news_clusters.N_CLUSTERS, n_init=1, random_state=0).fit_predict(features)
+
+
+def measure(step, *args):
+    """(seconds, peak MB allocated, result) of step(*args); the memory comes from a second, traced run."""
+    start = time.perf_counter()
+    result = step(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    step(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6, result
+
+
+def report(name, seconds, peak_mb, n):
+    print(f"  {name:<34} {seconds:8.2f} s  {n / seconds:10,.0f} articles/s  peak {peak_mb:8.1f} MB")
+
+
+def in_memory(n):
+    corpus, new = texts(n), texts(NEW_ARTICLES, seed=1)
+    print(f"\n{n:,} headlines in memory ({news_clusters.N_CLUSTERS} clusters, {news_clusters.N_FEATURES:,} hashed features)")
+    seconds, peak, model = measure(incremental_fit, corpus)
+    report("hashing + mini-batch first fit", seconds, peak, n)
+    seconds, peak, _ = measure(incremental_update, model, new)
+    report(f"update with {NEW_ARTICLES:,} new articles", seconds, peak, NEW_ARTICLES)
+    if n <= REFIT_MAX:
+        seconds, peak, _ = measure(full_refit, corpus + new)
+        report("TF-IDF + k-means full refit", seconds, peak, n + NEW_ARTICLES)
+    else:
+        print(f"  TF-IDF + k-means full refit        skipped above {REFIT_MAX:,} articles")
+
+
+def store(corpus, offset=0):
+    rng = np.random.default_rng(offset)
+    compound = rng.uniform(-1, 1, len(corpus))
+    for lo in range(0, len(corpus), STORE_BATCH):
+        rows = range(lo, min(lo + STORE_BATCH, len(corpus)))
+        crud.save_news_articles(
+            [{"link_hash": f"h{offset + i}", "title": corpus[i], "compound": compound[i],
+              "sentiment": "Bullish" if compound[i] > 0.05 else "Bearish" if compound[i] < -0.05 else "Neutral"}
+             for i in rows], [])
+
+
+def traced(step):
+    """Peak MB allocated while step() runs (tracemalloc slows it down, so it is timed separately)."""
+    tracemalloc.start()
+    step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def end_to_end(n):
+    with temp_database() as db_path:
+        crud.configure(db_path)
+        start = time.perf_counter()
+        store(texts(n))
+        print(f"  end to end ({n:,} stored in {time.perf_counter() - start:.1f} s):")
+
+        # Traced first, then cleared and timed
+        peak = traced(news_clusters.update_clusters)
+        crud.clear_news_clusters()
+        start = time.perf_counter()
+        assigned = news_clusters.update_clusters()
+        report("update_clusters() over the corpus", time.perf_counter() - start, peak, assigned)
+
+        # Timed on one batch of new articles, traced on the next
+        store(texts(NEW_ARTICLES, seed=1), offset=n)
+        start = time.perf_counter()
+        assigned = news_clusters.update_clusters()
+        seconds = time.perf_counter() - start
+        store(texts(NEW_ARTICLES, seed=2), offset=n + NEW_ARTICLES)
+        report(f"update_clusters() +{NEW_ARTICLES:,} stored", seconds, traced(news_clusters.update_clusters), assigned)
+
+        start = time.perf_counter()
+        summary = news_clusters.cluster_summary()
+        print(f"  cluster_summary()                  {time.perf_counter() - start:8.2f} s  "
+              f"({summary['articles'].sum():,} articles in {len(summary)} clusters)")
+        crud.get_db().close()
+
+
+def run(sizes=SIZES):
+    news_clusters.make_vectorizer()  # import sklearn before anything is timed
+    for n in sizes:
+        in_memory(n)
+        end_to_end(n)
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or SIZES)
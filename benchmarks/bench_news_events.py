@@ -0,0 +1,126 @@
+"""Joining scored news onto the next price bar: the vectorized as-of join vs a per-article loop,
+and the chunked end-to-end path (SQLite articles + snapshot bars) under different memory budgets.
+
+Usage: python -m benchmarks.bench_news_events [n_articles] [n_tickers]
+
+Defaults to 2M articles over 2,000 tickers x 10 years of daily bars for the pure join; the
+end-to-end part stores a tenth of both.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import random_walk_ohlcv, temp_database, timed
+
+import crud
+import news_events
+import snapshot
+
+N_BARS = 2_520
+START_TS = int(np.datetime64("2014-01-01", "s").astype(np.int64))
+LOOP_SAMPLE = 20_000
+
+
+def synthetic_bars(n_tickers, seed=0):
+    """Business-day bar times shared by every ticker, and random-walk opens and closes."""
+    rng = np.random.default_rng(seed)
+    days = np.arange(np.datetime64("2014-01-01"), np.datetime64("2026-01-01"))
+    days = days[np.is_busday(days)][:N_BARS].astype("datetime64[s]").astype(np.int64)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_tickers, N_BARS)), axis=1))
+    opens = np.concatenate([np.full((n_tickers, 1), 100.0), closes[:, :-1]], axis=1)
+    offsets = np.arange(n_tickers + 1) * N_BARS
+    return offsets, np.tile(days, n_tickers), opens.ravel(), closes.ravel()
+
+
+def synthetic_events(n_articles, n_tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    span = N_BARS * 7 // 5 * 86400
+    return rng.integers(0, n_tickers, n_articles), START_TS + rng.integers(0, span, n_articles)
+
+
+def loop_join(event_series, event_ts, offsets, bar_ts, opens, closes, horizons):
+    """The straightforward version: one lookup and one return per article and horizon."""
+    returns = []
+    for series, ts in zip(event_series.tolist(), event_ts.tolist()):
+        lo, hi = offsets[series], offsets[series + 1]
+        entry = lo + int(np.searchsorted(bar_ts[lo:hi], ts))
+        returns.append([closes[entry + h - 1] / opens[entry] - 1 if entry + h - 1 < hi else np.nan
+                        for h in horizons] if entry < hi else [np.nan] * len(horizons))
+    return np.array(returns)
+
+
+def pure_join(n_articles, n_tickers):
+    offsets, bar_ts, opens, closes = synthetic_bars(n_tickers)
+    event_series, event_ts = synthetic_events(n_articles, n_tickers)
+    horizons = news_events.DEFAULT_HORIZONS
+
+    results = {}
+    with timed(results, "vectorized"):
+        _, returns = news_events.align_events(event_series, event_ts, offsets, bar_ts, opens, closes, horizons)
+    sample = min(LOOP_SAMPLE, n_articles)
+    with timed(results, "loop"):
+        expected = loop_join(event_series[:sample], event_ts[:sample], offsets, bar_ts, opens, closes, horizons)
+    assert np.allclose(returns[:sample], expected, equal_nan=True)
+
+    loop_rate = sample / results["loop"]
+    print(f"as-of join of {n_articles:,} articles onto {n_tickers:,} tickers x {N_BARS:,} bars "
+          f"({len(bar_ts):,} bars), horizons {horizons}")
+    print(f"  vectorized           {results['vectorized']:8.2f} s  {n_articles / results['vectorized']:12,.0f} articles/s")
+    print(f"  per-article loop     {n_articles / loop_rate:8.2f} s  {loop_rate:12,.0f} articles/s "
+          f"(timed on {sample:,}, extrapolated)")
+
+
+def store(n_articles, n_tickers, directory):
+    for i in range(n_tickers):
+        crud.save_stock_data_bulk(random_walk_ohlcv(N_BARS, start="2014-01-01", freq="B", seed=i), ticker=f"T{i:04d}")
+    snapshot.refresh(directory)
+
+    rng = np.random.default_rng(1)
+    event_series, event_ts = synthetic_events(n_articles, n_tickers)
+    compound = rng.uniform(-1, 1, n_articles)
+    sentiment = np.where(compound > 0.05, "Bullish", np.where(compound < -0.05, "Bearish", "Neutral"))
+    for lo in range(0, n_articles, 50_000):
+        rows = range(lo, min(lo + 50_000, n_articles))
+        crud.save_news_articles(
+            [{"link_hash": f"h{i}", "published_at": float(event_ts[i]) + 5 * 3600, "compound": compound[i],
+              "sentiment": sentiment[i], "link": f"https://example.com/{i}"} for i in rows],
+            [(f"T{event_series[i]:04d}", f"h{i}") for i in rows])
+
+
+def chunked(n_articles, n_tickers):
+    with temp_database() as db_path:
+        directory = os.path.join(os.path.dirname(db_path), "snapshots")
+        crud.configure(db_path)
+        results = {}
+        with timed(results, "store"):
+            store(n_articles, n_tickers, directory)
+        print(f"\nend to end, {n_articles:,} stored articles x {n_tickers:,} tickers "
+              f"(stored in {results['store']:.1f} s)")
+
+        prices = snapshot.PriceSnapshot(directory)
+        for budget in (50_000, 500_000, news_events.CHUNK_ROWS):
+            tracemalloc.start()
+            start = time.perf_counter()
+            events = sum(len(frame) for frame in news_events.iter_news_events(prices=prices, chunk_rows=budget))
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  chunk budget {budget:>9,} rows  {seconds:6.2f} s  {events / seconds:10,.0f} events/s  "
+                  f"peak {peak / 1e6:7.1f} MB allocated  ({events:,} events)")
+
+        start = time.perf_counter()
+        lead = news_events.sentiment_lead(prices=prices)
+        print(f"  sentiment_lead        {time.perf_counter() - start:6.2f} s\n{lead.to_string()}")
+        crud.get_db().close()
+
+
+def run(n_articles=2_000_000, n_tickers=2_000):
+    pure_join(n_articles, n_tickers)
+    chunked(n_articles // 10, n_tickers // 10)
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
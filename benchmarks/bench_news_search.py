@@ -0,0 +1,73 @@
+"""News column filters over a large store: str.contains on the DataFrame vs the FTS5 index.
+
+Usage: python -m benchmarks.bench_news_search [n_articles] [repeats]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import random_news_frame, temp_database, timed
+
+import crud
+from sentiment import label
+
+BATCH = 100_000
+
+# (filters, description) as typed into the app's filter boxes
+QUERIES = [
+    ({"Title": "nvid"}, "one title prefix"),
+    ({"Title": "apple soar", "Source": "reu"}, "two columns, three prefixes"),
+    ({"Sentiment": "bull", "Short Description": "earnings"}, "sentiment + description"),
+    ({"Title": "treasury yields record"}, "rare combination"),
+]
+LIMIT = 1000  # the app shows at most this many matches
+
+
+def store_articles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, BATCH):
+        news = random_news_frame(min(BATCH, n - start), seed=seed + start, distinct=5_000)
+        compounds = rng.uniform(-1, 1, len(news))
+        articles = [{
+            "link_hash": f"{start + i:016x}", "title": row[0], "description": row[1], "source": row[2],
+            "published": row[3], "tickers": row[4], "link": f"{row[5]}#{start + i}",
+            "sentiment": label(compound), "compound": compound,
+        } for i, (row, compound) in enumerate(zip(news.itertuples(index=False), compounds))]
+        links = [(ticker.strip(), article["link_hash"]) for article in articles for ticker in article["tickers"].split(",")]
+        crud.save_news_articles(articles, links)
+
+
+# The app's filtering before the index: a string cast and a substring scan per filtered column
+def scan(news, filters):
+    for column, text in filters.items():
+        news = news[news[column].astype(str).str.contains(text, case=False, na=False)]
+    return news
+
+
+def run(n_articles=1_000_000, repeats=5):
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        start = time.perf_counter()
+        store_articles(n_articles)
+        print(f"stored {n_articles:,} articles (FTS index maintained by triggers) in {time.perf_counter() - start:.1f} s")
+
+        news = crud.query_news()
+        # Matches differ slightly: the scan wants the filter as one substring, the index each word as a prefix
+        print(f"{'filters':<32}{'scan':>12}{'fts':>12}{'fts+AAPL':>12}{'scan rows':>11}{'fts rows':>10}")
+        for filters, description in QUERIES:
+            before, after, ticker = {}, {}, {}
+            for i in range(repeats):
+                with timed(before, i):
+                    scanned = scan(news, filters)
+                with timed(after, i):
+                    found = crud.query_news(filters=filters, limit=LIMIT)
+                with timed(ticker, i):
+                    crud.query_news(tickers=["AAPL"], filters=filters, limit=LIMIT)
+            print(f"{description:<32}{min(before.values()) * 1000:10.1f}ms{min(after.values()) * 1000:10.1f}ms"
+                  f"{min(ticker.values()) * 1000:10.1f}ms{len(scanned):>11,}{len(found):>10,}")
+        db.close()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,102 @@
+"""Repeated scrapes of a growing news feed: full scroll + CSV overwrite vs the incremental news store.
+
+A simulated infinite-scroll feed (newest first) costs `load_latency` per batch of articles, like a browser
+waiting for the next page of the feed. Each run a few new articles appear at the top.
+
+Usage: python -m benchmarks.bench_news_store [runs] [new_per_run] [load_latency]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import (ARTICLE_TEMPLATE, TICKER_TEMPLATE, random_news_frame, temp_database,
+                               timed)
+
+import crud
+import newsData
+from news_pipeline import clean, extract, run_news_pipeline, score
+
+BATCH = 20  # articles rendered per load / scroll
+
+
+class ScrollingFeedFetcher:
+    """Page fetcher over an in-memory feed: the first load shows BATCH articles, each scroll BATCH more."""
+
+    max_workers = 1
+
+    def __init__(self, items, load_latency):
+        self.items = items
+        self.load_latency = load_latency
+        self.loads = 0
+
+    def fetch(self, url, max_scrolls=5, scroll_timeout=None, known_links=None):
+        shown = 0
+        for _ in range(max_scrolls + 1):
+            if shown >= len(self.items):
+                break
+            time.sleep(self.load_latency)
+            self.loads += 1
+            batch = self.items[shown:shown + BATCH]
+            shown += len(batch)
+            if known_links and any(link in known_links for link, _ in batch):
+                break
+        html = "".join(item for _, item in self.items[:shown])
+        return f"<html><body><ul>{html}</ul></body></html>"
+
+    def close(self):
+        pass
+
+
+def feed_items(n, seed):
+    news = random_news_frame(n, seed=seed)
+    items = []
+    for row in news.itertuples(index=False):
+        link = f"https://finance.yahoo.com/news/{seed}-{row[5].rsplit('-', 1)[-1]}"
+        tickers = "".join(TICKER_TEMPLATE.format(symbol=symbol) for symbol in row[4].split(", "))
+        items.append((link, ARTICLE_TEMPLATE.format(link=link, title=row[0], description=row[1], source=row[2],
+                                                    published=row[3], tickers=tickers)))
+    return items
+
+
+def run(runs=10, new_per_run=5, load_latency=0.05):
+    items = feed_items(6 * BATCH, seed=0)
+    with tempfile.TemporaryDirectory() as tmp, temp_database() as db_path:
+        db = crud.configure(db_path)
+        output = os.path.join(tmp, "news_articles_by_ticker.csv")
+        before, after = {}, {}
+        loads_before = loads_after = 0
+        new_articles = 0
+
+        for i in range(runs):
+            # What every scrape did before: scroll the whole feed, parse and score everything, overwrite the CSV
+            fetcher = ScrollingFeedFetcher(items, load_latency)
+            with timed(before, i):
+                articles = clean(extract(fetcher.fetch(newsData.TICKER_NEWS_URL.format(ticker="TEST"))))
+                score(articles).to_csv(output, index=False, encoding="utf-8")
+            loads_before += fetcher.loads
+
+            fetcher = ScrollingFeedFetcher(items, load_latency)
+            newsData.set_page_fetcher(fetcher)
+            with timed(after, i):
+                pipeline_run = run_news_pipeline("TEST")
+            loads_after += fetcher.loads
+            new_articles += len(pipeline_run.articles)
+
+            items = feed_items(new_per_run, seed=i + 1) + items
+
+        stored = len(crud.query_news(tickers=["TEST"]))
+        db.close()
+
+    print(f"{runs} scrapes, {new_per_run} new articles per scrape, {load_latency * 1000:.0f} ms per feed load")
+    print(f"  full scroll + CSV overwrite: {sum(before.values()):7.2f} s  ({loads_before} feed loads)")
+    print(f"  incremental news store:      {sum(after.values()):7.2f} s  ({loads_after} feed loads)")
+    print(f"  first run {after[0]:.2f} s, later runs {np.mean([after[i] for i in range(1, runs)]):.3f} s on average")
+    print(f"  {new_articles} articles stored ({stored} in the store for TEST)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(*[int(arg) for arg in args[:2]], *[float(arg) for arg in args[2:3]])
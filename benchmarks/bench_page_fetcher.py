@@ -0,0 +1,54 @@
+"""Page fetching against a local server of recorded pages: fresh session per page vs pooled, concurrent fetchers.
+
+Usage: python -m benchmarks.bench_page_fetcher [n_tickers] [latency_seconds] [--selenium]
+"""
+import sys
+
+from benchmarks.common import timed, yahoo_news_page
+from benchmarks.fixture_server import FixtureServer
+
+import newsData
+from page_fetcher import HttpFetcher, SeleniumFetcher, fetch_many
+
+
+def run(n_tickers=20, latency=0.3, selenium=False):
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    pages = {f"/quote/{ticker}/latest-news/": yahoo_news_page(40, seed=i) for i, ticker in enumerate(tickers)}
+    results = {}
+
+    with FixtureServer(pages, latency=latency) as server:
+        urls = [server.url(path) for path in pages]
+
+        with timed(results, "http, new session per page"):
+            for url in urls:
+                fetcher = HttpFetcher()
+                fetcher.fetch(url)
+                fetcher.close()
+
+        fetcher = HttpFetcher(pool_size=8)
+        with timed(results, "http, pooled x8"):
+            fetched = fetch_many(urls, fetcher)
+        fetcher.close()
+        assert all(isinstance(page, str) for page in fetched.values())
+
+        if selenium:
+            fetcher = SeleniumFetcher(pool_size=4)
+            with timed(results, "selenium, 4 warm sessions"):
+                fetch_many(urls, fetcher)
+            fetcher.close()
+
+        # The ticker-level API, pointed at the fixture server
+        fetcher = HttpFetcher(pool_size=8)
+        scraped = newsData.scrape_tickers(tickers, fetcher, url_template=server.url("/quote/{ticker}/latest-news/"))
+        fetcher.close()
+
+    print(f"{n_tickers} pages, {latency * 1000:.0f} ms server latency")
+    for name, seconds in results.items():
+        print(f"{name:>30}: {seconds:7.2f} s")
+    print(f"articles scraped per ticker: {len(scraped[tickers[0]])}")
+
+
+if __name__ == "__main__":
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    run(int(args[0]) if args else 20, float(args[1]) if len(args) > 1 else 0.3, "--selenium" in flags)
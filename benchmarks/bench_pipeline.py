@@ -0,0 +1,66 @@
+"""One scrape-and-score with a recorded page: two interpreter launches + CSV hand-off vs the in-process pipeline.
+
+Usage: python -m benchmarks.bench_pipeline [n_articles] [repeats]
+
+The subprocess path runs the current newsData.py and sentimentAnalysis.py, not the scripts of the
+baseline commit: the sentiment script now reads and writes the shared SQLite sentiment cache and no
+longer calls nltk.download. Every repeat of either path gets a fresh database, so neither ever
+reads scores cached by an earlier run.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import ROOT, temp_database, timed, yahoo_news_page
+
+import crud
+from news_pipeline import run_news_pipeline
+
+# What `python newsData.py TICKER` did, minus the browser: import newsData, parse, write the CSV
+SCRAPE_SCRIPT = """
+import sys
+from bs4 import BeautifulSoup
+import newsData
+with open(sys.argv[1], encoding="utf-8") as file:
+    rows = newsData.extract_articles(BeautifulSoup(file.read(), "html.parser"))
+newsData.save_to_csv(rows, filename=sys.argv[2])
+"""
+
+
+def run(n_articles=60, repeats=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "page.html")
+        output = os.path.join(tmp, "news_articles_by_ticker.csv")
+        with open(fixture, "w", encoding="utf-8") as file:
+            file.write(yahoo_news_page(n_articles))
+
+        def fetch_page(url):
+            with open(fixture, encoding="utf-8") as file:
+                return file.read()
+
+        before, after = {}, {}
+        for i in range(repeats):
+            with temp_database() as db_path:
+                env = dict(os.environ, PYTHONPATH=ROOT, STOCK_DB_PATH=db_path)
+                with timed(before, i):
+                    subprocess.run([sys.executable, "-c", SCRAPE_SCRIPT, fixture, output], check=True, env=env,
+                                   capture_output=True)
+                    subprocess.run([sys.executable, os.path.join(ROOT, "sentimentAnalysis.py"), output],
+                                   check=True, env=env, capture_output=True)
+
+            with temp_database() as db_path:
+                db = crud.configure(db_path)
+                with timed(after, i):
+                    pipeline_run = run_news_pipeline("TEST", fetch_page=fetch_page, output_file=output)
+                db.close()
+
+    print(f"{n_articles} articles per page, best of {repeats}")
+    print(f"  subprocesses + CSV: {min(before.values()) * 1000:8.1f} ms")
+    print(f"  in-process:         {min(after.values()) * 1000:8.1f} ms")
+    for stage, seconds in pipeline_run.timings.items():
+        print(f"    {stage:>8}: {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
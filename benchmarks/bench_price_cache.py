@@ -0,0 +1,45 @@
+"""Read-through price cache against an in-memory provider: repeated and overlapping requests.
+
+Usage: python -m benchmarks.bench_price_cache
+"""
+from benchmarks.common import random_walk_ohlcv, temp_database, timed
+
+import crud
+from price_cache import PriceCache
+from providers import InMemoryPriceProvider
+
+REQUESTS = [
+    ("2015-01-01", "2020-01-01"),  # cold
+    ("2015-01-01", "2020-01-01"),  # exact repeat
+    ("2016-01-01", "2019-01-01"),  # contained
+    ("2015-01-01", "2020-01-02"),  # end widened by one day
+    ("2010-01-01", "2022-01-01"),  # widened on both sides
+]
+
+
+def run(n_tickers=20):
+    frames = {
+        (f"T{i:03d}", "1d"): random_walk_ohlcv(8_000, start="2000-01-03", seed=i)
+        for i in range(n_tickers)
+    }
+    provider = InMemoryPriceProvider(frames)
+
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        cache = PriceCache(provider)
+
+        for start, end in REQUESTS:
+            calls_before = len(provider.calls)
+            results = {}
+            with timed(results, "elapsed"):
+                for ticker, interval in frames:
+                    data = cache.get(ticker, start, end, interval)
+            print(f"{start} -> {end}: {results['elapsed'] * 1000:8.1f} ms  "
+                  f"{len(provider.calls) - calls_before:3d} provider calls  {len(data):5d} bars/ticker")
+
+        print(f"stats: {cache.stats}")
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
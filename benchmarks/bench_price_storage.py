@@ -0,0 +1,161 @@
+"""Bytes per bar and range-scan speed of stock_prices: clustered WITHOUT ROWID layout vs the original table.
+
+Usage: python -m benchmarks.bench_price_storage [n_bars] [n_tickers]
+
+The default is 50M one-minute bars over 100 tickers, which takes a while and several GB of temporary
+disk. The original layout is given second-resolution date strings, which it would need to keep
+intraday bars at all (the original "%Y-%m-%d" dates keep one bar per day).
+"""
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import random_walk_ohlcv, temp_database, timed
+
+import crud
+
+# The layout before the migration, kept here as the baseline
+LEGACY_SCHEMA = '''
+    CREATE TABLE stock_prices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        interval TEXT NOT NULL DEFAULT '1d',
+        date TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        UNIQUE(ticker, interval, date)
+    );
+    CREATE INDEX idx_stock_prices_covering
+        ON stock_prices (ticker, interval, date, open, high, low, close, volume);
+'''
+
+LEGACY_SCAN = '''
+    SELECT date, open, high, low, close, volume FROM stock_prices
+    WHERE ticker=? AND interval='1m' AND date >= ? AND date < ? ORDER BY date
+'''
+
+CLUSTERED_SCAN = '''
+    SELECT p.ts, p.open, p.high, p.low, p.close, p.volume FROM tickers t JOIN stock_prices p ON p.ticker_id = t.id
+    WHERE t.symbol=? AND p.interval='1m' AND p.ts >= ? AND p.ts < ? ORDER BY p.ts
+'''
+
+WINDOWS = {"1 day": 1, "1 week": 7, "1 month": 30}
+SCANS_PER_WINDOW = 50
+
+
+# The same scan aggregated inside SQLite, which leaves out building a Python tuple per bar
+def aggregated(sql):
+    return f"SELECT count(*), total(close) FROM ({sql})"
+
+
+def ticker_frames(n_bars, n_tickers):
+    per_ticker = n_bars // n_tickers
+    for i in range(n_tickers):
+        yield f"T{i:04d}", random_walk_ohlcv(per_ticker, start="2020-01-01", freq="min", seed=i)
+
+
+def load_legacy(path, n_bars, n_tickers):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(LEGACY_SCHEMA)
+    for ticker, frame in ticker_frames(n_bars, n_tickers):
+        dates = frame.index.strftime("%Y-%m-%d %H:%M:%S").tolist()
+        columns = [frame[col].tolist() for col in crud.PRICE_COLUMNS]
+        conn.execute("BEGIN")
+        conn.executemany('''
+            INSERT OR IGNORE INTO stock_prices (ticker, interval, date, open, high, low, close, volume)
+            VALUES (?, '1m', ?, ?, ?, ?, ?, ?)
+        ''', zip([ticker] * len(dates), dates, *columns))
+        conn.execute("COMMIT")
+    return conn
+
+
+def load_clustered(path, n_bars, n_tickers):
+    db = crud.configure(path)
+    for ticker, frame in ticker_frames(n_bars, n_tickers):
+        crud.save_stock_data_bulk(frame, ticker=ticker, interval="1m")
+    return db.connection()
+
+
+def stored_bytes(conn):
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    rows = conn.execute('''
+        SELECT d.name, sum(d.pgsize) FROM dbstat d JOIN sqlite_master m ON m.name = d.name
+        WHERE m.tbl_name IN ('stock_prices', 'tickers') GROUP BY d.name
+    ''').fetchall()
+    return dict(rows)
+
+
+def scan_windows(conn, sql, bound, n_bars, n_tickers, seed=0):
+    """Mean seconds per scan fetching the rows and aggregating them in SQLite, and bars per scan, by window."""
+    rng = np.random.default_rng(seed)
+    per_ticker = n_bars // n_tickers
+    first = np.datetime64("2020-01-01T00:00")
+    results = {}
+    for name, days in WINDOWS.items():
+        width = days * 1440
+        params = []
+        for _ in range(SCANS_PER_WINDOW):
+            offset = int(rng.integers(0, max(per_ticker - width, 1)))
+            lo, hi = first + np.timedelta64(offset, "m"), first + np.timedelta64(offset + width, "m")
+            params.append((f"T{rng.integers(n_tickers):04d}", bound(lo), bound(hi)))
+
+        start = time.perf_counter()
+        rows = sum(len(conn.execute(sql, scan).fetchall()) for scan in params)
+        fetched = (time.perf_counter() - start) / SCANS_PER_WINDOW
+        start = time.perf_counter()
+        for scan in params:
+            conn.execute(aggregated(sql), scan).fetchone()
+        results[name] = fetched, (time.perf_counter() - start) / SCANS_PER_WINDOW, rows / SCANS_PER_WINDOW
+    return results
+
+
+def legacy_bound(value):
+    return str(value).replace("T", " ") + ":00"
+
+
+def clustered_bound(value):
+    return int(value.astype("datetime64[s]").astype(np.int64))
+
+
+def report(name, sizes, n_bars, load_seconds, scans):
+    total = sum(sizes.values())
+    print(f"\n{name}: loaded in {load_seconds:.1f} s ({n_bars / load_seconds:,.0f} bars/s), "
+          f"{total / 1e6:,.1f} MB, {total / n_bars:.1f} bytes/bar")
+    for structure, size in sorted(sizes.items()):
+        print(f"  {structure:<36} {size / 1e6:10,.1f} MB  {size / n_bars:6.1f} bytes/bar")
+    for window, (fetched, aggregated_seconds, rows) in scans.items():
+        print(f"  scan {window:<8} {rows:8,.0f} bars  fetched {fetched * 1000:8.2f} ms ({rows / fetched:12,.0f} bars/s)"
+              f"  aggregated {aggregated_seconds * 1000:8.2f} ms ({rows / aggregated_seconds:12,.0f} bars/s)")
+
+
+def run(n_bars=50_000_000, n_tickers=100):
+    results = {}
+    with temp_database() as path:
+        with timed(results, "legacy"):
+            conn = load_legacy(path, n_bars, n_tickers)
+        report("original layout (rowid table + unique and covering indexes)", stored_bytes(conn), n_bars,
+               results["legacy"], scan_windows(conn, LEGACY_SCAN, legacy_bound, n_bars, n_tickers))
+        conn.close()
+
+    with temp_database() as path:
+        with timed(results, "clustered"):
+            conn = load_clustered(path, n_bars, n_tickers)
+        report("clustered layout (WITHOUT ROWID on ticker_id, interval, ts)", stored_bytes(conn), n_bars,
+               results["clustered"], scan_windows(conn, CLUSTERED_SCAN, clustered_bound, n_bars, n_tickers))
+
+        with timed(results, "dataframe"):
+            frame = crud.query_stock_data(tickers=["T0000"], interval="1m", start="2020-01-01",
+                                          end="2020-01-31 23:59")
+        print(f"  query_stock_data, 1 month as a DataFrame: {results['dataframe'] * 1000:.1f} ms, {len(frame):,} bars")
+        crud.get_db().close()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
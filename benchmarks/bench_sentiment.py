@@ -0,0 +1,55 @@
+"""Sentiment scoring: the sentimentAnalysis.py subprocess the app used vs the in-process service.
+
+Usage: python -m benchmarks.bench_sentiment [n_articles] [n_corpus]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import ROOT, random_headlines, random_news_frame, temp_database, timed
+
+import crud
+
+import sentiment
+
+
+def run(n_articles=200, n_corpus=200_000):
+    news = random_news_frame(n_articles)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        news_file = os.path.join(tmp, "news.csv")
+        news.to_csv(news_file, index=False)
+        with timed(results, f"subprocess, {n_articles} articles"):
+            subprocess.run([sys.executable, os.path.join(ROOT, "sentimentAnalysis.py"), news_file],
+                           check=True, capture_output=True)
+
+    sentiment.get_analyzer()  # the app process pays this once, not per click
+    with timed(results, f"in-process, {n_articles} articles"):
+        sentiment.score_articles(news, cache=False)
+
+    # Consecutive scrapes mostly return the same headlines
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        with timed(results, f"cached, cold, {n_articles} articles"):
+            sentiment.score_articles(news)
+        with timed(results, f"cached, rescrape, {n_articles} articles"):
+            rescored = sentiment.score_articles(news)
+        db.close()
+    print(f"rescrape cache stats: {rescored.attrs['sentiment_cache']}")
+
+    corpus = [f"{title} {description}" for title, description in random_headlines(n_corpus, seed=1)]
+    with timed(results, f"in-process, {n_corpus:,} texts"):
+        single = sentiment.score_texts(corpus, processes=1)
+    processes = os.cpu_count() or 1
+    with timed(results, f"{processes} processes, {n_corpus:,} texts"):
+        pooled = sentiment.score_texts(corpus, processes=processes)
+    assert single == pooled
+
+    for name, seconds in results.items():
+        print(f"{name:>32}: {seconds:8.3f} s")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,49 @@
+"""Per-ticker sentiment over a date range: aggregating the stored articles vs reading the daily rollups.
+
+Usage: python -m benchmarks.bench_sentiment_rollup [n_articles] [repeats]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.bench_news_search import store_articles
+from benchmarks.common import temp_database, timed
+
+import crud
+
+
+# The app before: load the raw rows and aggregate them in pandas on every click
+def from_articles():
+    news = pd.read_sql_query('''
+        SELECT t.ticker, a.sentiment FROM news_tickers t JOIN news_articles a ON a.link_hash = t.link_hash
+    ''', crud.get_db().connection())
+    counts = news.groupby(["ticker", "sentiment"]).size().unstack(fill_value=0)
+    return (counts["Bullish"] - counts["Bearish"]).sort_index()
+
+
+def run(n_articles=500_000, repeats=5):
+    with temp_database() as db_path:
+        db = crud.configure(db_path)
+        start = time.perf_counter()
+        store_articles(n_articles)
+        print(f"stored {n_articles:,} articles with rollups in {time.perf_counter() - start:.1f} s")
+
+        before, after, window = {}, {}, {}
+        for i in range(repeats):
+            with timed(before, i):
+                expected = from_articles()
+            with timed(after, i):
+                summary = crud.get_sentiment_summary()
+            with timed(window, i):
+                crud.get_sentiment_daily(window_days=7)
+        assert summary.set_index("ticker")["combined_score"].tolist() == expected.tolist()
+        db.close()
+
+    print(f"  aggregate articles in pandas: {min(before.values()) * 1000:8.1f} ms")
+    print(f"  read rollup summary:          {min(after.values()) * 1000:8.1f} ms")
+    print(f"  read rollups + 7-day window:  {min(window.values()) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
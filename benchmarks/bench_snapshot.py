@@ -0,0 +1,103 @@
+"""Loading the whole universe of stored prices: SQL (read_sql_query) vs the memory-mapped snapshot.
+
+Usage: python -m benchmarks.bench_snapshot [n_tickers] [n_bars]
+
+Defaults to 1,000 tickers x 10 years of daily bars. Every load runs in a fresh interpreter so its
+time and peak resident memory (including mapped file pages) are measured alone; RSS is read from /proc (Linux).
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, random_walk_ohlcv, temp_database, timed
+
+import crud
+import snapshot
+
+
+# What each load produces; every mode ends with the mean close of each ticker so all touch the same data
+def load_sql(directory):
+    frame = crud.get_stock_data_from_db()
+    return frame.groupby("ticker")["close"].mean()
+
+
+def load_sql_close(directory):
+    frame = crud.query_stock_data(interval="1d", columns=["close"])
+    return frame.groupby("ticker")["close"].mean()
+
+
+def load_snapshot(directory):
+    prices = snapshot.PriceSnapshot(directory)
+    return {ticker: prices.columns(ticker)["close"].mean() for ticker in prices.tickers()}
+
+
+def load_snapshot_panel(directory):
+    return snapshot.PriceSnapshot(directory).panel("close").mean()
+
+
+MODES = {
+    "SQL, all columns (get_stock_data_from_db)": load_sql,
+    "SQL, close only (query_stock_data)": load_sql_close,
+    "snapshot, mapped column views": load_snapshot,
+    "snapshot, close panel (DataFrame)": load_snapshot_panel,
+}
+
+
+def rss_mb(field="VmRSS"):
+    with open("/proc/self/status", encoding="ascii") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def measure(mode, db_path, directory):
+    crud.configure(db_path).connection()
+    before = rss_mb()
+    start = time.perf_counter()
+    result = MODES[mode](directory)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_rss_added_mb": rss_mb("VmHWM") - before, "tickers": len(result)}))
+
+
+def run(n_tickers=1_000, n_bars=2_520):
+    results = {}
+    with temp_database() as db_path:
+        directory = os.path.join(os.path.dirname(db_path), "snapshots")
+        db = crud.configure(db_path)
+        with timed(results, "store"):
+            for i in range(n_tickers):
+                crud.save_stock_data_bulk(random_walk_ohlcv(n_bars, start="2014-01-01", freq="B", seed=i),
+                                          ticker=f"T{i:04d}")
+        with timed(results, "export"):
+            snapshot.refresh(directory)
+
+        # One new bar per ticker, as after a daily ingest
+        for i in range(n_tickers):
+            crud.save_stock_data_bulk(random_walk_ohlcv(n_bars + 1, start="2014-01-01", freq="B", seed=i).iloc[-1:],
+                                      ticker=f"T{i:04d}")
+        with timed(results, "refresh"):
+            snapshot.refresh(directory)
+        db.close()
+
+        size = sum(os.path.getsize(os.path.join(folder, name))
+                   for folder, _, names in os.walk(directory) for name in names)
+        print(f"{n_tickers:,} tickers x {n_bars:,} bars: stored in {results['store']:.1f} s, "
+              f"snapshot exported in {results['export']:.2f} s ({size / 1e6:,.1f} MB), "
+              f"refreshed after one new bar per ticker in {results['refresh']:.2f} s\n")
+
+        for mode in MODES:
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_snapshot", "--measure", mode,
+                                     db_path, directory], cwd=ROOT, capture_output=True, text=True, check=True)
+            result = json.loads(output.stdout)
+            print(f"{mode:<44} {result['seconds'] * 1000:9.1f} ms  +{result['peak_rss_added_mb']:8.1f} MB peak RSS  "
+                  f"({result['tickers']:,} tickers)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(*sys.argv[2:5])
+    else:
+        run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,137 @@
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks are run from the repo root (python -m benchmarks.<name>), make the app modules importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# Function to build a random-walk OHLCV frame shaped like yfinance's history() output
+def random_walk_ohlcv(n_bars, start="2000-01-03", freq="D", seed=0, start_price=100.0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=n_bars, freq=freq)
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.005, n_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(1_000, 1_000_000, n_bars)
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+# Function to build a watchlist of frames, one per synthetic ticker
+def random_watchlist(n_tickers, bars_per_ticker, freq="D", seed=0):
+    return {
+        f"T{i:04d}": random_walk_ohlcv(bars_per_ticker, freq=freq, seed=seed + i)
+        for i in range(n_tickers)
+    }
+
+
+@contextmanager
+def timed(results, name):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+@contextmanager
+def temp_database():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield os.path.join(tmp, "bench.db")
+
+
+HEADLINE_SUBJECTS = ["Apple", "Microsoft", "Nvidia", "Tesla", "Amazon", "The Fed", "Oil prices", "Treasury yields",
+                     "Chipmakers", "Retail sales", "Bitcoin", "European stocks", "The dollar", "Bank earnings"]
+HEADLINE_VERBS = ["surge", "plunge", "rally", "slump", "edge higher", "slide", "hold steady", "soar", "tumble",
+                  "beat estimates", "miss forecasts", "rebound", "stall", "climb to record"]
+HEADLINE_TAILS = ["after strong earnings", "on recession fears", "as investors cheer the outlook",
+                  "amid weak guidance", "ahead of the jobs report", "despite supply worries",
+                  "following an upgrade", "after a disappointing quarter", "as rates stay higher for longer",
+                  "on takeover speculation"]
+
+
+# Function to build a reproducible corpus of (title, description) pairs shaped like scraped headlines
+def random_headlines(n, seed=0, distinct=None):
+    rng = np.random.default_rng(seed)
+    distinct = distinct or n
+    subjects = rng.choice(HEADLINE_SUBJECTS, distinct)
+    verbs = rng.choice(HEADLINE_VERBS, distinct)
+    tails = rng.choice(HEADLINE_TAILS, distinct)
+    pool = [(f"{s} {v} {t}", f"{s} {v} {rng.integers(1, 15)}% {t}, analysts said.")
+            for s, v, t in zip(subjects, verbs, tails)]
+    picks = rng.integers(0, distinct, n) if distinct < n else range(n)
+    return [pool[i] for i in picks]
+
+
+# Function to build a news DataFrame with the columns newsData.save_to_csv writes
+def random_news_frame(n, seed=0, distinct=None, tickers=("AAPL", "MSFT", "NVDA")):
+    rng = np.random.default_rng(seed)
+    headlines = random_headlines(n, seed, distinct)
+    return pd.DataFrame({
+        "Title": [title for title, _ in headlines],
+        "Short Description": [description for _, description in headlines],
+        "Source": rng.choice(["Reuters", "Bloomberg", "Yahoo Finance", "Barrons"], n),
+        "Published Date": [f"{h}h ago" for h in rng.integers(1, 48, n)],
+        "Affected Tickers": [", ".join(rng.choice(tickers, 2, replace=False)) for _ in range(n)],
+        "Link": [f"https://finance.yahoo.com/news/article-{seed}-{i}.html" for i in range(n)],
+    })
+
+
+ARTICLE_TEMPLATE = """
+<li class="stream-item story-item yf-1drgw5l">
+  <section class="container sz-x-large block yf-1sxfjua responsive hideImageSmScreen" data-testid="storyitem">
+    <div class="content yf-82qtw3">
+      <a class="subtle-link fin-size-small titles noUnderline yf-1xqzjha" href="{link}" title="{title}">
+        <h3 class="clamp yf-82qtw3">{title}</h3>
+      </a>
+      <p class="clamp yf-82qtw3">{description}</p>
+      <div class="footer yf-82qtw3">
+        <div class="publishing yf-1weyqlp">{source} <i class="dot yf-1weyqlp">•</i> {published}</div>
+        <div class="taxonomy-links yf-82qtw3">{tickers}</div>
+      </div>
+    </div>
+  </section>
+</li>"""
+
+TICKER_TEMPLATE = """
+<a class="ticker x-small hover2 border streaming yf-1m808gl" href="/quote/{symbol}/">
+  <div class="name yf-1m808gl"><span class="symbol yf-1m808gl">{symbol}</span></div>
+  <fin-streamer class="percentChange yf-1m808gl">+1.23%</fin-streamer>
+</a>"""
+
+DESCRIPTION_NOISE = ["(Bloomberg) -- ", "(Reuters) - ", ""]
+
+
+# Function to render a page with the markup extract_articles expects, padded with page chrome
+def yahoo_news_page(n_articles, seed=0, link_prefix="https://finance.yahoo.com/news/"):
+    rng = np.random.default_rng(seed)
+    news = random_news_frame(n_articles, seed=seed)
+    items = []
+    for i, row in enumerate(news.itertuples(index=False)):
+        prefix = DESCRIPTION_NOISE[i % len(DESCRIPTION_NOISE)]
+        suffix = " Most Read from Bloomberg Businessweek" if prefix.startswith("(Bloomberg") else ""
+        tickers = "".join(TICKER_TEMPLATE.format(symbol=symbol) for symbol in row[4].split(", "))
+        items.append(ARTICLE_TEMPLATE.format(
+            link=f"{link_prefix}{seed}-{i}-{rng.integers(1_000_000)}.html",
+            title=row[0],
+            description=prefix + row[1] + suffix,
+            source=row[2],
+            published=row[3],
+            tickers=tickers,
+        ))
+    chrome = "".join(f'<div class="nav-item yf-nav"><a href="/section/{i}">Section {i}</a></div>' for i in range(300))
+    return (f"<html><head><title>Latest News</title><script>var x = 1;</script></head><body>"
+            f"<header>{chrome}</header><main><ul class=\"stream-items yf-1drgw5l\">{''.join(items)}</ul></main>"
+            f"<footer>{chrome}</footer></body></html>")
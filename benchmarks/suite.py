@@ -0,0 +1,369 @@
+"""Benchmark suite over the hot paths, fully offline; results are stored as JSON and compared to a baseline.
+
+Usage:
+    python -m benchmarks.suite [--quick] [--only SUBSTRING ...] [--repeats N]
+                               [--output results.json] [--baseline baseline.json] [--threshold 0.15]
+    python -m benchmarks.suite --compare baseline.json results.json
+
+Every case reports the best and median of N timed repeats (after one warm-up) and a throughput in its
+own unit. With --baseline (or --compare) a case that got slower by more than the threshold is a
+regression, and the exit status is 1. Runs are compared on the best time, which is the least disturbed by
+other load on the machine; timings are only comparable between runs on the same machine.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import ROOT, random_headlines, random_walk_ohlcv, temp_database, yahoo_news_page
+
+import crud
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.15
+
+
+@dataclass
+class Workload:
+    run: object  # the timed callable
+    items: int  # units of work per call, for the throughput
+    before: object = None  # untimed callable run before every repeat (e.g. to reset tables)
+
+
+@dataclass
+class Case:
+    name: str
+    unit: str
+    sizes: dict  # "quick"/"full" -> size passed to the setup
+    setup: object  # generator function: size -> yields one Workload, cleans up afterwards
+
+
+CASES = []
+
+
+# Decorator registering a benchmark case
+def case(name, unit, quick, full):
+    def register(setup):
+        CASES.append(Case(name, unit, {"quick": quick, "full": full}, setup))
+        return setup
+    return register
+
+
+@case("crud.save_stock_data_bulk", "rows", quick=20_000, full=500_000)
+def bench_save_stock_data(size):
+    data = random_walk_ohlcv(size)
+    with temp_database() as path:
+        db = crud.configure(path)
+        yield Workload(lambda: crud.save_stock_data_bulk(data, ticker="BENCH"), size, crud.truncate_stock_data)
+        db.close()
+
+
+@case("crud.query_stock_data", "rows", quick=20_000, full=500_000)
+def bench_query_stock_data(size):
+    data = random_walk_ohlcv(size)
+    with temp_database() as path:
+        db = crud.configure(path)
+        crud.save_stock_data_bulk(data, ticker="BENCH")
+        crud.save_stock_data_bulk(random_walk_ohlcv(size, seed=1), ticker="OTHER")
+        yield Workload(lambda: crud.query_stock_data(tickers=["BENCH"], interval="1d"), size)
+        db.close()
+
+
+@case("indicators.compute_indicators", "bars", quick=100_000, full=2_000_000)
+def bench_compute_indicators(size):
+    from indicators import compute_indicators
+    data = random_walk_ohlcv(size, freq="min")
+    specs = [("bollinger", 20, 2.0), ("sma", 50), ("ema", 20), ("rsi", 14), ("atr", 14), ("vwap",)]
+    yield Workload(lambda: compute_indicators(data, specs), size)
+
+
+@case("indicators.IncrementalIndicators.update", "bars", quick=200, full=2_000)
+def bench_incremental_update(size):
+    from indicators import IncrementalIndicators
+    data = random_walk_ohlcv(100_000 + size, freq="min")
+    history, ticks = data.iloc[:100_000], [data.iloc[i:i + 1] for i in range(100_000, 100_000 + size)]
+    specs = [("bollinger", 20, 2.0), ("sma", 50), ("rsi", 14)]
+    state = {}
+
+    def reset():
+        state["engine"] = IncrementalIndicators(specs)
+        state["engine"].update(history)
+
+    def run():
+        engine = state["engine"]
+        for tick in ticks:
+            engine.update(tick)
+
+    yield Workload(run, size, reset)
+
+
+@case("newsData.extract_articles", "pages", quick=5, full=20)
+def bench_extract_articles(size):
+    from bs4 import BeautifulSoup
+    import newsData
+    pages = [yahoo_news_page(60, seed=i) for i in range(size)]
+    yield Workload(lambda: [newsData.extract_articles(BeautifulSoup(page, "html.parser")) for page in pages], size)
+
+
+@case("newsData.extract_articles_fast", "pages", quick=20, full=200)
+def bench_extract_articles_fast(size):
+    import newsData
+    pages = [yahoo_news_page(60, seed=i) for i in range(size)]
+    yield Workload(lambda: [newsData.extract_articles_fast(page) for page in pages], size)
+
+
+@case("sentiment.score_texts", "texts", quick=2_000, full=50_000)
+def bench_score_texts(size):
+    import sentiment
+    texts = [f"{title} {description}" for title, description in random_headlines(size)]
+    sentiment.get_analyzer()
+    yield Workload(lambda: sentiment.score_texts(texts, processes=1), size)
+
+
+@case("sentiment.score_texts_cached (warm)", "texts", quick=2_000, full=50_000)
+def bench_score_texts_cached(size):
+    import sentiment
+    texts = [f"{title} {description}" for title, description in random_headlines(size)]
+    with temp_database() as path:
+        db = crud.configure(path)
+        sentiment.score_texts_cached(texts, processes=1)
+        yield Workload(lambda: sentiment.score_texts_cached(texts, processes=1), size)
+        db.close()
+
+
+@case("news_pipeline.run_news_pipeline", "articles", quick=60, full=300)
+def bench_news_pipeline(size):
+    from news_pipeline import run_news_pipeline
+    page = yahoo_news_page(size)
+    with temp_database() as path:
+        db = crud.configure(path)
+        # Every repeat starts from an empty store, so the whole page is scored and persisted
+        yield Workload(lambda: run_news_pipeline("BENCH", fetch_page=lambda url: page), size, crud.delete_news_data)
+        db.close()
+
+
+@case("crud.query_news (full-text filters)", "queries", quick=20_000, full=200_000)
+def bench_query_news(size):
+    from benchmarks.bench_news_search import QUERIES, store_articles
+    with temp_database() as path:
+        db = crud.configure(path)
+        store_articles(size)
+        yield Workload(lambda: [crud.query_news(filters=filters, limit=1000) for filters, _ in QUERIES], len(QUERIES))
+        db.close()
+
+
+@case("crud.get_sentiment_summary", "queries", quick=20_000, full=200_000)
+def bench_sentiment_summary(size):
+    from benchmarks.bench_news_search import store_articles
+    with temp_database() as path:
+        db = crud.configure(path)
+        store_articles(size)
+        yield Workload(lambda: crud.get_sentiment_summary(), 1)
+        db.close()
+
+
+@case("price_cache.PriceCache.get (warm)", "requests", quick=20, full=200)
+def bench_price_cache(size):
+    from price_cache import PriceCache
+    from providers import InMemoryPriceProvider
+    tickers = [f"T{i:03d}" for i in range(size)]
+    frames = {(ticker, "1d"): random_walk_ohlcv(2_500, seed=i) for i, ticker in enumerate(tickers)}
+    with temp_database() as path:
+        db = crud.configure(path)
+        cache = PriceCache(InMemoryPriceProvider(frames))
+        start, end = "2000-01-03", "2006-12-31"
+
+        def run():
+            for ticker in tickers:
+                cache.get(ticker, start, end, "1d")
+
+        run()
+        yield Workload(run, size)
+        db.close()
+
+
+@case("snapshot.PriceSnapshot (map + mean close)", "tickers", quick=100, full=1_000)
+def bench_snapshot(size):
+    import snapshot
+    with temp_database() as path:
+        db = crud.configure(path)
+        crud.save_stock_data_bulk({f"T{i:04d}": random_walk_ohlcv(2_520, freq="B", seed=i) for i in range(size)})
+        directory = os.path.join(os.path.dirname(path), "snapshots")
+        snapshot.refresh(directory)
+
+        def run():
+            prices = snapshot.PriceSnapshot(directory)
+            return [prices.columns(ticker)["close"].mean() for ticker in prices.tickers()]
+
+        yield Workload(run, size)
+        db.close()
+
+
+@case("news_events.align_events", "articles", quick=200_000, full=2_000_000)
+def bench_align_events(size):
+    import news_events
+    from benchmarks.bench_news_events import synthetic_bars, synthetic_events
+    offsets, bar_ts, opens, closes = synthetic_bars(200)
+    event_series, event_ts = synthetic_events(size, 200)
+    yield Workload(lambda: news_events.align_events(event_series, event_ts, offsets, bar_ts, opens, closes), size)
+
+
+@case("news_clusters.update_clusters (from scratch)", "articles", quick=20_000, full=200_000)
+def bench_news_clusters(size):
+    import news_clusters
+    from benchmarks.bench_news_clusters import store, texts
+    with temp_database() as path:
+        db = crud.configure(path)
+        store(texts(size))
+        news_clusters.make_vectorizer()
+        yield Workload(news_clusters.update_clusters, size, crud.clear_news_clusters)
+        db.close()
+
+
+@case("downsampling (pyramid + LTTB overlays)", "bars", quick=100_000, full=1_000_000)
+def bench_downsampling(size):
+    from downsampling import OHLCPyramid, downsample_line
+    data = random_walk_ohlcv(size, freq="min")
+    line = data["Close"].rolling(20).mean()
+    yield Workload(lambda: (OHLCPyramid(data).view(), downsample_line(line)), size)
+
+
+def _run_case(case_, size, repeats):
+    setup = case_.setup(size)
+    workload = next(setup)
+    try:
+        times = []
+        for attempt in range(repeats + 1):
+            if workload.before is not None:
+                workload.before()
+            start = time.perf_counter()
+            workload.run()
+            elapsed = time.perf_counter() - start
+            if attempt:  # the first call is a warm-up
+                times.append(elapsed)
+    finally:
+        setup.close()
+    median = statistics.median(times)
+    return {
+        "unit": case_.unit,
+        "size": size,
+        "items": workload.items,
+        "repeats": repeats,
+        "min": min(times),
+        "median": median,
+        "max": max(times),
+        "per_second": workload.items / median if median else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": _git_commit(),
+        "time": pd.Timestamp.now(tz="UTC").isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run_suite(profile="full", only=None, repeats=DEFAULT_REPEATS, log=print):
+    results = {}
+    for case_ in CASES:
+        if only and not any(fnmatch.fnmatch(case_.name, f"*{pattern}*") for pattern in only):
+            continue
+        result = _run_case(case_, case_.sizes[profile], repeats)
+        results[case_.name] = result
+        log(f"{case_.name:<44} size {result['size']:>9,}  median {result['median'] * 1000:10.2f} ms"
+            f"  {result['per_second']:>14,.1f} {case_.unit}/s")
+    return {"environment": environment(), "profile": profile, "results": results}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return (name, baseline best, current best, ratio, verdict) for the cases both runs have at the same size."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["size"] != result["size"]:
+            continue
+        ratio = result["min"] / base["min"]
+        verdict = "regression" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else ""
+        rows.append((name, base["min"], result["min"], ratio, verdict))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'case (best time)':<44}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, base, current, ratio, verdict in rows:
+        print(f"{name:<44}{base * 1000:10.2f}ms{current * 1000:10.2f}ms{ratio:8.2f}  {verdict}")
+    regressions = [row for row in rows if row[4] == "regression"]
+    print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%} out of {len(rows)} compared case(s)")
+    return regressions
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="small sizes (a smoke run in well under a minute)")
+    parser.add_argument("--only", nargs="+", help="run the cases whose name contains any of these")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>-<profile>.json)")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the best time that counts as a regression")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "RESULTS"), help="only compare two results files")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for case_ in CASES:
+            print(f"{case_.name:<44} {case_.unit:<9} quick {case_.sizes['quick']:>9,}  full {case_.sizes['full']:>10,}")
+        return 0
+
+    if args.compare:
+        baseline, current = (_load(path) for path in args.compare)
+        return 1 if print_comparison(compare(baseline, current, args.threshold), args.threshold) else 0
+
+    profile = "quick" if args.quick else "full"
+    current = run_suite(profile, args.only, args.repeats)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{current['environment']['commit'] or 'results'}-{profile}.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(current, file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        return 1 if print_comparison(compare(_load(args.baseline), current, args.threshold), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import crud
+
+
+# Our field name -> key in the provider's info dict
+METADATA_FIELDS = {
+    "name": "longName",
+    "exchange": "exchange",
+    "currency": "currency",
+    "sector": "sector",
+}
+
+METADATA_TTL_SECONDS = 7 * 24 * 3600
+
+LRU_MAX_ENTRIES = 2048
+
+# How long to wait for the provider before answering with a stale entry
+PROVIDER_TIMEOUT_SECONDS = 5.0
+
+MAX_WORKERS = 8
+
+
+def _from_info(ticker, info, fetched_at):
+    record = {"ticker": ticker, "fetched_at": fetched_at}
+    for field, key in METADATA_FIELDS.items():
+        record[field] = info.get(key)
+    if not record["name"]:
+        record["name"] = info.get("shortName") or ticker
+    return record
+
+
+class CompanyMetadataCache:
+    """Company name/exchange/currency/sector per ticker: in-memory LRU -> company_metadata table -> provider.
+
+    Entries older than `ttl` are refreshed from the provider; if it fails or is slower than
+    `timeout`, the stale entry is served instead (and replaced once the slow fetch finishes).
+    """
+
+    def __init__(self, provider, ttl=METADATA_TTL_SECONDS, max_entries=LRU_MAX_ENTRIES,
+                 timeout=PROVIDER_TIMEOUT_SECONDS, max_workers=MAX_WORKERS):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.stats = {"memory_hits": 0, "db_hits": 0, "fetched": 0, "stale_served": 0, "failed": 0}
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _fresh(self, record, now):
+        return record is not None and now - record["fetched_at"] < self.ttl
+
+    def _remember(self, record):
+        with self._lock:
+            self._lru[record["ticker"]] = record
+            self._lru.move_to_end(record["ticker"])
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _from_memory(self, ticker):
+        with self._lock:
+            record = self._lru.get(ticker)
+            if record is not None:
+                self._lru.move_to_end(ticker)
+            return record
+
+    def _fetch(self, ticker):
+        record = _from_info(ticker, self.provider.info(ticker), time.time())
+        crud.save_company_metadata([record])
+        self._remember(record)
+        return record
+
+    def get(self, ticker):
+        return self.get_many([ticker])[ticker]
+
+    def get_many(self, tickers):
+        """Return ticker -> metadata dict for every ticker, fetching missing or expired entries concurrently."""
+        now = time.time()
+        results, stale = {}, {}
+
+        for ticker in tickers:
+            record = self._from_memory(ticker)
+            if self._fresh(record, now):
+                results[ticker] = record
+                self._count("memory_hits")
+            elif record is not None:
+                stale[ticker] = record
+
+        pending = [ticker for ticker in tickers if ticker not in results]
+        for ticker, record in crud.get_company_metadata(pending).items():
+            if self._fresh(record, now):
+                results[ticker] = record
+                self._remember(record)
+                self._count("db_hits")
+            else:
+                stale[ticker] = record
+
+        missing = [ticker for ticker in tickers if ticker not in results]
+        if missing:
+            results.update(self._fetch_all(missing, stale))
+
+        return {ticker: results[ticker] for ticker in tickers}
+
+    # Function to fetch from the provider, falling back to stale (or placeholder) entries
+    def _fetch_all(self, tickers, stale):
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(tickers)))
+        futures = {ticker: pool.submit(self._fetch, ticker) for ticker in tickers}
+        deadline = time.monotonic() + self.timeout
+
+        for ticker, future in futures.items():
+            try:
+                results[ticker] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                self._count("fetched")
+                continue
+            except FutureTimeout:
+                logging.error(f"⚠️ Metadata provider timed out for {ticker}, serving cached entry")
+            except Exception as e:
+                logging.error(f"⚠️ Error fetching metadata for {ticker}: {e}")
+                self._count("failed")
+
+            if ticker in stale:
+                results[ticker] = stale[ticker]
+                self._count("stale_served")
+            else:
+                results[ticker] = {"ticker": ticker, "name": ticker, "exchange": None,
+                                   "currency": None, "sector": None, "fetched_at": 0.0}
+
+        # Don't block on slow fetches: they keep running and update the cache when they finish
+        pool.shutdown(wait=False)
+        return results
+
+    def prefetch(self, tickers):
+        """Warm the cache for a whole watchlist; returns the number of tickers that needed the provider."""
+        before = self.stats["fetched"]
+        self.get_many(list(dict.fromkeys(tickers)))
+        return self.stats["fetched"] - before
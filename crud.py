@@ -1,30 +1,332 @@
-import sqlite3
+import os
+import re
+import time
+import numpy as np
 import pandas as pd
 
+from database import Database, immediate_transaction, table_columns
+from news_dates import parse_published
 
-DATABSE_PATH = "C:/Users/anboicu/Computational Thinking/Project/stock_database.db"
 
-# Connect to SQLite database (creates file if not exists)
-conn = sqlite3.connect(DATABSE_PATH)
-cursor = conn.cursor()
+DATABASE_PATH = os.environ.get(
+    "STOCK_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "stock_database.db"),
+)
 
-# Table for stock prices
-cursor.execute('''
+# One row per bar, clustered on (ticker_id, interval, ts) so a range scan reads consecutive pages.
+# ts is the bar time in whole seconds since the epoch, on the exchange's clock with the timezone
+# dropped, so daily bars sit at midnight of their trading day
+STOCK_PRICES_TABLE = '''
     CREATE TABLE IF NOT EXISTS stock_prices (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ticker TEXT NOT NULL,
-        date TEXT NOT NULL,
+        ticker_id INTEGER NOT NULL REFERENCES tickers (id),
+        interval TEXT NOT NULL,
+        ts INTEGER NOT NULL,
         open REAL,
         high REAL,
         low REAL,
         close REAL,
         volume INTEGER,
-        UNIQUE(ticker, date)
+        PRIMARY KEY (ticker_id, interval, ts)
+    ) WITHOUT ROWID
+'''
+
+
+# The first layout kept a rowid row per bar holding the ticker and a YYYY-MM-DD date (so only one bar
+# per day), plus a covering index repeating every column. Bars are copied over in key order, which the
+# old unique index yields without sorting since ticker ids are handed out alphabetically here.
+# Databases older than the interval column only ever stored daily bars.
+def _migrate_stock_prices(conn):
+    if "ts" in table_columns(conn, "stock_prices"):
+        return
+    with immediate_transaction(conn):
+        # Checked again under the write lock: another process may have migrated the file meanwhile
+        columns = table_columns(conn, "stock_prices")
+        if "ts" in columns:
+            return
+        interval, order = ("p.interval", "p.ticker, p.interval, p.date") if "interval" in columns else ("'1d'", "p.ticker, p.date")
+        conn.execute("INSERT OR IGNORE INTO tickers (symbol) SELECT DISTINCT ticker FROM stock_prices ORDER BY ticker")
+        conn.execute(STOCK_PRICES_TABLE.replace("stock_prices", "stock_prices_new"))
+        conn.execute(f'''
+            INSERT INTO stock_prices_new (ticker_id, interval, ts, open, high, low, close, volume)
+            SELECT t.id, {interval}, CAST(strftime('%s', p.date) AS INTEGER), p.open, p.high, p.low, p.close, p.volume
+            FROM stock_prices p JOIN tickers t ON t.symbol = p.ticker
+            ORDER BY {order}
+        ''')
+        conn.execute("DROP TABLE stock_prices")
+        conn.execute("ALTER TABLE stock_prices_new RENAME TO stock_prices")
+
+
+NEWS_ARTICLES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS news_articles (
+        id INTEGER PRIMARY KEY,
+        link_hash TEXT NOT NULL UNIQUE,
+        title TEXT,
+        description TEXT,
+        source TEXT,
+        published TEXT,
+        published_at REAL,
+        tickers TEXT,
+        link TEXT,
+        sentiment TEXT,
+        compound REAL,
+        first_seen REAL NOT NULL
     )
-''')
+'''
+
+
+# Articles stored before publication times were parsed at ingest: their relative "Published Date"
+# strings are counted back from when they were first stored
+def _add_news_published_at(conn):
+    if "published_at" in table_columns(conn, "news_articles"):
+        return
+    with immediate_transaction(conn):
+        # Checked again under the write lock: another process may have added the column meanwhile
+        if "published_at" in table_columns(conn, "news_articles"):
+            return
+        rows = conn.execute("SELECT id, published, first_seen FROM news_articles").fetchall()
+        published_at = parse_published([row[1] for row in rows], [row[2] for row in rows]) if rows else []
+        conn.execute("ALTER TABLE news_articles ADD COLUMN published_at REAL")
+        conn.executemany("UPDATE news_articles SET published_at = ? WHERE id = ?",
+                         [(value, row[0]) for value, row in zip(published_at.tolist(), rows) if value == value])
+
+
+# Columns of news_articles searchable through news_fts
+NEWS_FTS_COLUMNS = ["title", "description", "source", "sentiment"]
+
 
-# Table for sentiment analysis results
-cursor.execute('''
+def _create_news_fts(conn):
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'news_fts'").fetchone()
+    columns = ", ".join(NEWS_FTS_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in NEWS_FTS_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in NEWS_FTS_COLUMNS)
+    # External content: the index stores no copy of the text, only the tokens (and 2/3-char prefixes)
+    conn.executescript(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            {columns}, content='news_articles', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_insert AFTER INSERT ON news_articles BEGIN
+            INSERT INTO news_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_delete AFTER DELETE ON news_articles BEGIN
+            INSERT INTO news_fts (news_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_update AFTER UPDATE ON news_articles BEGIN
+            INSERT INTO news_fts (news_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO news_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END;
+    ''')
+    if not exists:
+        conn.execute("INSERT INTO news_fts (news_fts) VALUES ('rebuild')")
+
+
+# Each ticker association of a scored article counts once towards the day it was stored
+SENTIMENT_DAILY_ROLLUP = '''
+    INSERT INTO sentiment_daily (ticker, day, bullish, neutral, bearish, compound_sum)
+    SELECT {ticker}, date({first_seen}, 'unixepoch'),
+           sum(a.sentiment = 'Bullish'), sum(a.sentiment = 'Neutral'), sum(a.sentiment = 'Bearish'),
+           total(a.compound)
+    FROM {source}
+    WHERE a.sentiment IS NOT NULL{condition}
+    GROUP BY 1, 2
+    ON CONFLICT (ticker, day) DO UPDATE SET
+        bullish = bullish + excluded.bullish,
+        neutral = neutral + excluded.neutral,
+        bearish = bearish + excluded.bearish,
+        compound_sum = compound_sum + excluded.compound_sum
+'''
+
+
+def _create_sentiment_daily(conn):
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sentiment_daily'").fetchone()
+    conn.executescript(f'''
+        CREATE TABLE IF NOT EXISTS sentiment_daily (
+            ticker TEXT NOT NULL,
+            day TEXT NOT NULL,
+            bullish INTEGER NOT NULL,
+            neutral INTEGER NOT NULL,
+            bearish INTEGER NOT NULL,
+            compound_sum REAL NOT NULL,
+            PRIMARY KEY (ticker, day)
+        ) WITHOUT ROWID;
+        CREATE TRIGGER IF NOT EXISTS news_tickers_sentiment_daily AFTER INSERT ON news_tickers BEGIN
+            {SENTIMENT_DAILY_ROLLUP.format(ticker="new.ticker", first_seen="new.first_seen", source="news_articles a",
+                                           condition=" AND a.link_hash = new.link_hash")};
+        END;
+    ''')
+    if not exists:
+        conn.execute(SENTIMENT_DAILY_ROLLUP.format(
+            ticker="t.ticker", first_seen="t.first_seen",
+            source="news_tickers t JOIN news_articles a ON a.link_hash = t.link_hash", condition=""))
+
+
+# Adds `sign` times one clustered article to the sentiment totals of its cluster
+NEWS_CLUSTER_ROLLUP = '''
+    INSERT INTO news_cluster_sentiment (cluster, articles, bullish, neutral, bearish, compound_sum)
+    SELECT {cluster}, {sign}, {sign} * (a.sentiment IS 'Bullish'), {sign} * (a.sentiment IS 'Neutral'),
+           {sign} * (a.sentiment IS 'Bearish'), {sign} * coalesce(a.compound, 0)
+    FROM news_articles a WHERE a.id = {article_id}
+    ON CONFLICT (cluster) DO UPDATE SET
+        articles = articles + excluded.articles,
+        bullish = bullish + excluded.bullish,
+        neutral = neutral + excluded.neutral,
+        bearish = bearish + excluded.bearish,
+        compound_sum = compound_sum + excluded.compound_sum
+'''
+
+
+def _create_news_clusters(conn):
+    # The assignment of a deleted article goes before the article does (a cascade would run after,
+    # when the rollup trigger can no longer read its sentiment)
+    conn.executescript(f'''
+        CREATE TABLE IF NOT EXISTS news_clusters (
+            article_id INTEGER PRIMARY KEY REFERENCES news_articles (id),
+            cluster INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_news_clusters_cluster ON news_clusters (cluster);
+        CREATE TABLE IF NOT EXISTS news_cluster_model (
+            version TEXT PRIMARY KEY,
+            model BLOB NOT NULL,
+            articles INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS news_cluster_sentiment (
+            cluster INTEGER PRIMARY KEY,
+            articles INTEGER NOT NULL,
+            bullish INTEGER NOT NULL,
+            neutral INTEGER NOT NULL,
+            bearish INTEGER NOT NULL,
+            compound_sum REAL NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS news_clusters_sentiment_insert AFTER INSERT ON news_clusters BEGIN
+            {NEWS_CLUSTER_ROLLUP.format(cluster="new.cluster", sign=1, article_id="new.article_id")};
+        END;
+        CREATE TRIGGER IF NOT EXISTS news_clusters_sentiment_delete AFTER DELETE ON news_clusters BEGIN
+            {NEWS_CLUSTER_ROLLUP.format(cluster="old.cluster", sign=-1, article_id="old.article_id")};
+        END;
+        CREATE TRIGGER IF NOT EXISTS news_clusters_sentiment_update AFTER UPDATE OF cluster ON news_clusters BEGIN
+            {NEWS_CLUSTER_ROLLUP.format(cluster="old.cluster", sign=-1, article_id="old.article_id")};
+            {NEWS_CLUSTER_ROLLUP.format(cluster="new.cluster", sign=1, article_id="new.article_id")};
+        END;
+        CREATE TRIGGER IF NOT EXISTS news_articles_clusters_delete BEFORE DELETE ON news_articles BEGIN
+            DELETE FROM news_clusters WHERE article_id = old.id;
+        END;
+    ''')
+
+
+SCHEMA = [
+    # Ticker symbols of stored bars, so every bar carries a small integer instead of the symbol
+    '''
+    CREATE TABLE IF NOT EXISTS tickers (
+        id INTEGER PRIMARY KEY,
+        symbol TEXT NOT NULL UNIQUE
+    )
+    ''',
+    # Table for stock prices
+    STOCK_PRICES_TABLE,
+    _migrate_stock_prices,
+    # Earliest bar time written per series since the snapshot (snapshot.py) last took it in;
+    # version grows with every write so a refresh only clears the changes it has seen
+    '''
+    CREATE TABLE IF NOT EXISTS price_changes (
+        ticker_id INTEGER NOT NULL,
+        interval TEXT NOT NULL,
+        since INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (ticker_id, interval)
+    ) WITHOUT ROWID
+    ''',
+    # Date ranges [start, end) already fetched from the price provider, per ticker and interval
+    '''
+    CREATE TABLE IF NOT EXISTS price_coverage (
+        ticker TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        start TEXT NOT NULL,
+        end TEXT NOT NULL,
+        PRIMARY KEY (ticker, interval, start)
+    ) WITHOUT ROWID
+    ''',
+    # Company display metadata per ticker; fetched_at is a unix timestamp used for the TTL
+    '''
+    CREATE TABLE IF NOT EXISTS company_metadata (
+        ticker TEXT PRIMARY KEY,
+        name TEXT,
+        exchange TEXT,
+        currency TEXT,
+        sector TEXT,
+        fetched_at REAL NOT NULL
+    )
+    ''',
+    # Serialized IncrementalIndicators per ticker, interval and indicator set (JSON)
+    '''
+    CREATE TABLE IF NOT EXISTS indicator_state (
+        ticker TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        specs TEXT NOT NULL,
+        last_index TEXT,
+        state TEXT NOT NULL,
+        PRIMARY KEY (ticker, interval, specs)
+    ) WITHOUT ROWID
+    ''',
+    # Memoized VADER compound scores keyed by a hash of the normalized article text
+    '''
+    CREATE TABLE IF NOT EXISTS sentiment_cache (
+        text_hash TEXT PRIMARY KEY,
+        compound REAL NOT NULL,
+        analyzer_version TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache (last_used);
+    ''',
+    # Scraped news, one row per article keyed by a hash of its link; rows are only ever appended.
+    # first_seen (unix timestamp) is when the article was first stored; id is the full-text index rowid
+    NEWS_ARTICLES_TABLE,
+    _add_news_published_at,
+    '''
+    CREATE INDEX IF NOT EXISTS idx_news_articles_first_seen ON news_articles (first_seen);
+    ''',
+    # Tickers an article is about: the scraped ticker plus its "Affected Tickers"
+    '''
+    CREATE TABLE IF NOT EXISTS news_tickers (
+        ticker TEXT NOT NULL,
+        link_hash TEXT NOT NULL REFERENCES news_articles (link_hash) ON DELETE CASCADE,
+        first_seen REAL NOT NULL,
+        PRIMARY KEY (ticker, link_hash)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_news_tickers_first_seen ON news_tickers (ticker, first_seen);
+    ''',
+    # Full-text index over the news filter columns, kept in sync with news_articles by triggers
+    _create_news_fts,
+    # Bullish/Neutral/Bearish article counts per ticker and day, maintained by a trigger on news_tickers
+    _create_sentiment_daily,
+    # Topic cluster of every clustered article, the incremental model that assigned them (news_clusters.py)
+    # and Bullish/Neutral/Bearish totals per cluster, maintained by triggers on news_clusters
+    _create_news_clusters,
+    # Last run of every ingestion job (see ingest.py); times are unix timestamps
+    '''
+    CREATE TABLE IF NOT EXISTS ingest_runs (
+        job TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        last_started REAL NOT NULL,
+        last_finished REAL NOT NULL,
+        last_success REAL,
+        runs INTEGER NOT NULL DEFAULT 0,
+        failures INTEGER NOT NULL DEFAULT 0,
+        detail TEXT
+    ) WITHOUT ROWID
+    ''',
+    # Named leases for work that must run one at a time across threads and processes (e.g. snapshot
+    # refreshes) without holding the database write lock; a lease past `expires` is free to take over
+    '''
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires REAL NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    # Table for sentiment analysis results
+    '''
     CREATE TABLE IF NOT EXISTS sentiment_analysis (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         ticker TEXT NOT NULL,
@@ -32,82 +334,774 @@ cursor.execute('''
         sentiment_score INTEGER,
         date TEXT NOT NULL
     )
-''')
+    ''',
+]
+
+_db = None
+
+
+# Function to get the shared database, created on first use so importing crud has no side effects
+def get_db():
+    global _db
+    if _db is None:
+        _db = Database(DATABASE_PATH, schema=SCHEMA)
+    return _db
+
+
+# Function to point crud at another database file (closes the current connections)
+def configure(path):
+    global _db, DATABASE_PATH
+    if _db is not None:
+        _db.close()
+    DATABASE_PATH = path
+    _db = Database(path, schema=SCHEMA)
+    return _db
+
+
+INGEST_BATCH_SIZE = 50_000
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+# Function to convert bar times to stored ts values (seconds, timezone dropped)
+def _epoch_seconds(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype("datetime64[s]").astype(np.int64)
+
+
+def _as_epoch(value):
+    return int(_epoch_seconds([pd.Timestamp(value)])[0])
+
+
+# Function to map ticker symbols to their ids, adding the ones not seen before
+def _ticker_ids(conn, symbols):
+    symbols = list(dict.fromkeys(symbols))
+    conn.executemany("INSERT OR IGNORE INTO tickers (symbol) VALUES (?)", [(symbol,) for symbol in symbols])
+    ids = {}
+    for chunk in _chunks(symbols):
+        ids.update(conn.execute(f"SELECT symbol, id FROM tickers WHERE symbol IN ({', '.join('?' * len(chunk))})",
+                                chunk).fetchall())
+    return ids
+
+
+# Function to turn an OHLCV frame into plain tuples without iterating row by row
+def _stock_rows(ticker_id, interval, data):
+    timestamps = _epoch_seconds(data.index).tolist()
+    columns = [data[col].tolist() for col in PRICE_COLUMNS]
+    return list(zip([ticker_id] * len(timestamps), [interval] * len(timestamps), timestamps, *columns))
+
 
-# Commit changes and close connection
-conn.commit()
-conn.close()
+def _batches(rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
 
 
-def save_stock_data_to_db(ticker, data):
-    conn = sqlite3.connect(DATABSE_PATH)
-    cursor = conn.cursor()
+def save_stock_data_bulk(data, ticker=None, interval="1d", upsert=False, batch_size=INGEST_BATCH_SIZE):
+    """Persist OHLCV bars in batched executemany calls inside a single transaction.
 
-    for index, row in data.iterrows():
-        cursor.execute('''
-            INSERT OR IGNORE INTO stock_prices (ticker, date, open, high, low, close, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (ticker, index.strftime("%Y-%m-%d"), row['Open'], row['High'], row['Low'], row['Close'], row['Volume']))
+    `data` is either one DataFrame (then `ticker` is required) or a dict of ticker -> DataFrame.
+    With `upsert=True` existing bars whose values changed are updated instead of ignored.
+    Returns a dict with the number of inserted, updated and skipped rows.
+    """
+    if isinstance(data, dict):
+        frames = data
+    else:
+        if not ticker:
+            raise ValueError("A ticker is required when saving a single DataFrame.")
+        frames = {ticker: data}
 
-    conn.commit()
-    conn.close()
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
 
+    frames = {frame_ticker: frame for frame_ticker, frame in frames.items() if frame is not None and not frame.empty}
+
+    with get_db().transaction(immediate=True) as conn:
+        ticker_ids = _ticker_ids(conn, frames)
+        for frame_ticker, frame in frames.items():
+            rows = _stock_rows(ticker_ids[frame_ticker], interval, frame)
+            changed = False
+
+            for batch in _batches(rows, batch_size):
+                cursor = conn.executemany('''
+                    INSERT OR IGNORE INTO stock_prices (ticker_id, interval, ts, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+                inserted = cursor.rowcount
+
+                updated = 0
+                if upsert:
+                    # Rows that were just inserted already hold these values, so only corrected bars match
+                    cursor = conn.executemany('''
+                        UPDATE stock_prices SET open=?, high=?, low=?, close=?, volume=?
+                        WHERE ticker_id=? AND interval=? AND ts=? AND (open, high, low, close, volume) IS NOT (?, ?, ?, ?, ?)
+                    ''', [(*row[3:], *row[:3], *row[3:]) for row in batch])
+                    updated = cursor.rowcount
+
+                counts["inserted"] += inserted
+                counts["updated"] += updated
+                counts["skipped"] += len(batch) - inserted - updated
+                changed = changed or inserted or updated
+
+            if changed:
+                conn.execute(PRICE_CHANGES_UPSERT.format(rows="VALUES (?, ?, ?, 1)"),
+                             (ticker_ids[frame_ticker], interval, min(row[2] for row in rows)))
+
+    return counts
+
+
+PRICE_CHANGES_UPSERT = '''
+    INSERT INTO price_changes (ticker_id, interval, since, version) {rows}
+    ON CONFLICT (ticker_id, interval) DO UPDATE SET since = min(since, excluded.since), version = version + 1
+'''
+
+
+# Function to flag every stored series matching `condition` as changed from its first bar on
+def _record_series_changes(conn, condition, params=()):
+    conn.execute(PRICE_CHANGES_UPSERT.format(
+        rows=f"SELECT ticker_id, interval, min(ts), 1 FROM stock_prices WHERE {condition} GROUP BY ticker_id, interval"),
+        params)
+
+
+def save_stock_data_to_db(ticker, data, interval="1d"):
+    return save_stock_data_bulk(data, ticker=ticker, interval=interval)
 
 
 def get_stock_data_from_db():
-    conn = sqlite3.connect(DATABSE_PATH)
-    df = pd.read_sql_query(f"SELECT * FROM stock_prices ORDER BY id ASC", conn)
-    conn.close()
-    return df
+    return query_stock_data()
+
+
+STOCK_COLUMNS = ["ticker", "interval", "date", "open", "high", "low", "close", "volume"]
+
+# Columns every query returns, in this order, since they form the pagination key
+STOCK_KEY_COLUMNS = ["ticker", "interval", "date"]
+
+# SQL for each returned column over stock_prices p joined to tickers t; date is converted from ts after reading
+STOCK_COLUMN_SQL = {"ticker": "t.symbol", "interval": "p.interval", "date": "p.ts", "open": "p.open",
+                    "high": "p.high", "low": "p.low", "close": "p.close", "volume": "p.volume"}
+
+
+def _as_db_date(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _stock_query(tickers, start, end, interval, columns, after, limit):
+    columns = list(columns) if columns else STOCK_COLUMNS
+    unknown = set(columns) - set(STOCK_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown stock_prices columns: {sorted(unknown)}")
+    selected = STOCK_KEY_COLUMNS + [col for col in columns if col not in STOCK_KEY_COLUMNS]
+
+    where, params = [], []
+    if tickers:
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        where.append(f"t.symbol IN ({', '.join('?' * len(tickers))})")
+        params.extend(tickers)
+    if interval:
+        where.append("p.interval = ?")
+        params.append(interval)
+    if start is not None:
+        where.append("p.ts >= ?")
+        params.append(_as_epoch(start))
+    if end is not None:
+        where.append("p.ts <= ?")
+        params.append(_as_epoch(end))
+    if after is not None:
+        # Keyset pagination: continue strictly after the last (ticker, interval, date) already returned.
+        # The symbol bound alone is what lets the scan start at that ticker
+        ticker, after_interval, after_date = after
+        where.append("t.symbol >= ? AND (t.symbol, p.interval, p.ts) > (?, ?, ?)")
+        params.extend([ticker, ticker, after_interval, _as_epoch(after_date)])
+
+    sql = (f"SELECT {', '.join(f'{STOCK_COLUMN_SQL[col]} AS {col}' for col in selected)} "
+           "FROM tickers t JOIN stock_prices p ON p.ticker_id = t.id")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY t.symbol, p.interval, p.ts"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def query_stock_data(tickers=None, start=None, end=None, interval=None, columns=None, after=None, limit=None):
+    """Read stored bars filtered by ticker list, interval and inclusive time range [start, end].
+
+    `columns` projects the OHLCV columns (ticker, interval and date are always returned; date holds
+    the bar time). Pass the `page_key()` of the previous page as `after` to fetch the next `limit` rows.
+    """
+    sql, params = _stock_query(tickers, start, end, interval, columns, after, limit)
+    rows = pd.read_sql_query(sql, get_db().connection(), params=params)
+    rows["date"] = pd.to_datetime(rows["date"], unit="s")
+    return rows
+
+
+def iter_stock_data(tickers=None, start=None, end=None, interval=None, columns=None, chunk_size=100_000):
+    """Yield the rows of `query_stock_data` as DataFrames of at most `chunk_size` rows."""
+    after = None
+    while True:
+        chunk = query_stock_data(tickers, start, end, interval, columns, after=after, limit=chunk_size)
+        if chunk.empty:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        after = page_key(chunk)
+
+
+# Function to get the keyset cursor of a page (None for an empty page)
+def page_key(page):
+    if page.empty:
+        return None
+    last = page.iloc[-1]
+    return tuple(last[col] for col in STOCK_KEY_COLUMNS)
 
 
 def delete_stock_data(ticker):
-    conn = sqlite3.connect(DATABSE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM stock_prices WHERE ticker=?", (ticker,))
-    conn.commit()
-    conn.close()
+    with get_db().transaction() as conn:
+        _record_series_changes(conn, "ticker_id IN (SELECT id FROM tickers WHERE symbol=?)", (ticker,))
+        conn.execute("DELETE FROM stock_prices WHERE ticker_id IN (SELECT id FROM tickers WHERE symbol=?)", (ticker,))
+        conn.execute("DELETE FROM price_coverage WHERE ticker=?", (ticker,))
+        conn.execute("DELETE FROM indicator_state WHERE ticker=?", (ticker,))
 
 
 def truncate_stock_data():
-    conn = sqlite3.connect(DATABSE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM stock_prices")
-    conn.commit()
-    conn.close()
+    with get_db().transaction() as conn:
+        _record_series_changes(conn, "true")
+        conn.execute("DELETE FROM stock_prices")
+        conn.execute("DELETE FROM price_coverage")
+        conn.execute("DELETE FROM indicator_state")
+
+
+def get_price_changes():
+    """(ticker, interval, since, version) of every series written to since its changes were last cleared."""
+    rows = get_db().execute('''
+        SELECT t.symbol, c.interval, c.since, c.version FROM price_changes c JOIN tickers t ON t.id = c.ticker_id
+    ''').fetchall()
+    return [tuple(row) for row in rows]
+
+
+# Function to flag every stored series as changed, e.g. to rebuild a snapshot from scratch
+def mark_all_prices_changed():
+    with get_db().transaction() as conn:
+        _record_series_changes(conn, "true")
+
+
+# Function to clear changes that were taken in; a series written to again since then keeps its entry
+def clear_price_changes(changes):
+    with get_db().transaction() as conn:
+        conn.executemany('''
+            DELETE FROM price_changes
+            WHERE ticker_id = (SELECT id FROM tickers WHERE symbol=?) AND interval=? AND version=?
+        ''', [(ticker, interval, version) for ticker, interval, _, version in changes])
+
+
+def read_price_columns(ticker, interval, since=None):
+    """Bars of one series with ts >= since as a float64 array of shape (n, 6): ts and the OHLCV columns."""
+    rows = get_db().execute('''
+        SELECT p.ts, p.open, p.high, p.low, p.close, p.volume
+        FROM tickers t JOIN stock_prices p ON p.ticker_id = t.id
+        WHERE t.symbol=? AND p.interval=? AND p.ts >= ? ORDER BY p.ts
+    ''', (ticker, interval, -2**63 if since is None else since)).fetchall()
+    return np.array(rows, dtype=np.float64).reshape(len(rows), 6)
+
+
+def get_price_coverage(ticker, interval):
+    rows = get_db().execute('''
+        SELECT start, end FROM price_coverage WHERE ticker=? AND interval=? ORDER BY start
+    ''', (ticker, interval)).fetchall()
+    return [tuple(row) for row in rows]
+
+
+# Function to record a fetched range, merging it with any overlapping or adjacent ranges
+def add_price_coverage(ticker, interval, start, end):
+    if start >= end:
+        return
+    with get_db().transaction(immediate=True) as conn:
+        touching = conn.execute('''
+            SELECT start, end FROM price_coverage
+            WHERE ticker=? AND interval=? AND start <= ? AND end >= ?
+        ''', (ticker, interval, end, start)).fetchall()
+        for old_start, old_end in touching:
+            start, end = min(start, old_start), max(end, old_end)
+        conn.execute('''
+            DELETE FROM price_coverage WHERE ticker=? AND interval=? AND start <= ? AND end >= ?
+        ''', (ticker, interval, end, start))
+        conn.execute('''
+            INSERT INTO price_coverage (ticker, interval, start, end) VALUES (?, ?, ?, ?)
+        ''', (ticker, interval, start, end))
+
+
+def save_indicator_state(ticker, interval, specs, last_index, state):
+    with get_db().transaction() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO indicator_state (ticker, interval, specs, last_index, state)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (ticker, interval, specs, last_index, state))
+
+
+# Function to read a saved state as (last_index, state), or None
+def get_indicator_state(ticker, interval, specs):
+    row = get_db().execute('''
+        SELECT last_index, state FROM indicator_state WHERE ticker=? AND interval=? AND specs=?
+    ''', (ticker, interval, specs)).fetchone()
+    return tuple(row) if row else None
+
+
+def delete_indicator_state(ticker):
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM indicator_state WHERE ticker=?", (ticker,))
+
+
+# SQLite caps the number of bound parameters, so large IN (...) lookups are split
+MAX_IN_PARAMS = 900
+
+
+def _chunks(values, size=MAX_IN_PARAMS):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def get_cached_sentiment(text_hashes, analyzer_version):
+    """Return text_hash -> compound for the hashes scored by `analyzer_version`, marking them as used."""
+    found = {}
+    now = time.time()
+    with get_db().transaction() as conn:
+        for chunk in _chunks(list(text_hashes)):
+            placeholders = ", ".join("?" * len(chunk))
+            found.update(conn.execute(f'''
+                SELECT text_hash, compound FROM sentiment_cache
+                WHERE analyzer_version = ? AND text_hash IN ({placeholders})
+            ''', [analyzer_version, *chunk]).fetchall())
+            conn.execute(f'''
+                UPDATE sentiment_cache SET last_used = ?
+                WHERE analyzer_version = ? AND text_hash IN ({placeholders})
+            ''', [now, analyzer_version, *chunk])
+    return found
+
+
+def save_cached_sentiment(scores, analyzer_version):
+    now = time.time()
+    with get_db().transaction() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO sentiment_cache (text_hash, compound, analyzer_version, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(text_hash, compound, analyzer_version, now, now) for text_hash, compound in scores.items()])
+
+
+def evict_sentiment_cache(max_age_seconds, max_entries):
+    """Drop entries unused for `max_age_seconds`, then the least recently used beyond `max_entries`."""
+    with get_db().transaction() as conn:
+        expired = conn.execute("DELETE FROM sentiment_cache WHERE last_used < ?",
+                               (time.time() - max_age_seconds,)).rowcount
+        overflow = conn.execute('''
+            DELETE FROM sentiment_cache WHERE text_hash IN (
+                SELECT text_hash FROM sentiment_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_entries,)).rowcount
+    return expired + overflow
+
+
+# Stored column -> column name used by the scraper and the app
+NEWS_ARTICLE_COLUMNS = {
+    "sentiment": "Sentiment",
+    "compound": "Compound",
+    "title": "Title",
+    "description": "Short Description",
+    "source": "Source",
+    "published": "Published Date",
+    "published_at": "Published At",  # unix seconds parsed from "Published Date" at ingest
+    "tickers": "Affected Tickers",
+    "link": "Link",
+    "first_seen": "First Seen",
+}
+
+
+def get_known_news(link_hashes):
+    """Return the subset of `link_hashes` already in the news store."""
+    known = set()
+    for chunk in _chunks(list(link_hashes)):
+        placeholders = ", ".join("?" * len(chunk))
+        known.update(row[0] for row in get_db().execute(
+            f"SELECT link_hash FROM news_articles WHERE link_hash IN ({placeholders})", chunk))
+    return known
+
+
+def recent_news_links(ticker=None, limit=200):
+    """Return the links of the `limit` most recently stored articles (for one ticker, or overall)."""
+    if ticker:
+        rows = get_db().execute('''
+            SELECT a.link FROM news_tickers t JOIN news_articles a ON a.link_hash = t.link_hash
+            WHERE t.ticker = ? ORDER BY t.first_seen DESC LIMIT ?
+        ''', (ticker, limit))
+    else:
+        rows = get_db().execute("SELECT link FROM news_articles ORDER BY first_seen DESC LIMIT ?", (limit,))
+    return {row[0] for row in rows if row[0] and row[0] != "N/A"}
+
+
+def save_news_articles(articles, ticker_links):
+    """Append articles and their ticker associations; rows already stored are left untouched.
+
+    `articles` are dicts keyed by NEWS_ARTICLE_COLUMNS keys plus link_hash, `ticker_links` are
+    (ticker, link_hash) pairs. Returns the number of new articles.
+    """
+    now = time.time()
+    columns = ["link_hash", *[column for column in NEWS_ARTICLE_COLUMNS if column != "first_seen"]]
+    with get_db().transaction(immediate=True) as conn:
+        before = conn.total_changes
+        conn.executemany(f'''
+            INSERT OR IGNORE INTO news_articles ({", ".join(columns)}, first_seen)
+            VALUES ({", ".join("?" * len(columns))}, ?)
+        ''', [(*[article.get(column) for column in columns], now) for article in articles])
+        inserted = conn.total_changes - before
+        conn.executemany('''
+            INSERT OR IGNORE INTO news_tickers (ticker, link_hash, first_seen) VALUES (?, ?, ?)
+        ''', [(ticker, link_hash, now) for ticker, link_hash in ticker_links])
+    return inserted
+
+
+_search_token = re.compile(r"\w+")
+
+
+# Function to turn {column: text} filters into an FTS5 query: every word of every filter must match,
+# as a prefix of a word in that column. None when a filter has no word in it (such as "-"), as nothing
+# in the index can match it
+def news_match(filters):
+    display_names = {name: column for column, name in NEWS_ARTICLE_COLUMNS.items()}
+    terms = []
+    for column, text in filters.items():
+        column = display_names.get(column, column)
+        if column not in NEWS_FTS_COLUMNS:
+            raise ValueError(f"{column!r} is not a searchable news column")
+        tokens = _search_token.findall(str(text))
+        if not tokens:
+            return None
+        terms.extend(f'{column} : "{token}"*' for token in tokens)
+    return " AND ".join(terms) or None
+
+
+def query_news(tickers=None, since=None, until=None, limit=None, filters=None):
+    """Stored news as a frame with the scraper's column names.
+
+    `tickers` restricts to articles about any of them; `since`/`until` bound first_seen (unix seconds).
+    `filters` ({column: text}) searches the full-text index and orders by relevance; otherwise
+    the newest articles come first. A filter without any word matches no article.
+    """
+    match = news_match(filters) if filters else None
+    if filters and match is None:
+        return pd.DataFrame(columns=list(NEWS_ARTICLE_COLUMNS.values()))
+    columns = ", ".join(f"a.{column}" for column in NEWS_ARTICLE_COLUMNS)
+    clauses, params = [], []
+    if match:
+        sql = f"SELECT {columns} FROM news_fts JOIN news_articles a ON a.id = news_fts.rowid"
+        clauses.append("news_fts MATCH ?")
+        params.append(match)
+    else:
+        sql = f"SELECT {columns} FROM news_articles a"
+    if tickers:
+        tickers = list(tickers)
+        # Correlated lookup on the (ticker, link_hash) key: cheap per candidate row, nothing materialized
+        clauses.append(f"EXISTS (SELECT 1 FROM news_tickers t WHERE t.ticker IN ({', '.join('?' * len(tickers))}) "
+                       f"AND t.link_hash = a.link_hash)")
+        params.extend(tickers)
+    if since is not None:
+        clauses.append("a.first_seen >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("a.first_seen < ?")
+        params.append(until)
+
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY news_fts.rank, a.first_seen DESC" if match else " ORDER BY a.first_seen DESC, a.id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    news = pd.read_sql_query(sql, get_db().connection(), params=params)
+    return news.rename(columns=NEWS_ARTICLE_COLUMNS)
+
+
+def count_news_events(tickers=None):
+    """ticker -> number of scored articles with a known publication time."""
+    sql = '''
+        SELECT t.ticker, count(*) FROM news_tickers t JOIN news_articles a ON a.link_hash = t.link_hash
+        WHERE a.published_at IS NOT NULL AND a.compound IS NOT NULL{condition} GROUP BY t.ticker
+    '''
+    if tickers is None:
+        return dict(get_db().execute(sql.format(condition="")).fetchall())
+    counts = {}
+    for chunk in _chunks(list(tickers)):
+        counts.update(get_db().execute(sql.format(condition=f" AND t.ticker IN ({', '.join('?' * len(chunk))})"),
+                                       chunk).fetchall())
+    return counts
+
+
+def get_news_events(tickers):
+    """Scored articles with a known publication time about any of `tickers`, one row per (ticker, article):
+    ticker, link_hash, published_at (unix seconds), compound and sentiment."""
+    frames = []
+    for chunk in _chunks(list(tickers)):
+        frames.append(pd.read_sql_query(f'''
+            SELECT t.ticker, a.link_hash, a.published_at, a.compound, a.sentiment
+            FROM news_tickers t JOIN news_articles a ON a.link_hash = t.link_hash
+            WHERE t.ticker IN ({', '.join('?' * len(chunk))})
+              AND a.published_at IS NOT NULL AND a.compound IS NOT NULL
+        ''', get_db().connection(), params=chunk))
+    if not frames:
+        return pd.DataFrame(columns=["ticker", "link_hash", "published_at", "compound", "sentiment"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def delete_news_data():
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM news_tickers")
+        conn.execute("DELETE FROM news_clusters")
+        conn.execute("DELETE FROM news_cluster_sentiment")
+        conn.execute("DELETE FROM news_cluster_model")
+        conn.execute("DELETE FROM news_articles")
+        conn.execute("DELETE FROM sentiment_daily")
+
+
+def prune_news(max_age_seconds):
+    """Drop articles first stored more than `max_age_seconds` ago; their daily rollups are kept,
+    their cluster assignments (and their share of the cluster totals) are not."""
+    with get_db().transaction() as conn:
+        return conn.execute("DELETE FROM news_articles WHERE first_seen < ?",
+                            (time.time() - max_age_seconds,)).rowcount
+
+
+def get_news_cluster_model():
+    """(version, pickled model, articles it was fitted on) of the stored clustering model, or None."""
+    return get_db().execute("SELECT version, model, articles FROM news_cluster_model").fetchone()
+
+
+# Function to identify the stored model's last save without reading the model: (version, articles, updated_at)
+def get_news_cluster_stamp():
+    return get_db().execute("SELECT version, articles, updated_at FROM news_cluster_model").fetchone()
+
+
+def last_clustered_article():
+    """id of the newest article with a cluster, 0 if none (articles are appended, so only newer ones lack one)."""
+    return get_db().execute("SELECT coalesce(max(article_id), 0) FROM news_clusters").fetchone()[0]
+
+
+def get_news_to_cluster(after, limit):
+    """Up to `limit` stored articles with an id above `after`, oldest first: id, title and description."""
+    return pd.read_sql_query('''
+        SELECT id, title, description FROM news_articles WHERE id > ? ORDER BY id LIMIT ?
+    ''', get_db().connection(), params=(after, limit))
+
+
+def save_news_clusters(assignments, version, model, articles):
+    """Store (article_id, cluster) pairs together with the model that assigned them, in one transaction."""
+    with get_db().transaction(immediate=True) as conn:
+        conn.executemany('''
+            INSERT INTO news_clusters (article_id, cluster) VALUES (?, ?)
+            ON CONFLICT (article_id) DO UPDATE SET cluster = excluded.cluster WHERE cluster != excluded.cluster
+        ''', assignments)
+        conn.execute("DELETE FROM news_cluster_model WHERE version != ?", (version,))
+        conn.execute('''
+            INSERT OR REPLACE INTO news_cluster_model (version, model, articles, updated_at) VALUES (?, ?, ?, ?)
+        ''', (version, model, articles, time.time()))
+
+
+def clear_news_clusters():
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM news_clusters")
+        conn.execute("DELETE FROM news_cluster_sentiment")
+        conn.execute("DELETE FROM news_cluster_model")
+
+
+def get_news_cluster_sentiment(tickers=None):
+    """Articles and Bullish/Neutral/Bearish counts per cluster: the rollup totals, or with `tickers`
+    counted over the clustered articles about any of them."""
+    columns = '''cluster, articles, bullish, neutral, bearish, bullish - bearish AS combined_score,
+        compound_sum / max(articles, 1) AS mean_compound'''
+    if not tickers:
+        return pd.read_sql_query(f'''
+            SELECT {columns} FROM news_cluster_sentiment WHERE articles > 0 ORDER BY cluster
+        ''', get_db().connection())
+    tickers = list(tickers)
+    return pd.read_sql_query(f'''
+        SELECT {columns} FROM (
+            SELECT c.cluster, count(*) AS articles, sum(a.sentiment IS 'Bullish') AS bullish,
+                   sum(a.sentiment IS 'Neutral') AS neutral, sum(a.sentiment IS 'Bearish') AS bearish,
+                   total(a.compound) AS compound_sum
+            FROM news_clusters c JOIN news_articles a ON a.id = c.article_id
+            WHERE EXISTS (SELECT 1 FROM news_tickers t WHERE t.ticker IN ({', '.join('?' * len(tickers))})
+                          AND t.link_hash = a.link_hash)
+            GROUP BY c.cluster
+        ) ORDER BY cluster
+    ''', get_db().connection(), params=tickers)
+
+
+def get_cluster_texts(cluster, limit):
+    """Titles and descriptions of the `limit` newest articles in `cluster`."""
+    return pd.read_sql_query('''
+        SELECT a.title, a.description FROM news_clusters c JOIN news_articles a ON a.id = c.article_id
+        WHERE c.cluster = ? ORDER BY c.article_id DESC LIMIT ?
+    ''', get_db().connection(), params=(cluster, limit))
+
+
+SENTIMENT_DAILY_COLUMNS = ["ticker", "day", "bullish", "neutral", "bearish", "articles", "combined_score",
+                           "mean_compound"]
+
+
+def _sentiment_daily_filters(tickers, first_day, last_day):
+    clauses, params = [], []
+    if tickers:
+        tickers = list(tickers)
+        clauses.append(f"ticker IN ({', '.join('?' * len(tickers))})")
+        params.extend(tickers)
+    if first_day is not None:
+        clauses.append("day >= ?")
+        params.append(first_day)
+    if last_day is not None:
+        clauses.append("day <= ?")
+        params.append(last_day)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def get_sentiment_daily(tickers=None, start=None, end=None, window_days=None):
+    """Daily sentiment rollups per ticker for days in [start, end].
+
+    combined_score is bullish - bearish. With `window_days`, combined_window and articles_window hold
+    the sums over the trailing `window_days` calendar days (days before `start` included).
+    """
+    start = _as_db_date(start) if start is not None else None
+    end = _as_db_date(end) if end is not None else None
+    first_day = start
+    if window_days and start is not None:
+        first_day = (pd.Timestamp(start) - pd.Timedelta(days=int(window_days) - 1)).strftime("%Y-%m-%d")
+    where, params = _sentiment_daily_filters(tickers, first_day, end)
+
+    columns = '''ticker, day, bullish, neutral, bearish, bullish + neutral + bearish AS articles,
+        bullish - bearish AS combined_score, compound_sum / max(bullish + neutral + bearish, 1) AS mean_compound'''
+    if window_days:
+        window = (f"OVER (PARTITION BY ticker ORDER BY julianday(day) "
+                  f"RANGE BETWEEN {int(window_days) - 1} PRECEDING AND CURRENT ROW)")
+        columns += f''',
+        sum(bullish - bearish) {window} AS combined_window,
+        sum(bullish + neutral + bearish) {window} AS articles_window'''
+
+    sql = f"SELECT {columns} FROM sentiment_daily{where}"
+    if first_day != start:
+        sql = f"SELECT * FROM ({sql}) WHERE day >= ?"
+        params.append(start)
+    return pd.read_sql_query(sql + " ORDER BY ticker, day", get_db().connection(), params=params)
+
+
+def get_sentiment_summary(tickers=None, start=None, end=None):
+    """Per-ticker totals of the daily rollups for days in [start, end]."""
+    where, params = _sentiment_daily_filters(tickers, _as_db_date(start) if start is not None else None,
+                                             _as_db_date(end) if end is not None else None)
+    return pd.read_sql_query(f'''
+        SELECT ticker, sum(bullish) AS bullish, sum(neutral) AS neutral, sum(bearish) AS bearish,
+               sum(bullish + neutral + bearish) AS articles, sum(bullish - bearish) AS combined_score,
+               sum(compound_sum) / max(sum(bullish + neutral + bearish), 1) AS mean_compound
+        FROM sentiment_daily{where}
+        GROUP BY ticker ORDER BY ticker
+    ''', get_db().connection(), params=params)
+
+
+def get_ingest_runs(jobs=None):
+    """Return job -> last-run record (dict with the ingest_runs columns)."""
+    sql = "SELECT * FROM ingest_runs"
+    params = []
+    if jobs is not None:
+        jobs = list(jobs)
+        if not jobs:
+            return {}
+        sql += f" WHERE job IN ({', '.join('?' * len(jobs))})"
+        params = jobs
+    cursor = get_db().execute(sql, params)
+    columns = [column[0] for column in cursor.description]
+    return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+
+def record_ingest_run(job, started, finished, ok, detail=None):
+    with get_db().transaction() as conn:
+        conn.execute('''
+            INSERT INTO ingest_runs (job, status, last_started, last_finished, last_success, runs, failures, detail)
+            VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+            ON CONFLICT (job) DO UPDATE SET
+                status = excluded.status,
+                last_started = excluded.last_started,
+                last_finished = excluded.last_finished,
+                last_success = coalesce(excluded.last_success, last_success),
+                runs = runs + 1,
+                failures = failures + excluded.failures,
+                detail = excluded.detail
+        ''', (job, "ok" if ok else "error", started, finished, finished if ok else None, 0 if ok else 1, detail))
+
+
+# Function to take (or extend) a lease for `seconds`; False while another owner holds an unexpired one
+def acquire_lease(name, owner, seconds):
+    now = time.time()
+    with get_db().transaction() as conn:
+        return conn.execute('''
+            INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires
+            WHERE owner = excluded.owner OR expires < ?
+        ''', (name, owner, now + seconds, now)).rowcount == 1
+
+
+def release_lease(name, owner):
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM leases WHERE name=? AND owner=?", (name, owner))
+
+
+COMPANY_METADATA_COLUMNS = ["ticker", "name", "exchange", "currency", "sector", "fetched_at"]
+
+
+def get_company_metadata(tickers):
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+    rows = get_db().execute(f'''
+        SELECT {", ".join(COMPANY_METADATA_COLUMNS)} FROM company_metadata
+        WHERE ticker IN ({", ".join("?" * len(tickers))})
+    ''', tickers).fetchall()
+    return {row[0]: dict(zip(COMPANY_METADATA_COLUMNS, row)) for row in rows}
+
+
+def save_company_metadata(records):
+    with get_db().transaction() as conn:
+        conn.executemany(f'''
+            INSERT OR REPLACE INTO company_metadata ({", ".join(COMPANY_METADATA_COLUMNS)})
+            VALUES ({", ".join("?" * len(COMPANY_METADATA_COLUMNS))})
+        ''', [tuple(record.get(col) for col in COMPANY_METADATA_COLUMNS) for record in records])
 
 
 def save_sentiment_to_db(ticker, sentiment, sentiment_score):
-    conn = sqlite3.connect(DATABSE_PATH)
-    cursor = conn.cursor()
+    save_sentiment_rows(ticker, [(sentiment, sentiment_score)])
 
-    cursor.execute('''
-        INSERT INTO sentiment_analysis (ticker, sentiment, sentiment_score, date)
-        VALUES (?, ?, ?, date('now'))
-    ''', (ticker, sentiment, sentiment_score))
 
-    conn.commit()
-    conn.close()
+# Function to save a whole sentiment snapshot of a ticker in one statement
+def save_sentiment_rows(ticker, rows):
+    with get_db().transaction() as conn:
+        conn.executemany('''
+            INSERT INTO sentiment_analysis (ticker, sentiment, sentiment_score, date)
+            VALUES (?, ?, ?, date('now'))
+        ''', [(ticker, sentiment, int(sentiment_score)) for sentiment, sentiment_score in rows])
 
 
 def get_sentiment_data_from_db():
-    conn = sqlite3.connect(DATABSE_PATH)
-    df = pd.read_sql_query(f"SELECT * FROM sentiment_analysis ORDER BY id", conn)
-    conn.close()
-    return df
+    return pd.read_sql_query("SELECT * FROM sentiment_analysis ORDER BY id", get_db().connection())
 
 
 def delete_sentiment_data():
-    conn = sqlite3.connect(DATABSE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM sentiment_analysis")
-    conn.commit()
-    conn.close()
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM sentiment_analysis")
 
 
 def clean_sentiment_data():
-    conn = sqlite3.connect(DATABSE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM sentiment_analysis WHERE ticker = ''")
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM sentiment_analysis WHERE ticker = ''")
+
+
+def prune_sentiment_data(max_age_days):
+    with get_db().transaction() as conn:
+        return conn.execute("DELETE FROM sentiment_analysis WHERE date < date('now', ?)",
+                            (f"-{int(max_age_days)} days",)).rowcount
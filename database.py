@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+# Pragmas applied to every connection: WAL lets readers keep going while a writer commits,
+# NORMAL sync is durable enough under WAL, and a bigger page cache keeps the indexes hot
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative value = size in KiB
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+# Number of prepared statements sqlite3 keeps per connection
+STATEMENT_CACHE_SIZE = 256
+
+BUSY_TIMEOUT_SECONDS = 30
+
+
+def _run_schema_statement(conn, statement):
+    if callable(statement):
+        statement(conn)
+    else:
+        conn.executescript(statement)
+
+
+# Function to list the column names of an existing table
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+@contextmanager
+def immediate_transaction(conn):
+    """Hold the write lock across the enclosed statements; they are committed together or rolled back.
+
+    For schema callables, which get the bare connection while the schema is being created
+    (Database.transaction would try to create it again).
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+
+
+class Database:
+    """Long-lived SQLite access: one connection per thread, schema created lazily on first use.
+
+    Connections run in autocommit mode; group statements with `transaction()` so that
+    they are committed (or rolled back) together.
+    """
+
+    def __init__(self, path, schema=(), pragmas=None, cached_statements=STATEMENT_CACHE_SIZE):
+        self.path = path
+        self.pragmas = dict(CONNECTION_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self._schema = list(schema)
+        self._schema_ready = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = {}  # thread -> its connection
+
+    def add_schema(self, *statements):
+        """Register extra DDL; it runs (idempotently) on the next connection or immediately if already initialized.
+
+        A statement is either an SQL script or a callable taking the connection (for migrations
+        that need to inspect the existing tables first).
+        """
+        with self._lock:
+            self._schema.extend(statements)
+            ready = self._schema_ready
+        if ready:
+            conn = self.connection()
+            for statement in statements:
+                _run_schema_statement(conn, statement)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _init_schema(self, conn):
+        with self._lock:
+            if self._schema_ready:
+                return
+            for statement in self._schema:
+                _run_schema_statement(conn, statement)
+            self._schema_ready = True
+
+    def connection(self):
+        """Return this thread's connection, opening it (and creating the schema) on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._connections[threading.current_thread()] = conn
+            self._close_finished()
+        if not self._schema_ready:
+            self._init_schema(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Run the enclosed statements in one transaction; nested scopes join the outer one."""
+        conn = self.connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        # IMMEDIATE takes the write lock up front so two writers can't deadlock on upgrade
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+    def _close_finished(self):
+        # Pool threads come and go; their connections would otherwise stay open until close()
+        with self._lock:
+            finished = [thread for thread in self._connections if not thread.is_alive()]
+            connections = [self._connections.pop(thread) for thread in finished]
+        for conn in connections:
+            conn.close()
+
+    def release(self):
+        """Close this thread's connection (and those of finished threads), e.g. when a worker stops."""
+        with self._lock:
+            conn = self._connections.pop(threading.current_thread(), None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        self._close_finished()
+
+    def close(self):
+        """Close every connection handed out by this instance (all threads)."""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+
+# Points per trace sent to the browser; a chart is rarely wider than this many pixels
+DEFAULT_POINT_BUDGET = 2000
+
+# Each pyramid level merges this many bars of the level below
+PYRAMID_FACTOR = 4
+
+
+def _bucket_starts(n, n_buckets):
+    """Start offsets of `n_buckets` contiguous, near-equal buckets over n bars."""
+    return np.unique(np.linspace(0, n, n_buckets, endpoint=False).astype(np.int64))
+
+
+def _merge_bars(index, open_, high, low, close, volume, starts):
+    """OHLCV of the bars grouped at `starts`: first open, max high, min low, last close, summed volume."""
+    ends = np.append(starts[1:], len(open_)) - 1
+    volume = np.nan_to_num(volume)
+    return (index[starts], open_[starts], np.fmax.reduceat(high, starts), np.fmin.reduceat(low, starts),
+            close[ends], np.add.reduceat(volume, starts))
+
+
+def _as_frame(index, open_, high, low, close, volume):
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+                        index=index)
+
+
+def downsample_ohlc(data, budget=DEFAULT_POINT_BUDGET):
+    """Merge consecutive bars of an OHLCV frame so at most `budget` bars remain.
+
+    Each merged bar is stamped with the time of its first bar. Frames already within budget are returned as is.
+    """
+    n = len(data)
+    if n <= budget:
+        return data
+    columns = [data[col].to_numpy(dtype=np.float64) for col in ("Open", "High", "Low", "Close", "Volume")]
+    return _as_frame(*_merge_bars(data.index, *columns, _bucket_starts(n, budget)))
+
+
+# Buckets narrower than this are scanned with plain floats, where numpy's per-call overhead would dominate
+LTTB_SCALAR_WIDTH = 24
+
+
+def lttb(x, y, budget=DEFAULT_POINT_BUDGET):
+    """Largest-Triangle-Three-Buckets: positions of the `budget` points that best keep the shape of y(x).
+
+    NaN points are never picked; first and last valid points are always kept.
+    """
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n <= budget or budget < 3:
+        return valid
+    # Translating and scaling x or y scales every triangle alike, and keeps the products in the areas small
+    x = np.asarray(x, dtype=np.float64)[valid]
+    y = np.asarray(y, dtype=np.float64)[valid]
+    x = (x - x[0]) * (n / (x[-1] - x[0] or 1.0))
+    y = y - y[0]
+
+    # Inner points fall in budget - 2 buckets; the average of the next bucket anchors each triangle
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1])
+
+    picked = np.empty(budget, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    bounds = edges.tolist()
+    if n / budget >= LTTB_SCALAR_WIDTH:
+        for bucket in range(budget - 2):
+            lo, hi = bounds[bucket], bounds[bucket + 1]
+            ax, ay, mx, my = x[previous], y[previous], mean_x[bucket + 1], mean_y[bucket + 1]
+            # Twice the triangle area; the constant factor doesn't change the argmax
+            area = np.abs((ax - mx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (my - ay))
+            previous = picked[bucket + 1] = lo + int(area.argmax())
+        return valid[picked]
+
+    # Twice the area of (anchor a, point j, next mean m) is |ax * p_j + ay * q_j + r_j| with
+    # p = y_j - my, q = mx - x_j, r = x_j * my - mx * y_j, none of which depends on the anchor
+    next_x = np.concatenate(([0.0], np.repeat(mean_x[1:], counts), [0.0]))
+    next_y = np.concatenate(([0.0], np.repeat(mean_y[1:], counts), [0.0]))
+    p, q, r = (y - next_y).tolist(), (next_x - x).tolist(), (x * next_y - next_x * y).tolist()
+    xs, ys = x.tolist(), y.tolist()
+    for bucket in range(budget - 2):
+        ax, ay = xs[previous], ys[previous]
+        best, best_area = -1, -1.0
+        for j in range(bounds[bucket], bounds[bucket + 1]):
+            area = abs(ax * p[j] + ay * q[j] + r[j])
+            if area > best_area:
+                best, best_area = j, area
+        previous = picked[bucket + 1] = best
+    return valid[picked]
+
+
+def downsample_line(series, budget=DEFAULT_POINT_BUDGET):
+    """LTTB-reduce a time-indexed series (e.g. an indicator overlay) to at most `budget` points."""
+    if len(series) <= budget:
+        return series
+    x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else series.index.to_numpy()
+    return series.iloc[lttb(x, series.to_numpy(dtype=np.float64), budget)]
+
+
+class OHLCPyramid:
+    """OHLCV bars at several resolutions: level 0 is the data, level k merges PYRAMID_FACTOR**k bars.
+
+    Built once per series (each level from the one below, which is exact for OHLCV), after which
+    any zoom range is answered by slicing the finest level that fits the point budget.
+    """
+
+    def __init__(self, data, factor=PYRAMID_FACTOR, min_bars=DEFAULT_POINT_BUDGET // 4):
+        self.factor = factor
+        self.levels = [data[["Open", "High", "Low", "Close", "Volume"]]]
+        columns = [data[col].to_numpy(dtype=np.float64) for col in ("Open", "High", "Low", "Close", "Volume")]
+        index = data.index
+        while len(index) > min_bars * factor:
+            index, *columns = _merge_bars(index, *columns, np.arange(0, len(index), factor))
+            self.levels.append(_as_frame(index, *columns))
+
+    def view(self, start=None, end=None, budget=DEFAULT_POINT_BUDGET):
+        """Bars in [start, end] at the finest resolution with at most `budget` bars (coarser levels may cover
+        a few bars beyond the range at its edges)."""
+        for depth, level in enumerate(self.levels):
+            index = level.index
+            lo = 0 if start is None else index.searchsorted(start)
+            if depth and lo > 0 and (lo == len(index) or index[lo] > start):
+                lo -= 1  # the merged bar that started before `start` also covers it
+            hi = len(index) if end is None else index.searchsorted(end, side="right")
+            if hi - lo <= budget:
+                return level.iloc[lo:hi]
+        return downsample_ohlc(level.iloc[lo:hi], budget)
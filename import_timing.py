@@ -0,0 +1,80 @@
+import builtins
+import sys
+import threading
+import time
+
+
+# Module -> (self seconds, cumulative seconds, nesting depth) of every module first imported while installed
+_timings = {}
+_state = threading.local()
+_original_import = None
+_reported = False
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Read once: uninstall() may reset it from another thread while this import runs. uninstall()
+    # restores builtins.__import__ first, so that is the original import once this is None
+    original = _original_import or builtins.__import__
+    if level or name in sys.modules:
+        return original(name, globals, locals, fromlist, level)
+
+    # Per thread: the time spent in nested imports, one entry per import in progress
+    stack = _state.__dict__.setdefault("stack", [])
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return original(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        if name in sys.modules and name not in _timings:
+            _timings[name] = (elapsed - nested, elapsed, len(stack))
+
+
+def install():
+    """Time every module imported from now on (the first time only; modules already loaded cost nothing).
+
+    Works like `python -X importtime`, but inside the running process, so imports deferred to first
+    use show up too. Calling it again is a no-op.
+    """
+    global _original_import
+    if _original_import is None:
+        _original_import = builtins.__import__
+        builtins.__import__ = _timed_import
+
+
+def uninstall():
+    global _original_import
+    if _original_import is not None:
+        builtins.__import__ = _original_import
+        _original_import = None
+
+
+def report(nested=False):
+    """Import costs recorded so far, most expensive first: module, self_ms, cumulative_ms and depth.
+
+    Only the imports made directly by the timed code unless `nested`; their cumulative time
+    includes everything they imported in turn.
+    """
+    import pandas as pd  # not at the top: this module is imported before anything it should time
+
+    rows = [(name, self_seconds * 1000, cumulative * 1000, depth)
+            for name, (self_seconds, cumulative, depth) in _timings.items() if nested or depth == 0]
+    frame = pd.DataFrame(rows, columns=["module", "self_ms", "cumulative_ms", "depth"])
+    return frame.sort_values("cumulative_ms", ascending=False, ignore_index=True)
+
+
+def format_report(limit=10):
+    imports = report()
+    top = ", ".join(f"{row.module} {row.cumulative_ms:.0f} ms" for row in imports.head(limit).itertuples())
+    return f"imports: {imports['cumulative_ms'].sum():,.0f} ms in {len(imports)} modules ({top})"
+
+
+def log_startup_report(stream=None):
+    """Write format_report() once per process, e.g. after the first run of the app's imports."""
+    global _reported
+    if not _reported:
+        _reported = True
+        print(format_report(), file=stream or sys.stderr)
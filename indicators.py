@@ -0,0 +1,460 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import crud
+
+
+# Rolling sums restart their cumulative sum every ROLLING_BLOCK bars, so rounding error stays at
+# the level of one block (~1e-9 relative on Bollinger widths) however long the history is
+ROLLING_BLOCK = 1 << 11
+
+EWM_BLOCK = 1 << 16
+
+DEFAULT_BB_PERIOD = 20
+DEFAULT_BB_WIDTH = 2.0
+
+
+def _columns(spec):
+    name, params = spec[0], spec[1:]
+    if name in ("sma", "ema", "rsi", "atr"):
+        return [f"{name.upper()}_{params[0]}"]
+    if name == "bollinger":
+        period = params[0] if params else DEFAULT_BB_PERIOD
+        suffix = "" if period == DEFAULT_BB_PERIOD else f"_{period}"
+        return [f"BB_Middle{suffix}", f"BB_Upper{suffix}", f"BB_Lower{suffix}"]
+    if name == "vwap":
+        return ["VWAP"]
+    raise ValueError(f"Unknown indicator: {name}")
+
+
+def _rolling_moments(x, window, out_mean, out_std=None):
+    """Rolling mean (and sample std) from blockwise cumulative sums; windows containing NaN give NaN."""
+    n = len(x)
+    out_mean[:min(window - 1, n)] = np.nan
+    if out_std is not None:
+        out_std[:min(window - 1, n)] = np.nan
+    if window > n:
+        return
+
+    nan = np.isnan(x)
+    has_nan = nan.any()
+    for start in range(window - 1, n, ROLLING_BLOCK):
+        stop = min(n, start + ROLLING_BLOCK)
+        segment = x[start - window + 1:stop]
+        # Shifting by a value from the block leaves the variance unchanged but keeps the sums small
+        shift = segment[-1]
+        values = segment - shift
+        if has_nan:
+            missing = nan[start - window + 1:stop]
+            shift = 0.0 if np.isnan(shift) else shift
+            values = np.where(missing, 0.0, segment - shift)
+
+        sums = _window_sums(values, window)
+        mean = sums / window
+        np.add(mean, shift, out=out_mean[start:stop])
+
+        if out_std is not None:
+            squares = _window_sums(values * values, window)
+            if window > 1:
+                variance = (squares - sums * mean) / (window - 1)
+                np.sqrt(np.maximum(variance, 0.0, out=variance), out=out_std[start:stop])
+            else:
+                out_std[start:stop] = np.nan
+
+        if has_nan:
+            in_nan_window = _window_sums(missing.astype(np.float64), window) > 0
+            out_mean[start:stop][in_nan_window] = np.nan
+            if out_std is not None:
+                out_std[start:stop][in_nan_window] = np.nan
+
+
+def _window_sums(values, window):
+    cumulative = np.cumsum(values)
+    sums = cumulative[window - 1:].copy()
+    sums[1:] -= cumulative[:-window]
+    return sums
+
+
+def _ewm(x, alpha, out):
+    """Recursive mean y[t] = alpha * x[t] + (1 - alpha) * y[t-1] (pandas ewm(adjust=False)), vectorized.
+
+    Inside a block y[t] = d^t * (y[-1] + alpha * sum(x[k] / d^k)), with d = 1 - alpha; the block
+    length is capped so d^-t stays far from overflowing.
+    """
+    n = len(x)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        out[:] = x
+        return out
+    block = n if decay == 1.0 else max(1, min(EWM_BLOCK, int(300.0 / -np.log(decay))))
+
+    previous = x[0]
+    out[0] = previous
+    for start in range(1, n, block):
+        stop = min(n, start + block)
+        powers = decay ** np.arange(1, stop - start + 1)
+        out[start:stop] = powers * (previous + alpha * np.cumsum(x[start:stop] / powers))
+        previous = out[stop - 1]
+    return out
+
+
+def _forward_filled(x):
+    missing = np.isnan(x)
+    if not missing.any():
+        return x
+    index = np.where(missing, 0, np.arange(len(x)))
+    np.maximum.accumulate(index, out=index)
+    return x[index]
+
+
+def _first_valid(x):
+    valid = np.flatnonzero(~np.isnan(x))
+    return valid[0] if len(valid) else len(x)
+
+
+def _ema(close, period, out):
+    first = _first_valid(close)
+    out[:first] = np.nan
+    _ewm(_forward_filled(close[first:]), 2.0 / (period + 1), out[first:])
+
+
+def _wilder(values, period, out):
+    # Wilder smoothing = ewm(alpha=1/period, adjust=False, min_periods=period)
+    _ewm(values, 1.0 / period, out)
+    out[:period - 1] = np.nan
+
+
+def _rsi(close, period, out):
+    n = len(close)
+    out[:] = np.nan
+    if n < 2:
+        return
+    delta = np.diff(_forward_filled(close))
+    gains = np.empty(n - 1)
+    losses = np.empty(n - 1)
+    _wilder(np.maximum(delta, 0.0), period, gains)
+    _wilder(np.maximum(-delta, 0.0), period, losses)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = 100.0 - 100.0 / (1.0 + gains / losses)
+
+
+def _atr(high, low, close, period, out):
+    previous_close = np.empty_like(close)
+    previous_close[:1] = np.nan
+    previous_close[1:] = close[:-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    _wilder(true_range, period, out)
+
+
+def _vwap(high, low, close, volume, out):
+    # Cumulative typical price * volume over cumulative volume, built with in-place ops on one temporary
+    weighted = np.add(high, low)
+    weighted += close
+    weighted *= volume
+    weighted /= 3.0
+    np.nan_to_num(weighted, copy=False)
+    np.cumsum(weighted, out=weighted)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(weighted, np.cumsum(np.nan_to_num(volume)), out=out)
+
+
+def _array(data, column):
+    return np.ascontiguousarray(data[column].to_numpy(dtype=np.float64))
+
+
+def compute_indicators(data, specs):
+    """Compute indicators over an OHLCV frame in one pass and return them as a new DataFrame.
+
+    `specs` is a list of tuples: ("sma", period), ("ema", period), ("bollinger", period, width),
+    ("rsi", period), ("atr", period), ("vwap",). Every result is written into one preallocated
+    float64 block; rolling moments are shared between SMA and Bollinger specs of the same period.
+    """
+    specs = [tuple(spec) for spec in specs]
+    columns = [column for spec in specs for column in _columns(spec)]
+    n = len(data)
+    block = np.empty((n, len(columns)), dtype=np.float64, order="F")
+
+    close = _array(data, "Close")
+    arrays = {"Close": close}
+
+    def column(name):
+        if name not in arrays:
+            arrays[name] = _array(data, name)
+        return arrays[name]
+
+    # (window) -> (mean, std) already computed, so SMA_20 and Bollinger(20) cost one pass
+    moments = {}
+
+    def rolling(window, with_std):
+        cached = moments.get(window)
+        if cached is not None and (cached[1] is not None or not with_std):
+            return cached
+        mean, std = np.empty(n), np.empty(n) if with_std else None
+        _rolling_moments(close, window, mean, std)
+        moments[window] = (mean, std)
+        return mean, std
+
+    # Bollinger specs first so SMAs of the same period reuse their moments
+    needs_std = {spec[1] if len(spec) > 1 else DEFAULT_BB_PERIOD for spec in specs if spec[0] == "bollinger"}
+
+    position = 0
+    for spec in specs:
+        name, params = spec[0], spec[1:]
+        width = len(_columns(spec))
+        out = block[:, position:position + width]
+
+        if name == "sma":
+            period = params[0]
+            if period <= 0:
+                out[:, 0] = np.nan
+            else:
+                out[:, 0] = rolling(period, period in needs_std)[0]
+        elif name == "ema":
+            _ema(close, params[0], out[:, 0])
+        elif name == "bollinger":
+            period = params[0] if params else DEFAULT_BB_PERIOD
+            k = params[1] if len(params) > 1 else DEFAULT_BB_WIDTH
+            mean, std = rolling(period, True)
+            out[:, 0] = mean
+            np.multiply(std, k, out=out[:, 1])
+            np.subtract(mean, out[:, 1], out=out[:, 2])
+            out[:, 1] += mean
+        elif name == "rsi":
+            _rsi(close, params[0], out[:, 0])
+        elif name == "atr":
+            _atr(column("High"), column("Low"), close, params[0], out[:, 0])
+        elif name == "vwap":
+            _vwap(column("High"), column("Low"), close, column("Volume"), out[:, 0])
+
+        position += width
+
+    return pd.DataFrame(block, index=data.index, columns=columns, copy=False)
+
+
+def with_indicators(data, specs):
+    """Return a copy of `data` with the requested indicator columns appended (the input is not modified)."""
+    if not specs:
+        return data.copy()
+    indicators = compute_indicators(data, specs)
+    return pd.concat([data.drop(columns=indicators.columns, errors="ignore"), indicators], axis=1)
+
+
+def _seeded_ewm(seed, values, alpha):
+    # Continue an ewm whose last output was `seed` (None = start fresh from values[0])
+    if seed is None:
+        return _ewm(values, alpha, np.empty(len(values)))
+    result = _ewm(np.concatenate(([seed], values)), alpha, np.empty(len(values) + 1))
+    return result[1:]
+
+
+def _last(values):
+    return None if len(values) == 0 else float(values[-1])
+
+
+class IncrementalIndicators:
+    """Indicator set that carries its rolling-window state, so appending k bars costs O(k).
+
+    `update()` only processes bars newer than the last one seen and returns their indicator
+    values, identical (up to rounding) to running `compute_indicators` over the full history that
+    starts at `first_index`. `to_state()` / `from_state()` round-trip through plain JSON-compatible dicts.
+    """
+
+    def __init__(self, specs):
+        self.specs = [tuple(spec) for spec in specs]
+        self.columns = [column for spec in self.specs for column in _columns(spec)]
+        self.first_index = None
+        self.last_index = None
+        self.states = [{} for _ in self.specs]
+
+    def update(self, data):
+        if self.last_index is not None:
+            data = data.loc[data.index > self.last_index]
+        n = len(data)
+        block = np.empty((n, len(self.columns)), dtype=np.float64, order="F")
+        if n == 0:
+            return pd.DataFrame(block, index=data.index, columns=self.columns)
+
+        arrays = {"Close": _array(data, "Close")}
+
+        def column(name):
+            if name not in arrays:
+                arrays[name] = _array(data, name)
+            return arrays[name]
+
+        position = 0
+        for spec, state in zip(self.specs, self.states):
+            width = len(_columns(spec))
+            out = block[:, position:position + width]
+            _STEPS[spec[0]](state, spec[1:], column, out)
+            position += width
+
+        if self.first_index is None:
+            self.first_index = data.index[0]
+        self.last_index = data.index[-1]
+        return pd.DataFrame(block, index=data.index, columns=self.columns, copy=False)
+
+    def to_state(self):
+        return {
+            "specs": [list(spec) for spec in self.specs],
+            "first_index": None if self.first_index is None else pd.Timestamp(self.first_index).isoformat(),
+            "last_index": None if self.last_index is None else pd.Timestamp(self.last_index).isoformat(),
+            "states": self.states,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        indicators = cls(state["specs"])
+        if state.get("first_index") is not None:
+            indicators.first_index = pd.Timestamp(state["first_index"])
+        if state["last_index"] is not None:
+            indicators.last_index = pd.Timestamp(state["last_index"])
+        indicators.states = [dict(spec_state) for spec_state in state["states"]]
+        return indicators
+
+
+def _step_rolling(state, period, close, out_mean, out_std=None):
+    tail = np.asarray(state.get("tail", []), dtype=np.float64)
+    values = np.concatenate((tail, close))
+    mean = np.empty(len(values))
+    std = np.empty(len(values)) if out_std is not None else None
+    _rolling_moments(values, period, mean, std)
+    out_mean[:] = mean[len(tail):]
+    if out_std is not None:
+        out_std[:] = std[len(tail):]
+    state["tail"] = values[-(period - 1):].tolist() if period > 1 else []
+
+
+def _step_sma(state, params, column, out):
+    period = params[0]
+    if period <= 0:
+        out[:, 0] = np.nan
+        return
+    _step_rolling(state, period, column("Close"), out[:, 0])
+
+
+def _step_bollinger(state, params, column, out):
+    period = params[0] if params else DEFAULT_BB_PERIOD
+    k = params[1] if len(params) > 1 else DEFAULT_BB_WIDTH
+    std = np.empty(len(out))
+    _step_rolling(state, period, column("Close"), out[:, 0], std)
+    np.multiply(std, k, out=out[:, 1])
+    np.subtract(out[:, 0], out[:, 1], out=out[:, 2])
+    out[:, 1] += out[:, 0]
+
+
+def _step_ema(state, params, column, out):
+    close = column("Close")
+    last, last_close = state.get("last"), state.get("last_close")
+    if last is None:
+        _ema(close, params[0], out[:, 0])
+        filled = _forward_filled(close)
+    else:
+        filled = _forward_filled(np.concatenate(([last_close], close)))[1:]
+        out[:, 0] = _seeded_ewm(last, filled, 2.0 / (params[0] + 1))
+    if not np.isnan(out[-1, 0]):
+        state["last"], state["last_close"] = float(out[-1, 0]), _last(filled)
+
+
+def _step_rsi(state, params, column, out):
+    period = params[0]
+    close = column("Close")
+    last_close = state.get("last_close")
+    count = state.get("count", 0)
+
+    if last_close is None:
+        filled = _forward_filled(close)
+        deltas = np.diff(filled)
+        out[0, 0] = np.nan
+        target = out[1:, 0]
+    else:
+        filled = _forward_filled(np.concatenate(([last_close], close)))
+        deltas = np.diff(filled)
+        filled = filled[1:]
+        target = out[:, 0]
+
+    if len(deltas):
+        alpha = 1.0 / period
+        gains = _seeded_ewm(state.get("gain"), np.maximum(deltas, 0.0), alpha)
+        losses = _seeded_ewm(state.get("loss"), np.maximum(-deltas, 0.0), alpha)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            target[:] = 100.0 - 100.0 / (1.0 + gains / losses)
+        # Same warm-up as ewm(min_periods=period): the first period - 1 deltas give NaN
+        warmup = max(0, period - 1 - count)
+        target[:warmup] = np.nan
+        state["gain"], state["loss"] = _last(gains), _last(losses)
+        state["count"] = count + len(deltas)
+    state["last_close"] = _last(filled)
+
+
+def _step_atr(state, params, column, out):
+    period = params[0]
+    high, low, close = column("High"), column("Low"), column("Close")
+    count = state.get("count", 0)
+    last_close = state.get("last_close")
+
+    previous_close = np.empty_like(close)
+    previous_close[:1] = np.nan if last_close is None else last_close
+    previous_close[1:] = close[:-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+    out[:, 0] = _seeded_ewm(state.get("atr"), true_range, 1.0 / period)
+    state["atr"] = float(out[-1, 0])
+    out[:max(0, period - 1 - count), 0] = np.nan
+    state["count"] = count + len(close)
+    state["last_close"] = float(close[-1])
+
+
+def _step_vwap(state, params, column, out):
+    weighted = np.add(column("High"), column("Low"))
+    weighted += column("Close")
+    weighted *= column("Volume")
+    weighted /= 3.0
+    np.nan_to_num(weighted, copy=False)
+    np.cumsum(weighted, out=weighted)
+    weighted += state.get("pv", 0.0)
+    volume = np.cumsum(np.nan_to_num(column("Volume"))) + state.get("volume", 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(weighted, volume, out=out[:, 0])
+    state["pv"], state["volume"] = float(weighted[-1]), float(volume[-1])
+
+
+_STEPS = {
+    "sma": _step_sma,
+    "ema": _step_ema,
+    "bollinger": _step_bollinger,
+    "rsi": _step_rsi,
+    "atr": _step_atr,
+    "vwap": _step_vwap,
+}
+
+
+def _specs_key(specs):
+    return json.dumps([list(spec) for spec in specs])
+
+
+def save_incremental(ticker, interval, indicators):
+    """Persist the state of an IncrementalIndicators next to the ticker's stored prices."""
+    state = indicators.to_state()
+    crud.save_indicator_state(ticker, interval, _specs_key(indicators.specs), state["last_index"], json.dumps(state))
+
+
+def load_incremental(ticker, interval, specs, index=None):
+    """Resume a persisted IncrementalIndicators, or start an empty one if none was saved.
+
+    With `index` (the bars about to be fed), a saved state is only resumed if it belongs to that
+    series: it started at the same first bar and its last bar is one of them.
+    """
+    saved = crud.get_indicator_state(ticker, interval, _specs_key(specs))
+    if saved is None:
+        return IncrementalIndicators(specs)
+    last_index, state = saved
+    if index is not None and (last_index is None or pd.Timestamp(last_index) not in index):
+        return IncrementalIndicators(specs)
+    indicators = IncrementalIndicators.from_state(json.loads(state))
+    if index is not None and (len(index) == 0 or indicators.first_index != index[0]):
+        return IncrementalIndicators(specs)
+    return indicators
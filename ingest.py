@@ -0,0 +1,297 @@
+import argparse
+import json
+import logging
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import crud
+import newsData
+import news_clusters
+import snapshot
+from company_metadata import CompanyMetadataCache
+from concurrency import RateLimiter, retry
+from market_data import fetch_tickers, throttled
+from news_pipeline import KNOWN_LINKS_LIMIT, run_news_pipeline
+from page_fetcher import HttpFetcher
+from price_cache import CACHEABLE_INTERVALS, PriceCache
+from providers import YahooPriceProvider
+
+
+MAX_WORKERS = 4
+
+# Attempts per job run (provider calls are additionally retried by ThrottledProvider)
+JOB_ATTEMPTS = 3
+JOB_RETRY_DELAY = 5.0
+
+# A failed job is due again after this long, or after its regular period if that is shorter
+FAILURE_RETRY_SECONDS = 300
+
+# News pages per second; price requests are limited per provider in market_data.PROVIDER_RATE_LIMITS
+NEWS_PAGES_PER_SECOND = 0.5
+
+POLL_SECONDS = 5.0
+
+# How far back Yahoo Finance serves intraday bars (1m bars only come 7 days per request)
+INTRADAY_LOOKBACK_DAYS = {"1m": 7, "2m": 59, "5m": 59, "15m": 59, "30m": 59, "60m": 729, "90m": 59, "1h": 729}
+
+YAHOO_BASE_URL = "https://finance.yahoo.com"
+
+
+@dataclass
+class Schedule:
+    """What to ingest and how often (periods in seconds). Loaded from a JSON file with the same keys.
+
+    With `snapshot_every` set, the memory-mapped price snapshot (snapshot.py) is refreshed on that period;
+    with `cluster_every`, newly stored articles are added to the news clusters (news_clusters.py).
+    """
+
+    tickers: list
+    intervals: list = field(default_factory=lambda: ["1d"])
+    lookback_days: int = 365
+    prices_every: float = 3600
+    news_every: float = 1800
+    metadata_every: float = 24 * 3600
+    general_news: bool = True
+    snapshot_every: float = None
+    cluster_every: float = None
+
+    def __post_init__(self):
+        self.tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in self.tickers if ticker.strip()))
+        unsupported = [interval for interval in self.intervals if interval not in CACHEABLE_INTERVALS]
+        if unsupported:
+            raise ValueError(f"Intervals {unsupported} can't be stored; use one of {sorted(CACHEABLE_INTERVALS)}")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as file:
+            return cls(**json.load(file))
+
+
+@dataclass
+class Job:
+    name: str
+    every: float
+    run: object  # callable returning a short detail string for the last-run table
+
+
+class IngestDaemon:
+    """Runs the jobs of a Schedule from a queue on `max_workers` threads, recording every run in ingest_runs.
+
+    A job is due when it never ran, when its period has passed since it last finished, or sooner
+    (FAILURE_RETRY_SECONDS) after a failure. `news_base_url` replaces the Yahoo Finance host in news
+    URLs, e.g. to scrape a local fixture server.
+    """
+
+    def __init__(self, schedule, provider=None, fetcher=None, news_base_url=None, max_workers=MAX_WORKERS,
+                 news_rate=NEWS_PAGES_PER_SECOND, attempts=JOB_ATTEMPTS, retry_delay=JOB_RETRY_DELAY):
+        self.schedule = schedule
+        self.provider = throttled(provider or YahooPriceProvider())
+        self.cache = PriceCache(self.provider)
+        self.metadata = CompanyMetadataCache(self.provider)
+        self.fetcher = fetcher
+        self.news_base_url = news_base_url
+        self.news_limiter = RateLimiter(news_rate)
+        self.max_workers = max_workers
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.jobs = self._build_jobs()
+
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._workers = []
+
+    def _build_jobs(self):
+        schedule = self.schedule
+        jobs = [Job("metadata", schedule.metadata_every, self._refresh_metadata)]
+        for interval in schedule.intervals:
+            for ticker in schedule.tickers:
+                jobs.append(Job(f"prices:{ticker}:{interval}", schedule.prices_every,
+                                lambda ticker=ticker, interval=interval: self._refresh_prices(ticker, interval)))
+        for ticker in schedule.tickers:
+            jobs.append(Job(f"news:{ticker}", schedule.news_every, lambda ticker=ticker: self._scrape_news(ticker)))
+        if schedule.general_news:
+            jobs.append(Job("news:general", schedule.news_every, lambda: self._scrape_news(None)))
+        if schedule.snapshot_every:
+            jobs.append(Job("snapshot", schedule.snapshot_every, lambda: f"{snapshot.refresh()} series rewritten"))
+        if schedule.cluster_every:
+            jobs.append(Job("clusters", schedule.cluster_every,
+                            lambda: f"{news_clusters.update_clusters()} articles clustered"))
+        return jobs
+
+    def _refresh_metadata(self):
+        return f"{len(self.metadata.get_many(self.schedule.tickers))} tickers"
+
+    def _refresh_prices(self, ticker, interval):
+        today = pd.Timestamp.today().normalize()
+        lookback_days = min(self.schedule.lookback_days, INTRADAY_LOOKBACK_DAYS.get(interval, self.schedule.lookback_days))
+        start = today - pd.Timedelta(days=lookback_days)
+        fetch = fetch_tickers([ticker], start, today + pd.Timedelta(days=1), interval, self.provider,
+                              cache=self.cache, metadata=self.metadata, max_workers=1)[ticker]
+        if fetch.data is None:
+            raise RuntimeError("; ".join(fetch.errors) or "no data")
+        return f"{len(fetch.data)} bars"
+
+    def _scrape_news(self, ticker):
+        fetcher = self.fetcher or newsData.get_page_fetcher()
+        known_links = crud.recent_news_links(ticker, KNOWN_LINKS_LIMIT)
+
+        def fetch_page(url):
+            if self.news_base_url:
+                url = url.replace(YAHOO_BASE_URL, self.news_base_url.rstrip("/"), 1)
+            self.news_limiter.acquire()
+            return fetcher.fetch(url, known_links=known_links)
+
+        run = run_news_pipeline(ticker, fetch_page=fetch_page)
+        return f"{len(run.articles)} new, {run.known} known"
+
+    def due_jobs(self, now=None):
+        now = time.time() if now is None else now
+        runs = crud.get_ingest_runs(job.name for job in self.jobs)
+        due = []
+        for job in self.jobs:
+            last = runs.get(job.name)
+            if last is None:
+                due.append(job)
+                continue
+            wait = job.every if last["status"] == "ok" else min(job.every, FAILURE_RETRY_SECONDS)
+            if now >= last["last_finished"] + wait:
+                due.append(job)
+        return due
+
+    def _execute(self, job):
+        started = time.time()
+        try:
+            detail, ok = retry(job.run, attempts=self.attempts, base_delay=self.retry_delay), True
+        except Exception as e:
+            detail, ok = f"{type(e).__name__}: {e}", False
+            logging.error(f"⚠️ Ingest job {job.name} failed: {detail}")
+        crud.record_ingest_run(job.name, started, time.time(), ok, detail)
+
+    def _work(self):
+        try:
+            while True:
+                job = self._queue.get()
+                try:
+                    if job is None:
+                        return
+                    self._execute(job)
+                finally:
+                    if job is not None:
+                        with self._lock:
+                            self._pending.discard(job.name)
+                    self._queue.task_done()
+        finally:
+            # Workers are restarted on every run_once; don't leave their connections behind
+            crud.get_db().release()
+
+    def _start_workers(self):
+        if not self._workers:
+            self._workers = [threading.Thread(target=self._work, name=f"ingest-{i}", daemon=True)
+                             for i in range(self.max_workers)]
+            for worker in self._workers:
+                worker.start()
+
+    def _stop_workers(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def enqueue(self, jobs):
+        """Queue jobs that aren't already queued or running; returns how many were added."""
+        added = 0
+        with self._lock:
+            for job in jobs:
+                if job.name not in self._pending:
+                    self._pending.add(job.name)
+                    self._queue.put(job)
+                    added += 1
+        return added
+
+    def run_once(self, force=False):
+        """Run every due job (every job with `force`) and wait for them; returns job -> last-run record."""
+        jobs = self.jobs if force else self.due_jobs()
+        self._start_workers()
+        try:
+            self.enqueue(jobs)
+            self._queue.join()
+        finally:
+            self._stop_workers()
+        return crud.get_ingest_runs(job.name for job in jobs)
+
+    def run_forever(self, poll_seconds=POLL_SECONDS):
+        """Keep queueing due jobs until stop() is called; running jobs are finished before returning."""
+        self._start_workers()
+        try:
+            while not self._stop.is_set():
+                added = self.enqueue(self.due_jobs())
+                if added:
+                    logging.info(f"Queued {added} ingest jobs")
+                self._stop.wait(poll_seconds)
+        finally:
+            self._stop_workers()
+
+    def stop(self):
+        self._stop.set()
+
+
+def print_runs(runs):
+    for job, run in sorted(runs.items()):
+        finished = pd.Timestamp(run["last_finished"], unit="s").strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{job:<24} {run['status']:<6} {finished}  runs {run['runs']:>4}  failures {run['failures']:>3}  "
+              f"{run['detail'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest prices and news for a watchlist on a schedule, without the dashboard.")
+    parser.add_argument("--watchlist", help="JSON schedule file (keys of ingest.Schedule)")
+    parser.add_argument("--tickers", help="comma-separated tickers (instead of or on top of --watchlist)")
+    parser.add_argument("--once", action="store_true", help="run the due jobs once and exit")
+    parser.add_argument("--force", action="store_true", help="with --once, run every job even if not due")
+    parser.add_argument("--status", action="store_true", help="print the last run of every job and exit")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--fetcher", choices=["selenium", "http"], default="selenium",
+                        help="news page backend (http: no browser, server-rendered articles only)")
+    parser.add_argument("--news-base-url", help=f"serve news pages from this host instead of {YAHOO_BASE_URL}")
+    parser.add_argument("--news-rate", type=float, default=NEWS_PAGES_PER_SECOND, help="news pages per second")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.status:
+        print_runs(crud.get_ingest_runs())
+        return
+
+    schedule = Schedule.from_file(args.watchlist) if args.watchlist else Schedule(tickers=[])
+    if args.tickers:
+        schedule = Schedule(**{**schedule.__dict__, "tickers": schedule.tickers + args.tickers.split(",")})
+    if not schedule.tickers and not schedule.general_news:
+        parser.error("nothing to ingest: give --tickers or a --watchlist")
+
+    fetcher = HttpFetcher() if args.fetcher == "http" else None
+    daemon = IngestDaemon(schedule, fetcher=fetcher, news_base_url=args.news_base_url,
+                          max_workers=args.workers, news_rate=args.news_rate)
+    try:
+        if args.once:
+            print_runs(daemon.run_once(force=args.force))
+        else:
+            signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+            try:
+                daemon.run_forever()
+            except KeyboardInterrupt:
+                daemon.stop()
+    finally:
+        if fetcher is not None:
+            fetcher.close()
+
+
+if __name__ == "__main__":
+    main()
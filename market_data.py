@@ -0,0 +1,137 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from concurrency import RateLimiter, SingleFlight, retry
+
+
+MAX_WORKERS = 8
+
+# Requests per second allowed against each provider (keyed by provider.name)
+PROVIDER_RATE_LIMITS = {"yahoo": 4.0}
+
+RETRY_ATTEMPTS = 3
+
+_rate_limiters = {}
+_single_flight = SingleFlight()
+
+
+@dataclass
+class TickerFetch:
+    ticker: str
+    name: str = None
+    data: object = None
+    errors: list = field(default_factory=list)
+    latency: dict = field(default_factory=dict)  # seconds per request kind ("history", "info")
+
+
+# Function to get the shared rate limiter of a provider (None when it isn't limited)
+def rate_limiter_for(provider):
+    rate = PROVIDER_RATE_LIMITS.get(provider.name)
+    if rate is None:
+        return None
+    limiter = _rate_limiters.get(provider.name)
+    if limiter is None:
+        limiter = _rate_limiters.setdefault(provider.name, RateLimiter(rate))
+    return limiter
+
+
+class ThrottledProvider:
+    """Wrap a provider so every call is rate limited (shared per provider name) and retried with backoff."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.name = provider.name
+        self.limiter = rate_limiter_for(provider)
+
+    def _call(self, method, *args):
+        def attempt():
+            if self.limiter is not None:
+                self.limiter.acquire()
+            return getattr(self.provider, method)(*args)
+
+        return retry(attempt, attempts=RETRY_ATTEMPTS)
+
+    def history(self, ticker, start, end, interval):
+        return self._call("history", ticker, start, end, interval)
+
+    def info(self, ticker):
+        return self._call("info", ticker)
+
+
+def throttled(provider):
+    return provider if isinstance(provider, ThrottledProvider) else ThrottledProvider(provider)
+
+
+def _timed(fetch, kind, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    except Exception as e:
+        fetch.errors.append(f"{kind}: {e}")
+        logging.error(f"⚠️ Error fetching {fetch.ticker} {kind}: {e}")
+        return None
+    finally:
+        fetch.latency[kind] = time.perf_counter() - start
+
+
+def _fetch_history(provider, cache, ticker, start, end, interval):
+    key = ("history", provider.name, ticker, str(start), str(end), interval)
+    fetch = cache.get if cache is not None else provider.history
+    return _single_flight.do(key, fetch, ticker, start, end, interval)
+
+
+def _fetch_name(provider, ticker):
+    info = _single_flight.do(("info", provider.name, ticker), provider.info, ticker)
+    return info.get("longName") or ticker
+
+
+def _fetch_names(metadata, tickers, results):
+    start = time.perf_counter()
+    names = {ticker: record["name"] for ticker, record in metadata.get_many(tickers).items()}
+    elapsed = time.perf_counter() - start
+    for fetch in results.values():
+        fetch.latency["info"] = elapsed
+    return names
+
+
+def fetch_tickers(tickers, start, end, interval, provider, cache=None, metadata=None, max_workers=MAX_WORKERS):
+    """Fetch price history and display name for every ticker concurrently.
+
+    History goes through `cache` (a PriceCache, which should be built on `throttled(provider)`)
+    when given, otherwise straight to the provider. Provider calls are rate limited and retried.
+    Names come from `metadata` (a CompanyMetadataCache) in one batch when given.
+    Duplicate requests (within this call or from other threads) share one in-flight request.
+    Returns a dict ticker -> TickerFetch, in the order of `tickers`.
+    """
+    provider = throttled(provider)
+    results = {ticker: TickerFetch(ticker) for ticker in tickers}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        names = pool.submit(_fetch_names, metadata, list(results), results) if metadata is not None else None
+
+        futures = []
+        for ticker, fetch in results.items():
+            futures.append((fetch, "data", pool.submit(
+                _timed, fetch, "history", _fetch_history, provider, cache, ticker, start, end, interval)))
+            if names is None:
+                futures.append((fetch, "name", pool.submit(
+                    _timed, fetch, "info", _fetch_name, provider, ticker)))
+
+        for fetch, attribute, future in futures:
+            setattr(fetch, attribute, future.result())
+
+        if names is not None:
+            for ticker, name in names.result().items():
+                results[ticker].name = name
+
+    for fetch in results.values():
+        if fetch.name is None:
+            fetch.name = fetch.ticker
+        if fetch.data is not None and fetch.data.empty:
+            fetch.errors.append(f"history: no data found for selected interval ({interval})")
+            logging.error(f"⚠️ Error fetching {fetch.ticker} data: no data found for selected interval ({interval})")
+            fetch.data = None
+
+    return results
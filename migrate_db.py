@@ -0,0 +1,61 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import crud
+from database import table_columns
+
+
+# Function to tell which stock_prices layout a database file has, and how many bars it holds
+def stock_prices_layout(path):
+    conn = sqlite3.connect(path)
+    try:
+        columns = table_columns(conn, "stock_prices")
+        bars = conn.execute("SELECT count(*) FROM stock_prices").fetchone()[0] if columns else 0
+    finally:
+        conn.close()
+    if not columns:
+        return "none", 0
+    return ("clustered" if "ts" in columns else "legacy"), bars
+
+
+def _size_mb(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix)) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bring a database up to the current schema ahead of time (the app and ingest.py also "
+                    "migrate on first use, which can take minutes on a large legacy stock_prices table).")
+    parser.add_argument("--db", default=crud.DATABASE_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--vacuum", action="store_true", help="rewrite the file afterwards to return freed pages")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+
+    layout, bars = stock_prices_layout(args.db)
+    print(f"{args.db}: stock_prices layout {layout}, {bars:,} bars, {_size_mb(args.db):,.1f} MB")
+
+    start = time.perf_counter()
+    db = crud.configure(args.db)
+    db.connection()  # runs the pending schema migrations
+    migrated = time.perf_counter() - start
+
+    layout, migrated_bars = stock_prices_layout(args.db)
+    print(f"migrated in {migrated:.1f} s: stock_prices layout {layout}, {migrated_bars:,} bars")
+    if migrated_bars != bars:
+        print(f"⚠️ {bars - migrated_bars:,} bars were not carried over")
+
+    if args.vacuum:
+        start = time.perf_counter()
+        db.execute("VACUUM")
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"vacuumed in {time.perf_counter() - start:.1f} s")
+    db.close()
+    print(f"{_size_mb(args.db):,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,102 @@
-import requests
-import time
+import atexit
+import hashlib
+import logging
+import threading
 import pandas as pd
 import sys
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-
-# Path to ChromeDriver
-CHROMEDRIVER_PATH = "C:/Users/anboicu/OneDrive - ENDAVA/Desktop/chromedriver-win64/chromedriver-win64/chromedriver.exe"
-
-# Function to scroll down the page and load content
-def load_full_page(url, scroll_times=5, wait_time=2):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920x1080")
-
-    service = Service(CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+from bs4 import BeautifulSoup, SoupStrainer
 
-    try:
-        driver.get(url)
-        time.sleep(3)
+from page_fetcher import SeleniumFetcher, fetch_many
 
-        # Bypass cookie popup if it appears
-        try:
-            cookie_button = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@id="consent-page"]/div/div/div/form/div[2]/div[2]/button[2]'))
-            )
-            cookie_button.click()
-        except:
-            pass  # No cookie popup
+TICKER_NEWS_URL = "https://finance.yahoo.com/quote/{ticker}/latest-news/"
+GENERAL_NEWS_URL = "https://finance.yahoo.com/topic/latest-news"
+
+NEWS_COLUMNS = ["Title", "Short Description", "Source", "Published Date", "Affected Tickers", "Link"]
+
+_page_fetcher = None
+_page_fetcher_lock = threading.Lock()
+
+
+# Function to get the shared page fetcher (warm headless browsers reused across tickers)
+def get_page_fetcher():
+    global _page_fetcher
+    with _page_fetcher_lock:
+        if _page_fetcher is None:
+            _page_fetcher = SeleniumFetcher()
+            atexit.register(_page_fetcher.close)
+        return _page_fetcher
+
+
+# Function to swap the page fetcher, e.g. for the plain HTTP backend
+def set_page_fetcher(fetcher):
+    global _page_fetcher
+    with _page_fetcher_lock:
+        if _page_fetcher is not None and _page_fetcher is not fetcher:
+            _page_fetcher.close()
+        _page_fetcher = fetcher
+
+
+# Function to load a page and scroll until no new articles appear (at most scroll_times scrolls),
+# or until an article whose link is in known_links shows up
+def load_full_page(url, scroll_times=5, wait_time=2, known_links=None):
+    return get_page_fetcher().fetch(url, max_scrolls=scroll_times, scroll_timeout=wait_time, known_links=known_links)
 
-        # Scroll down multiple times
-        for _ in range(scroll_times):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(wait_time)
 
-        page_source = driver.page_source
-    finally:
-        driver.quit()
+# Function to get the key of an article in the news store: its link, or title and source when it has none
+def article_key(link, title="", source=""):
+    key = link if link and link != "N/A" else f"{title}\n{source}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
 
-    return page_source
 
+# Function to scrape several tickers concurrently, bounded by the fetcher's pool size; `url_template`
+# points it at another server, e.g. one serving recorded pages
+def scrape_tickers(tickers, fetcher=None, url_template=TICKER_NEWS_URL):
+    fetcher = fetcher or get_page_fetcher()
+    urls = {ticker: url_template.format(ticker=ticker) for ticker in tickers}
+    pages = fetch_many(urls.values(), fetcher)
 
-# Function to scrape Yahoo Finance news for a single ticker
+    results = {}
+    for ticker, url in urls.items():
+        page_source = pages[url]
+        if isinstance(page_source, Exception):
+            logging.error(f"Error scraping {ticker}: {page_source}")
+            results[ticker] = []
+        else:
+            results[ticker] = extract_articles_fast(page_source)
+    return results
+
+
+# Function to run the scrape -> store pipeline (imported here: news_pipeline itself imports this module)
+def _run_pipeline(ticker):
+    from news_pipeline import run_news_pipeline
+    return run_news_pipeline(ticker)
+
+
+# Function to scrape Yahoo Finance news for a single ticker into the news store
 def scrape_for_single_ticker(ticker):
-    url = f"https://finance.yahoo.com/quote/{ticker}/latest-news/"
     print(f"Scraping news for ticker: {ticker}")
     
     try:
-        page_source = load_full_page(url)
-        soup = BeautifulSoup(page_source, "html.parser")
-        articles_data = extract_articles(soup)
-
-        if articles_data:
-            save_to_csv(articles_data, filename="news_articles_by_ticker.csv")
-            print(f"Successfully scraped news for {ticker}.")
+        run = _run_pipeline(ticker)
+        if run.articles.empty:
+            print(f"No new news found for {ticker} ({run.known} already stored).")
         else:
-            print(f"No news found for {ticker}.")
+            print(f"Successfully stored {len(run.articles)} new articles for {ticker}.")
 
     except Exception as e:
         print(f"Error scraping {ticker}: {e}")
 
 
-# Function to scrape general market news from Yahoo Finance
+# Function to scrape general market news from Yahoo Finance into the news store
 def scrape_general_news():
-    url = "https://finance.yahoo.com/topic/latest-news"
     print("Scraping general market news...")
 
     try:
-        page_source = load_full_page(url)
-        soup = BeautifulSoup(page_source, "html.parser")
-        articles_data = extract_articles(soup)
-
-        if articles_data:
-            save_to_csv(articles_data, filename="news_articles.csv")
-            print("Successfully scraped general market news.")
+        run = _run_pipeline(None)
+        if run.articles.empty:
+            print(f"No new general news found ({run.known} already stored).")
         else:
-            print("No general news found.")
+            print(f"Successfully stored {len(run.articles)} new general news articles.")
 
     except Exception as e:
         print(f"Error scraping general news: {e}")
@@ -137,9 +151,161 @@ def extract_articles(soup):
     return articles_data
 
 
+# Markup of one Yahoo Finance news item: (tag, full class attribute) per field
+ARTICLE_CONTAINER = ("div", "content yf-82qtw3")
+TITLE_FIELD = ("h3", "clamp yf-82qtw3")
+LINK_FIELD = ("a", "subtle-link fin-size-small titles noUnderline yf-1xqzjha")
+DESCRIPTION_FIELD = ("p", "clamp yf-82qtw3")
+PUBLISHING_FIELD = ("div", "publishing yf-1weyqlp")
+TICKER_FIELD = ("div", "name yf-1m808gl")
+TICKER_SYMBOL = ("span", "symbol yf-1m808gl")
+
+# Boilerplate rules, applied in order: ("cut", phrase) drops everything from the phrase on,
+# ("drop", phrase) removes every occurrence of the phrase
+DESCRIPTION_RULES = (
+    ("cut", "Most Read from Bloomberg"),
+    ("drop", "(Bloomberg) -- "),
+    ("drop", "(Reuters) -"),
+)
+
+# Only the article containers get parsed; everything else on the page is skipped by the tokenizer
+ARTICLE_STRAINER = SoupStrainer(ARTICLE_CONTAINER[0], class_=ARTICLE_CONTAINER[1])
+
+try:
+    import lxml.html
+    from lxml.etree import XPath
+except ImportError:
+    lxml = None
+
+
+def _class_xpath(prefix, field):
+    tag, classes = field
+    return XPath(f"{prefix}{tag}[normalize-space(@class)='{classes}']")
+
+
+if lxml is not None:
+    # Compiled once: each field lookup is a C-level query on the article's subtree
+    ARTICLE_XPATH = _class_xpath("//", ARTICLE_CONTAINER)
+    # Text as BeautifulSoup's .text sees it: comments and script/style contents are not text
+    TEXT_XPATH = XPath("descendant::text()[not(parent::script or parent::style)]")
+    # Pages are parsed as UTF-8 bytes: lxml refuses a str that starts with an XML encoding declaration
+    HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+    FIELD_XPATHS = {field: _class_xpath(".//", field) for field in (
+        TITLE_FIELD, LINK_FIELD, DESCRIPTION_FIELD, PUBLISHING_FIELD, TICKER_FIELD, TICKER_SYMBOL)}
+
+
+def _clean_description(description):
+    for kind, phrase in DESCRIPTION_RULES:
+        if phrase in description:
+            if kind == "cut":
+                description = description.split(phrase)[0].strip()
+            else:
+                description = description.replace(phrase, "").strip()
+    return description
+
+
+# Function to extract one article with a single walk over its tags
+def _extract_article(article):
+    fields = {}
+    ticker_divs = []
+    for tag in article.find_all(True):
+        key = (tag.name, " ".join(tag.get("class", ())))
+        if key == TICKER_FIELD:
+            ticker_divs.append(tag)
+        elif key not in fields:
+            fields[key] = tag
+
+    title_tag = fields.get(TITLE_FIELD)
+    title = title_tag.text.strip() if title_tag else "N/A"
+
+    link_tag = fields.get(LINK_FIELD)
+    link = link_tag["href"] if link_tag and "href" in link_tag.attrs else "N/A"
+
+    desc_tag = fields.get(DESCRIPTION_FIELD)
+    description = _clean_description(desc_tag.text.strip()) if desc_tag else "N/A"
+
+    source, published_date = "N/A", "N/A"
+    source_info = fields.get(PUBLISHING_FIELD)
+    if source_info:
+        source_text = source_info.text.strip().split("•")
+        source = source_text[0].strip()
+        if len(source_text) > 1:
+            published_date = source_text[1].strip()
+
+    symbol_name, symbol_class = TICKER_SYMBOL
+    tickers = ", ".join(div.find(symbol_name, class_=symbol_class).text.strip() for div in ticker_divs) if ticker_divs else "N/A"
+
+    return [title, description, source, published_date, tickers, link]
+
+
+def _first(node, field):
+    found = FIELD_XPATHS[field](node)
+    return found[0] if found else None
+
+
+def _text(node):
+    return "".join(TEXT_XPATH(node)).strip()
+
+
+def _extract_article_lxml(article):
+    title_tag = _first(article, TITLE_FIELD)
+    title = _text(title_tag) if title_tag is not None else "N/A"
+
+    link_tag = _first(article, LINK_FIELD)
+    link = link_tag.get("href", "N/A") if link_tag is not None else "N/A"
+
+    desc_tag = _first(article, DESCRIPTION_FIELD)
+    description = _clean_description(_text(desc_tag)) if desc_tag is not None else "N/A"
+
+    source, published_date = "N/A", "N/A"
+    source_info = _first(article, PUBLISHING_FIELD)
+    if source_info is not None:
+        source_text = _text(source_info).split("•")
+        source = source_text[0].strip()
+        if len(source_text) > 1:
+            published_date = source_text[1].strip()
+
+    ticker_divs = FIELD_XPATHS[TICKER_FIELD](article)
+    symbols = []
+    for div in ticker_divs:
+        symbol = _first(div, TICKER_SYMBOL)
+        if symbol is None:
+            raise AttributeError("ticker without symbol")
+        symbols.append(_text(symbol))
+    tickers = ", ".join(symbols) if ticker_divs else "N/A"
+
+    return [title, description, source, published_date, tickers, link]
+
+
+def extract_articles_fast(page_source):
+    """Same rows as extract_articles(BeautifulSoup(page_source, "html.parser")), without the pure-Python parse.
+
+    With lxml installed the page is parsed in C and fields are found with precompiled XPath;
+    otherwise BeautifulSoup only builds the article containers (SoupStrainer).
+    """
+    if lxml is not None:
+        if page_source.strip():
+            articles = ARTICLE_XPATH(lxml.html.fromstring(page_source.encode("utf-8"), parser=HTML_PARSER))
+        else:
+            articles = []
+        extract = _extract_article_lxml
+    else:
+        soup = BeautifulSoup(page_source, "html.parser", parse_only=ARTICLE_STRAINER)
+        articles = soup.find_all(ARTICLE_CONTAINER[0], class_=ARTICLE_CONTAINER[1])
+        extract = _extract_article
+
+    articles_data = []
+    for article in articles:
+        try:
+            articles_data.append(extract(article))
+        except Exception as e:
+            print(f"Error extracting article: {e}")
+    return articles_data
+
+
 # Function to remove duplicates and save to CSV
 def save_to_csv(data, filename):
-    df = pd.DataFrame(data, columns=["Title", "Short Description", "Source", "Published Date", "Affected Tickers", "Link"])
+    df = pd.DataFrame(data, columns=NEWS_COLUMNS)
     df.to_csv(filename, index=False, encoding="utf-8")
     print(f"Data saved to {filename}")
 
@@ -148,7 +314,6 @@ def save_to_csv(data, filename):
 def main():
     print("Fetching general market news data...")
     scrape_general_news()
-    print("News data successfully fetched and saved as 'news_articles.csv'.")
 
 # Check if this script is being run directly
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+import importlib.metadata
+import pickle
+from collections import Counter
+
+import numpy as np
+
+import crud
+
+
+# Terms are hashed into this many columns instead of looked up in a fitted vocabulary, so the
+# vectorizer has no state: new articles (and words never seen before) need no refit
+N_FEATURES = 2 ** 16
+
+N_CLUSTERS = 12
+
+# Articles per mini-batch k-means step
+BATCH_SIZE = 4_096
+
+# Articles read, vectorized and assigned per step; each chunk holds about 100 bytes per article of
+# sparse matrix besides its text
+CHUNK_ARTICLES = 50_000
+
+# Top terms of a cluster are ranked among the words of its newest TERM_SAMPLE articles
+TOP_TERMS = 6
+TERM_SAMPLE = 200
+
+# Stored with the model and its assignments; a different version starts the clustering over. Read from
+# the package metadata like sentiment.ANALYZER_VERSION, so importing this module doesn't load sklearn
+MODEL_VERSION = (f"hashing-{N_FEATURES}/minibatch-kmeans-{N_CLUSTERS}/"
+                 f"sklearn-{importlib.metadata.version('scikit-learn')}")
+
+
+def make_vectorizer():
+    from sklearn.feature_extraction.text import HashingVectorizer  # sklearn takes about a second to import
+
+    return HashingVectorizer(n_features=N_FEATURES, alternate_sign=False, stop_words="english", dtype=np.float32)
+
+
+def make_model():
+    from sklearn.cluster import MiniBatchKMeans
+
+    # Labels come from predict() once a whole chunk is fitted, not from every partial_fit step
+    return MiniBatchKMeans(n_clusters=N_CLUSTERS, batch_size=BATCH_SIZE, compute_labels=False, random_state=0)
+
+
+def article_texts(articles):
+    return (articles["title"].fillna("") + " " + articles["description"].fillna("")).tolist()
+
+
+def load_model():
+    """(fitted model, articles it was fitted on) of the current MODEL_VERSION, or (None, 0)."""
+    stored = crud.get_news_cluster_model()
+    if stored is None or stored[0] != MODEL_VERSION:
+        return None, 0
+    return pickle.loads(stored[1]), stored[2]
+
+
+def update_clusters(reassign=False, chunk_articles=CHUNK_ARTICLES):
+    """Cluster the stored articles that have no cluster yet; returns how many were assigned.
+
+    Every chunk of new articles first updates the mini-batch k-means model (partial_fit, so nothing
+    already clustered is read again), then gets its clusters from it; the model and the assignments
+    are stored together. Earlier assignments keep the model of their time: `reassign` assigns every
+    stored article again with the current model, without fitting it.
+    """
+    vectorizer = make_vectorizer()
+    after = 0
+    assigned = 0
+    while True:
+        # Each chunk is fitted without any database lock, from the model and articles of one read
+        # transaction. Updates running at the same time (the app and the ingest daemon may both start
+        # one, in separate processes) race chunk by chunk: a chunk is only stored if the model is still
+        # the one it started from, otherwise it is fitted again from the model the other update saved
+        with crud.get_db().transaction():
+            stamp = crud.get_news_cluster_stamp()
+            model, fitted = load_model()
+            if not reassign:
+                after = crud.last_clustered_article()
+            articles = crud.get_news_to_cluster(after, chunk_articles)
+        if stamp is not None and stamp[0] != MODEL_VERSION:
+            _clear_other_version(stamp)
+            continue
+        if reassign and model is None:
+            break
+        # The first fit seeds one center per cluster from the articles it sees
+        if articles.empty or (model is None and len(articles) < N_CLUSTERS):
+            break
+        features = vectorizer.transform(article_texts(articles))
+        if not reassign:
+            if model is None:
+                model = make_model()
+            for start in range(0, features.shape[0], BATCH_SIZE):
+                model.partial_fit(features[start:start + BATCH_SIZE])
+            fitted += len(articles)
+        clusters = model.predict(features)
+        blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Only the check and the writes hold the write lock
+        with crud.get_db().transaction(immediate=True):
+            if crud.get_news_cluster_stamp() != stamp:
+                continue
+            crud.save_news_clusters(zip(articles["id"].tolist(), clusters.tolist()), MODEL_VERSION, blob, fitted)
+        assigned += len(articles)
+        after = int(articles["id"].iloc[-1])
+    return assigned
+
+
+# Function to start the clustering over when the stored model is of another version (unless another
+# update already did)
+def _clear_other_version(stamp):
+    with crud.get_db().transaction(immediate=True):
+        if crud.get_news_cluster_stamp() == stamp:
+            crud.clear_news_clusters()
+
+
+def top_terms(cluster, model, vectorizer, limit=TOP_TERMS):
+    """Words of the cluster's newest articles that weigh most in its center compared to the other centers.
+
+    Hashing keeps no vocabulary, so candidate words come from the articles and are hashed again.
+    """
+    texts = article_texts(crud.get_cluster_texts(cluster, TERM_SAMPLE))
+    analyze = vectorizer.build_analyzer()
+    counts = Counter(term for text in texts for term in analyze(text))
+    if not counts:
+        return []
+    terms = list(counts)
+    centers = model.cluster_centers_
+    weights = vectorizer.transform(terms) @ (centers[cluster] - centers.mean(axis=0))
+    ranked = sorted(range(len(terms)), key=lambda i: (-weights[i], -counts[terms[i]], terms[i]))
+    return [terms[i] for i in ranked[:limit]]
+
+
+def cluster_summary(tickers=None):
+    """Per cluster: its top terms, article count, Bullish/Neutral/Bearish counts, combined score and
+    mean compound (over the articles about any of `tickers`, if given). Empty until clusters exist."""
+    summary = crud.get_news_cluster_sentiment(tickers)
+    if summary.empty:
+        return summary
+    model, _ = load_model()
+    if model is None:
+        return summary.iloc[0:0]
+    vectorizer = make_vectorizer()
+    summary.insert(1, "top_terms", [", ".join(top_terms(cluster, model, vectorizer))
+                                    for cluster in summary["cluster"]])
+    return summary
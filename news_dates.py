@@ -0,0 +1,57 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Clock of the price bars (stock_prices.ts is exchange wall time); dates without a timezone are read in it
+EXCHANGE_TIMEZONE = "America/New_York"
+
+# Seconds per unit of Yahoo Finance's relative publication times ("35m ago", "2 hours ago", "a day ago")
+RELATIVE_UNITS = {
+    **dict.fromkeys(["s", "sec", "secs", "second", "seconds"], 1),
+    **dict.fromkeys(["m", "min", "mins", "minute", "minutes"], 60),
+    **dict.fromkeys(["h", "hr", "hrs", "hour", "hours"], 3600),
+    **dict.fromkeys(["d", "day", "days"], 86400),
+    **dict.fromkeys(["w", "wk", "wks", "week", "weeks"], 7 * 86400),
+    **dict.fromkeys(["mo", "mos", "month", "months"], 30 * 86400),
+    **dict.fromkeys(["y", "yr", "yrs", "year", "years"], 365 * 86400),
+}
+RELATIVE_WORDS = {"just now": 0, "now": 0, "yesterday": 86400}
+
+_relative = re.compile(r"^(\d+|an?|one)\s*([a-z]+)\s+ago$")
+
+
+def _absolute_timestamp(text):
+    try:
+        stamp = pd.Timestamp(text)
+    except (ValueError, TypeError, OverflowError):
+        return np.nan
+    if stamp is pd.NaT:
+        return np.nan
+    if stamp.tz is None:
+        stamp = stamp.tz_localize(EXCHANGE_TIMEZONE, ambiguous="NaT", nonexistent="NaT")
+    return np.nan if stamp is pd.NaT else stamp.timestamp()
+
+
+def parse_published(published, now):
+    """Unix timestamps (float, NaN when unparseable) of scraped "Published Date" strings.
+
+    Relative times ("35m ago", "2 hours ago", "yesterday") count back from `now`, a unix timestamp or
+    one per value. Absolute dates ("Oct 3, 2024") without a timezone are read in EXCHANGE_TIMEZONE.
+    """
+    text = pd.Series(published, dtype=object).astype(str).str.strip().str.lower()
+    now = np.broadcast_to(np.asarray(now, dtype=np.float64), len(text))
+
+    parts = text.str.extract(_relative)
+    count = pd.to_numeric(parts[0].replace({"a": "1", "an": "1", "one": "1"}), errors="coerce")
+    seconds_ago = (count * parts[1].map(RELATIVE_UNITS)).to_numpy(dtype=np.float64)
+    seconds_ago = np.where(np.isnan(seconds_ago), text.map(RELATIVE_WORDS).to_numpy(dtype=np.float64), seconds_ago)
+    result = now - seconds_ago
+
+    # Whatever is left is parsed once per distinct string (older articles show a date instead)
+    rest = np.isnan(result) & ~text.isin(["", "n/a", "nan", "none"]).to_numpy()
+    if rest.any():
+        absolute = {value: _absolute_timestamp(value) for value in text[rest].unique()}
+        result[rest] = text[rest].map(absolute).to_numpy(dtype=np.float64)
+    return result
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+import crud
+import snapshot
+from news_dates import EXCHANGE_TIMEZONE
+
+
+# Forward returns are measured over this many bars from the first bar at or after publication
+DEFAULT_HORIZONS = (1, 5, 20)
+
+# Bars plus articles held in memory at once; at about 60 bytes per row (bar ts, open and close,
+# article columns and one return per horizon) the default stays in the low hundreds of MB
+CHUNK_ROWS = 2_000_000
+
+SENTIMENT_LABELS = ["Bullish", "Neutral", "Bearish"]
+
+
+def exchange_seconds(published_at):
+    """UTC unix seconds -> int64 seconds on the exchange wall clock, the clock of stock_prices.ts."""
+    stamps = pd.to_datetime(np.asarray(published_at, dtype=np.float64), unit="s", utc=True)
+    return stamps.tz_convert(EXCHANGE_TIMEZONE).tz_localize(None).as_unit("s").asi8
+
+
+def align_events(event_series, event_ts, bar_offsets, bar_ts, opens, closes, horizons=DEFAULT_HORIZONS,
+                 max_delay=None):
+    """As-of join of events onto the next bar of their own series, and forward returns from there.
+
+    The bars of series j are bar_ts[bar_offsets[j]:bar_offsets[j + 1]], sorted by time; events are
+    (event_series, event_ts) pairs in any order. An event enters at the open of the first bar starting
+    at or after it (so the bar it happened in never counts) and its return over h bars is
+    close[entry + h - 1] / open[entry] - 1. Returns the entry bar positions (-1 when there is no such
+    bar, or it is more than `max_delay` seconds later) and an (events, horizons) float array, NaN
+    where the series ends before the horizon does.
+    """
+    event_series = np.asarray(event_series, dtype=np.int64)
+    event_ts = np.asarray(event_ts, dtype=np.int64)
+    bar_offsets = np.asarray(bar_offsets, dtype=np.int64)
+    bar_series = np.repeat(np.arange(len(bar_offsets) - 1), np.diff(bar_offsets))
+    entry = np.full(len(event_ts), -1, dtype=np.int64)
+    returns = np.full((len(event_ts), len(horizons)), np.nan)
+    if not len(event_ts) or not len(bar_ts):
+        return entry, returns
+
+    # (series, ts) as one sortable int64 key: the bars are already in key order, so one
+    # searchsorted finds every event's next bar; the series end check keeps it in its own series.
+    # Searching the events in key order too walks the bars front to back instead of at random
+    base = min(int(bar_ts.min()), int(event_ts.min()))
+    span = max(int(bar_ts.max()), int(event_ts.max())) - base + 1
+    if (len(bar_offsets) - 1) * span >= 2 ** 62:
+        raise ValueError("Too many series over too long a time span for one chunk")
+    bar_keys = bar_series * span + (bar_ts - base)
+    event_keys = event_series * span + (event_ts - base)
+    order = np.argsort(event_keys, kind="stable")
+    position = np.empty(len(event_keys), dtype=np.int64)
+    position[order] = np.searchsorted(bar_keys, event_keys[order], side="left")
+
+    series_end = bar_offsets[event_series + 1]
+    found = position < series_end
+    if max_delay is not None:
+        found[found] &= bar_ts[position[found]] - event_ts[found] <= max_delay
+    entry[found] = position[found]
+
+    entry_open = opens[position[found]]
+    for column, horizon in enumerate(horizons):
+        last = position[found] + horizon - 1
+        inside = last < series_end[found]
+        forward = np.full(len(last), np.nan)
+        forward[inside] = closes[last[inside]] / entry_open[inside] - 1
+        returns[found, column] = forward
+    return entry, returns
+
+
+def ticker_chunks(tickers, bar_rows, event_rows, budget=CHUNK_ROWS):
+    """Consecutive groups of tickers whose bars plus events fit `budget` rows (a ticker larger than
+    the budget on its own gets a chunk to itself)."""
+    chunk, size = [], 0
+    for ticker in tickers:
+        rows = bar_rows.get(ticker, 0) + event_rows.get(ticker, 0)
+        if chunk and size + rows > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(ticker)
+        size += rows
+    if chunk:
+        yield chunk
+
+
+def iter_news_events(tickers=None, interval="1d", horizons=DEFAULT_HORIZONS, max_delay=None, prices=None,
+                     chunk_rows=CHUNK_ROWS):
+    """Stored scored news joined onto the next price bar, one DataFrame per chunk of tickers.
+
+    Bars come from the memory-mapped snapshot (`prices`, a snapshot.PriceSnapshot; refresh it first).
+    Every row is one (ticker, article) pair with a bar to enter on: ticker, link_hash, published_at
+    (UTC unix seconds), compound, sentiment, bar (time of the entry bar) and return_<h> per horizon.
+    """
+    prices = prices or snapshot.PriceSnapshot()
+    event_rows = crud.count_news_events(tickers)
+    tickers = sorted(ticker for ticker in event_rows if prices.rows(ticker, interval))
+    bar_rows = {ticker: prices.rows(ticker, interval) for ticker in tickers}
+
+    for chunk in ticker_chunks(tickers, bar_rows, event_rows, chunk_rows):
+        events = crud.get_news_events(chunk)
+        bars = [prices.columns(ticker, interval) for ticker in chunk]
+        bar_offsets = np.concatenate([[0], np.cumsum([len(columns["ts"]) for columns in bars])])
+        bar_ts = np.concatenate([columns["ts"] for columns in bars])
+
+        event_series = pd.Categorical(events["ticker"], categories=chunk).codes
+        entry, returns = align_events(event_series, exchange_seconds(events["published_at"]), bar_offsets, bar_ts,
+                                      np.concatenate([columns["open"] for columns in bars]),
+                                      np.concatenate([columns["close"] for columns in bars]), horizons, max_delay)
+        found = entry >= 0
+        events = events[found].reset_index(drop=True)
+        events["bar"] = pd.to_datetime(bar_ts[entry[found]], unit="s")
+        for column, horizon in enumerate(horizons):
+            events[f"return_{horizon}"] = returns[found, column]
+        yield events
+
+
+def sentiment_lead(tickers=None, interval="1d", horizons=DEFAULT_HORIZONS, max_delay=None, prices=None,
+                   chunk_rows=CHUNK_ROWS):
+    """Does sentiment lead price? Per horizon: the number of events with a forward return, the
+    correlation of the compound score with that return, and the mean return by sentiment label.
+
+    Accumulated chunk by chunk from running sums, so memory stays bounded by `chunk_rows`.
+    """
+    sums = np.zeros((len(horizons), 6))  # n, sum x, sum y, sum x^2, sum y^2, sum xy
+    label_sums = np.zeros((len(horizons), len(SENTIMENT_LABELS), 2))  # sum of returns, count
+    for events in iter_news_events(tickers, interval, horizons, max_delay, prices, chunk_rows):
+        compound = events["compound"].to_numpy(dtype=np.float64)
+        labels = pd.Categorical(events["sentiment"], categories=SENTIMENT_LABELS).codes
+        for row, horizon in enumerate(horizons):
+            forward = events[f"return_{horizon}"].to_numpy()
+            known = ~np.isnan(forward)
+            x, y = compound[known], forward[known]
+            sums[row] += [len(x), x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum()]
+            labelled = labels[known] >= 0
+            label_sums[row, :, 0] += np.bincount(labels[known][labelled], y[labelled], len(SENTIMENT_LABELS))
+            label_sums[row, :, 1] += np.bincount(labels[known][labelled], minlength=len(SENTIMENT_LABELS))
+
+    n, sx, sy, sxx, syy, sxy = sums.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        means = label_sums[:, :, 0] / label_sums[:, :, 1]
+    lead = pd.DataFrame({"events": n.astype(np.int64), "correlation": correlation},
+                        index=pd.Index(list(horizons), name="horizon"))
+    for column, label in enumerate(SENTIMENT_LABELS):
+        lead[f"mean_return_{label.lower()}"] = means[:, column]
+    return lead
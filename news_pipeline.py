@@ -0,0 +1,152 @@
+import argparse
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import crud
+import newsData
+from news_dates import parse_published
+from sentiment import score_articles
+
+
+STAGES = ["scrape", "extract", "clean", "dedupe", "score", "persist"]
+
+# Articles are dropped from the store this long after they were first seen (daily rollups are kept)
+NEWS_RETENTION_SECONDS = 180 * 24 * 3600
+
+# How many of the latest stored links the scraper looks for to stop scrolling early
+KNOWN_LINKS_LIMIT = 200
+
+
+@dataclass
+class PipelineRun:
+    ticker: str
+    url: str
+    articles: pd.DataFrame = None  # the articles this run added to the store
+    known: int = 0  # scraped articles that were already stored
+    timings: dict = field(default_factory=dict)  # seconds per stage, in STAGES order
+
+    @property
+    def total(self):
+        return sum(self.timings.values())
+
+
+def scrape(url, fetch_page):
+    return fetch_page(url)
+
+
+def extract(page_source):
+    return newsData.extract_articles_fast(page_source)
+
+
+# Function to turn extracted rows into a frame: trimmed strings, one row per article link, and the
+# relative "Published Date" ("2h ago") resolved to a unix timestamp while `scraped_at` is still known
+def clean(rows, scraped_at=None):
+    articles = pd.DataFrame(rows, columns=newsData.NEWS_COLUMNS)
+    for column in newsData.NEWS_COLUMNS:
+        articles[column] = articles[column].astype(str).str.strip()
+    has_link = articles["Link"] != "N/A"
+    articles = articles[~(has_link & articles["Link"].duplicated())].reset_index(drop=True)
+    published_at = parse_published(articles["Published Date"], time.time() if scraped_at is None else scraped_at)
+    return articles.assign(**{"Published At": published_at})
+
+
+# Function to key the articles by link_hash (one row per key) and find the keys already in the news store
+def dedupe(articles):
+    hashes = [newsData.article_key(link, title, source) for link, title, source
+              in zip(articles["Link"], articles["Title"], articles["Source"])]
+    articles = articles.assign(link_hash=hashes)
+    articles = articles[~articles["link_hash"].duplicated()].reset_index(drop=True)
+    return articles, crud.get_known_news(articles["link_hash"])
+
+
+def score(articles):
+    return score_articles(articles)
+
+
+# Function to list (ticker, link_hash) pairs: the scraped ticker plus every affected ticker
+def ticker_links(articles, ticker=None):
+    pairs = set()
+    for link_hash, affected in zip(articles["link_hash"], articles["Affected Tickers"]):
+        symbols = {symbol.strip().upper() for symbol in affected.split(",")} - {"", "N/A"}
+        if ticker:
+            symbols.add(ticker)
+        pairs.update((symbol, link_hash) for symbol in symbols)
+    return sorted(pairs)
+
+
+# Function to store the new (scored) articles and the ticker links of every scraped article: one
+# already stored under another ticker, or as general news, still gets linked to this one
+def persist(articles, links, output_file=None):
+    stored = articles.rename(columns={name: column for column, name in crud.NEWS_ARTICLE_COLUMNS.items()})
+    crud.save_news_articles(stored.to_dict("records"), links)
+    crud.prune_news(NEWS_RETENTION_SECONDS)
+    if output_file and not articles.empty:
+        articles.drop(columns="link_hash").to_csv(output_file, index=False, encoding="utf-8")
+    return articles
+
+
+def run_news_pipeline(ticker=None, fetch_page=None, output_file=None):
+    """Scrape -> extract -> clean -> dedupe -> score -> persist the news of one ticker (or general news).
+
+    Only articles missing from the news store are scored and appended, but every scraped article is
+    linked to the ticker; the default fetcher stops scrolling once it reaches recently stored ones.
+    `fetch_page(url)` returns the page HTML and can be swapped for recorded pages. `output_file`
+    additionally exports the new articles as CSV.
+    """
+    if fetch_page is None:
+        known_links = crud.recent_news_links(ticker, KNOWN_LINKS_LIMIT)
+
+        def fetch_page(url):
+            return newsData.load_full_page(url, known_links=known_links)
+
+    url = newsData.TICKER_NEWS_URL.format(ticker=ticker) if ticker else newsData.GENERAL_NEWS_URL
+
+    run = PipelineRun(ticker=ticker, url=url)
+
+    def stage(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        run.timings[name] = time.perf_counter() - start
+        return result
+
+    scraped_at = time.time()
+    page_source = stage("scrape", scrape, url, fetch_page)
+    rows = stage("extract", extract, page_source)
+    articles = stage("clean", clean, rows, scraped_at)
+    articles, known = stage("dedupe", dedupe, articles)
+    run.known = len(known)
+    new_articles = articles[~articles["link_hash"].isin(known)].reset_index(drop=True)
+    if articles.empty:
+        run.articles = new_articles
+        return run
+
+    if not new_articles.empty:
+        new_articles = stage("score", score, new_articles)
+    run.articles = stage("persist", persist, new_articles, ticker_links(articles, ticker), output_file)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape and score Yahoo Finance news in one process.")
+    parser.add_argument("ticker", nargs="?", help="ticker symbol; general market news when omitted")
+    parser.add_argument("--fixture", help="read the page HTML from this file instead of the live site")
+    parser.add_argument("--output", help="also write the new articles to this CSV file")
+    args = parser.parse_args()
+
+    fetch_page = None
+    if args.fixture:
+        def fetch_page(url):
+            with open(args.fixture, encoding="utf-8") as file:
+                return file.read()
+
+    run = run_news_pipeline(args.ticker.upper() if args.ticker else None, fetch_page, args.output)
+    print(f"{len(run.articles)} new articles for {run.ticker or 'general news'} ({run.known} already stored)")
+    for name, seconds in run.timings.items():
+        print(f"{name:>8}: {seconds * 1000:8.1f} ms")
+    print(f"{'total':>8}: {run.total * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+
+# Selenium is imported by the functions that drive a browser: it costs about 0.2 s to import, and the
+# HTTP backend and the app's price sections never need it
+
+
+# Path to ChromeDriver; when the file doesn't exist Selenium Manager locates a driver itself
+CHROMEDRIVER_PATH = os.environ.get(
+    "CHROMEDRIVER_PATH",
+    "C:/Users/anboicu/OneDrive - ENDAVA/Desktop/chromedriver-win64/chromedriver-win64/chromedriver.exe",
+)
+
+# One news item on Yahoo Finance list pages
+ARTICLE_SELECTOR = "div.content.yf-82qtw3"
+
+CONSENT_BUTTON_XPATH = '//*[@id="consent-page"]/div/div/div/form/div[2]/div[2]/button[2]'
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+POOL_SIZE = 2
+LOAD_TIMEOUT = 10.0     # seconds to wait for the first articles to render
+SCROLL_TIMEOUT = 2.0    # seconds to wait for new articles after a scroll before giving up
+MAX_SCROLLS = 5
+HTTP_TIMEOUT = 15.0
+
+
+def new_chrome_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920x1080")
+    service = Service(CHROMEDRIVER_PATH) if os.path.exists(CHROMEDRIVER_PATH) else Service()
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+class BrowserPool:
+    """Up to `size` warm browser sessions, reused across pages; a session that errors is discarded."""
+
+    def __init__(self, size=POOL_SIZE, factory=new_chrome_driver):
+        self.size = size
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def session(self):
+        self._slots.acquire()
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self.factory()
+
+            healthy = False
+            try:
+                yield driver
+                healthy = True
+            finally:
+                if healthy:
+                    self._idle.put(driver)
+                else:
+                    _quit(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                _quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _quit(driver):
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+class SeleniumFetcher:
+    """Renders pages in pooled headless Chrome sessions and scrolls until no new articles appear."""
+
+    def __init__(self, pool_size=POOL_SIZE, article_selector=ARTICLE_SELECTOR, load_timeout=LOAD_TIMEOUT,
+                 scroll_timeout=SCROLL_TIMEOUT, max_scrolls=MAX_SCROLLS, factory=new_chrome_driver):
+        self.pool = BrowserPool(pool_size, factory)
+        self.article_selector = article_selector
+        self.load_timeout = load_timeout
+        self.scroll_timeout = scroll_timeout
+        self.max_scrolls = max_scrolls
+
+    @property
+    def max_workers(self):
+        return self.pool.size
+
+    def _count_articles(self, driver):
+        return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", self.article_selector)
+
+    def _article_links(self, driver, first=0):
+        return driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0])).slice(arguments[1])"
+            ".map(a => a.querySelector('a[href]')).filter(a => a).map(a => a.getAttribute('href'));",
+            self.article_selector, first)
+
+    def _dismiss_consent(self, driver):
+        # The consent page only shows up once per browser session, so warm sessions skip this
+        if "consent" not in driver.current_url:
+            return
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        try:
+            WebDriverWait(driver, 3).until(EC.element_to_be_clickable((By.XPATH, CONSENT_BUTTON_XPATH))).click()
+        except TimeoutException:
+            pass
+
+    def fetch(self, url, max_scrolls=None, scroll_timeout=None, known_links=None):
+        """Return the rendered page. The feed is newest first, so scrolling stops as soon as
+        an article in `known_links` (hrefs already stored) has loaded."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        max_scrolls = self.max_scrolls if max_scrolls is None else max_scrolls
+        scroll_timeout = self.scroll_timeout if scroll_timeout is None else scroll_timeout
+
+        with self.pool.session() as driver:
+            driver.get(url)
+            self._dismiss_consent(driver)
+
+            try:
+                WebDriverWait(driver, self.load_timeout, poll_frequency=0.1).until(
+                    lambda d: self._count_articles(d) > 0)
+            except TimeoutException:
+                return driver.page_source  # page without articles
+
+            count = self._count_articles(driver)
+            if known_links and not known_links.isdisjoint(self._article_links(driver)):
+                return driver.page_source
+            for _ in range(max_scrolls):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                try:
+                    WebDriverWait(driver, scroll_timeout, poll_frequency=0.1).until(
+                        lambda d: self._count_articles(d) > count)
+                except TimeoutException:
+                    break  # nothing new loaded, the feed is exhausted
+                loaded = count
+                count = self._count_articles(driver)
+                if known_links and not known_links.isdisjoint(self._article_links(driver, loaded)):
+                    break  # reached articles from a previous scrape
+
+            return driver.page_source
+
+    def close(self):
+        self.pool.close()
+
+
+class HttpFetcher:
+    """Plain HTTP backend: no JavaScript, so only the server-rendered articles, but no browser either."""
+
+    def __init__(self, pool_size=8, timeout=HTTP_TIMEOUT, headers=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self):
+        return self.pool_size
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def fetch(self, url, **_):
+        response = self._session().get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+def fetch_many(urls, fetcher, max_workers=None):
+    """Fetch several pages concurrently (bounded by the fetcher's pool); returns url -> html or exception."""
+    urls = list(dict.fromkeys(urls))
+    max_workers = max_workers or fetcher.max_workers
+
+    def fetch(url):
+        try:
+            return fetcher.fetch(url)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(urls, pool.map(fetch, urls)))
@@ -0,0 +1,96 @@
+import threading
+
+import pandas as pd
+
+import crud
+
+
+# Yahoo Finance intervals stored in stock_prices; anything else bypasses the cache
+CACHEABLE_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"}
+
+
+def _day(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+# Function to subtract the covered ranges from [start, end); all bounds are YYYY-MM-DD strings
+def missing_ranges(start, end, covered):
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in sorted(covered):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+# Function to turn stored rows back into the yfinance history() layout
+def to_ohlcv_frame(rows):
+    frame = rows.rename(columns={
+        "open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume",
+    })
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame["date"]), name="Date")
+    return frame[crud.PRICE_COLUMNS]
+
+
+class PriceCache:
+    """Read-through cache over stock_prices: only date ranges never fetched before go to the provider.
+
+    Fetched ranges are recorded (in whole days, for every interval) in price_coverage, so repeated or
+    overlapping requests are served from SQLite. The current day is never marked as covered because
+    its bars are still changing, and neither is a range the provider returned nothing for (unless it
+    ends before the first stored bar), so a failed fetch is tried again on the next request.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.stats = {"hits": 0, "misses": 0, "gaps_fetched": 0, "bars_fetched": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def get(self, ticker, start, end, interval="1d"):
+        """Return bars in [start, end) for `ticker`, fetching only the missing gaps."""
+        if interval not in CACHEABLE_INTERVALS:
+            self._count("misses")
+            return self.provider.history(ticker, start=start, end=end, interval=interval)
+
+        start, end = _day(start), _day(end)
+        gaps = missing_ranges(start, end, crud.get_price_coverage(ticker, interval))
+
+        if gaps:
+            self._count("misses")
+            today = _day(pd.Timestamp.today())
+            for gap_start, gap_end in gaps:
+                self._fetch_gap(ticker, interval, gap_start, gap_end, today)
+        else:
+            self._count("hits")
+
+        last_second = pd.Timestamp(end) - pd.Timedelta(seconds=1)
+        rows = crud.query_stock_data(tickers=[ticker], start=start, end=last_second, interval=interval)
+        return to_ohlcv_frame(rows)
+
+    def _fetch_gap(self, ticker, interval, start, end, today):
+        data = self.provider.history(ticker, start=start, end=end, interval=interval)
+        self._count("gaps_fetched")
+
+        if data is None or data.empty:
+            # Yahoo answers errors and rate limits with an empty frame too, so an empty answer only
+            # counts as coverage before the first stored bar (e.g. before the listing)
+            first = crud.query_stock_data(tickers=[ticker], interval=interval, columns=["date"], limit=1)
+            if first.empty or pd.Timestamp(end) > first["date"].iloc[0]:
+                return
+        else:
+            self._count("bars_fetched", len(data))
+            # Upsert so that a bar fetched while its day was still open gets corrected later
+            crud.save_stock_data_bulk(data, ticker=ticker, interval=interval, upsert=True)
+
+        crud.add_price_coverage(ticker, interval, start, min(end, today))
@@ -0,0 +1,54 @@
+import time
+
+import pandas as pd
+
+
+class YahooPriceProvider:
+    """Price provider backed by yfinance; `end` is exclusive, like yf.Ticker.history.
+
+    yfinance is imported on the first request rather than with this module, so processes that are
+    served from the price cache never load it.
+    """
+
+    name = "yahoo"
+
+    def history(self, ticker, start, end, interval):
+        import yfinance as yf
+        return yf.Ticker(ticker).history(start=start, end=end, interval=interval)
+
+    def info(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+
+class InMemoryPriceProvider:
+    """Offline provider serving slices of pre-built OHLCV frames, for tests and benchmarks.
+
+    `frames` maps (ticker, interval) -> DataFrame and `infos` maps ticker -> info dict.
+    `latency` seconds are slept on every call to stand in for the network; every call is
+    recorded in `calls`.
+    """
+
+    name = "memory"
+
+    def __init__(self, frames, infos=None, latency=0.0):
+        self.frames = frames
+        self.infos = infos or {}
+        self.latency = latency
+        self.calls = []
+
+    def history(self, ticker, start, end, interval):
+        self.calls.append(("history", ticker, str(start), str(end), interval))
+        time.sleep(self.latency)
+        frame = self.frames.get((ticker, interval))
+        if frame is None:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        mask = (frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))
+        return frame.loc[mask].copy()
+
+    def info(self, ticker):
+        self.calls.append(("info", ticker))
+        time.sleep(self.latency)
+        if ticker not in self.infos:
+            raise KeyError(f"{ticker}: unknown ticker")
+        return dict(self.infos[ticker])
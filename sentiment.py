@@ -0,0 +1,159 @@
+import hashlib
+import importlib.metadata
+import logging
+import os
+import re
+import threading
+import unicodedata
+from multiprocessing import Pool
+
+import crud
+
+
+BULLISH_THRESHOLD = 0.05
+BEARISH_THRESHOLD = -0.05
+
+BATCH_SIZE = 1_000
+
+# Stored with every cached score; bump it whenever the scoring itself changes. Read from the package
+# metadata: importing nltk takes over a second (it pulls in scipy and scikit-learn), so it is only
+# imported once something is actually scored
+ANALYZER_VERSION = f"vader/nltk-{importlib.metadata.version('nltk')}"
+
+CACHE_MAX_AGE_SECONDS = 90 * 24 * 3600
+CACHE_MAX_ENTRIES = 500_000
+
+# Below this many texts a process pool costs more to start than it saves
+MIN_TEXTS_PER_PROCESS = 20_000
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+# Function to get the process-wide VADER analyzer, downloading the lexicon only if it is missing
+def get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                import nltk
+                from nltk.sentiment import SentimentIntensityAnalyzer
+
+                try:
+                    _analyzer = SentimentIntensityAnalyzer()
+                except LookupError:
+                    nltk.download("vader_lexicon", quiet=True)
+                    _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def label(compound):
+    if compound >= BULLISH_THRESHOLD:
+        return "Bullish"
+    elif compound <= BEARISH_THRESHOLD:
+        return "Bearish"
+    else:
+        return "Neutral"
+
+
+def _score_batch(batch):
+    polarity_scores = get_analyzer().polarity_scores
+    return [polarity_scores(str(text))["compound"] for text in batch]
+
+
+def _batches(texts, batch_size):
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_scores(texts, batch_size=BATCH_SIZE, processes=1):
+    """Yield one list of compound scores per batch of `texts` (any iterable), in input order.
+
+    With `processes` > 1 batches are scored by a pool of workers, each loading the lexicon once.
+    """
+    if processes and processes > 1:
+        with Pool(processes, initializer=get_analyzer) as pool:
+            yield from pool.imap(_score_batch, _batches(texts, batch_size))
+    else:
+        for batch in _batches(texts, batch_size):
+            yield _score_batch(batch)
+
+
+def score_texts(texts, batch_size=BATCH_SIZE, processes=None):
+    """Return the compound score of every text. `processes=None` picks a pool only for large inputs."""
+    texts = list(texts)
+    if processes is None:
+        processes = max(1, min(os.cpu_count() or 1, len(texts) // MIN_TEXTS_PER_PROCESS))
+    return [score for batch in iter_scores(texts, batch_size, processes) for score in batch]
+
+
+_whitespace = re.compile(r"\s+")
+
+
+# Function to normalize text before hashing; case is kept because VADER scores capitals differently
+def normalize_text(text):
+    return _whitespace.sub(" ", unicodedata.normalize("NFC", str(text))).strip()
+
+
+def text_hash(text):
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def score_texts_cached(texts, batch_size=BATCH_SIZE, processes=None):
+    """Like `score_texts`, but texts already scored (by this analyzer version) come from SQLite.
+
+    Returns (scores, stats) where stats holds hits, misses and hit_rate for this run.
+    """
+    texts = list(texts)
+    hashes = [text_hash(text) for text in texts]
+    known = crud.get_cached_sentiment(set(hashes), ANALYZER_VERSION)
+
+    # Every distinct unseen text is scored once, however many tickers it appeared under
+    unseen = {}
+    for digest, text in zip(hashes, texts):
+        if digest not in known and digest not in unseen:
+            unseen[digest] = normalize_text(text)
+    if unseen:
+        fresh = dict(zip(unseen, score_texts(unseen.values(), batch_size, processes)))
+        crud.save_cached_sentiment(fresh, ANALYZER_VERSION)
+        known.update(fresh)
+        crud.evict_sentiment_cache(CACHE_MAX_AGE_SECONDS, CACHE_MAX_ENTRIES)
+
+    misses = sum(1 for digest in hashes if digest in unseen)
+    stats = {
+        "hits": len(texts) - misses,
+        "misses": misses,
+        "hit_rate": (len(texts) - misses) / len(texts) if texts else 0.0,
+    }
+    logging.info(f"Sentiment cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+    return [known[digest] for digest in hashes], stats
+
+
+# Function to build the text that gets scored for each article (title + short description)
+def article_texts(news_df):
+    return (news_df["Title"].fillna("").astype(str) + " " + news_df["Short Description"].fillna("").astype(str)).tolist()
+
+
+def score_articles(news_df, batch_size=BATCH_SIZE, processes=None, cache=True):
+    """Return a copy of `news_df` with Sentiment (Bullish/Neutral/Bearish) and Compound as first columns.
+
+    With `cache` the per-run cache statistics are available as `result.attrs["sentiment_cache"]`.
+    """
+    texts = article_texts(news_df)
+    stats = None
+    if cache:
+        compounds, stats = score_texts_cached(texts, batch_size, processes)
+    else:
+        compounds = score_texts(texts, batch_size, processes)
+    scored = news_df.drop(columns=["Sentiment", "Compound"], errors="ignore")
+    scored.insert(0, "Compound", compounds)
+    scored.insert(0, "Sentiment", [label(compound) for compound in compounds])
+    if stats is not None:
+        scored.attrs["sentiment_cache"] = stats
+    return scored
@@ -1,7 +1,8 @@
-import nltk
 import pandas as pd
 import sys
-from nltk.sentiment import SentimentIntensityAnalyzer
+
+from sentiment import score_articles
+
 
 def main(news_file):
     """Perform sentiment analysis on the given CSV file."""
@@ -9,25 +10,10 @@ def main(news_file):
         # Read the specified CSV file
         news_df = pd.read_csv(news_file)
 
-        # Download VADER lexicon if not already installed
-        nltk.download("vader_lexicon")
-
-        # Initialize Sentiment Analyzer
-        sia = SentimentIntensityAnalyzer()
-
-        # Function to get sentiment scores
-        def analyze_sentiment(text):
-            sentiment = sia.polarity_scores(str(text))  # Ensure text is a string
-            if sentiment["compound"] >= 0.05:
-                return "Bullish"
-            elif sentiment["compound"] <= -0.05:
-                return "Bearish"
-            else:
-                return "Neutral"
-
-        # Apply sentiment analysis to the news DataFrame
-        news_df["Sentiment"] = (news_df["Title"] + " " + news_df["Short Description"]).apply(analyze_sentiment)
-        news_df = news_df[["Sentiment"] + [col for col in news_df.columns if col != "Sentiment"]]
+        # Score every article in-process; texts seen before come from the sentiment cache
+        news_df = score_articles(news_df)
+        cache_stats = news_df.attrs["sentiment_cache"]
+        print(f"Sentiment cache hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} of {len(news_df)} articles).")
 
         # Save the updated data back to the same CSV file
         news_df.to_csv(news_file, index=False)
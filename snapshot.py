@@ -0,0 +1,237 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import crud
+
+
+# Every series is one file of contiguous columns, each `rows` values long: ts (int64 seconds, as in
+# stock_prices) followed by float64 open, high, low, close and volume (NaN where the database has NULL)
+SNAPSHOT_COLUMNS = ["ts", "open", "high", "low", "close", "volume"]
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+# Refreshes of one directory take turns through a lease in the database (crud.acquire_lease); it is
+# extended while the export runs, so it only lapses when a refresh dies without releasing it
+REFRESH_LEASE_SECONDS = 120
+LEASE_POLL_SECONDS = 0.05
+
+
+def default_directory():
+    return os.environ.get("STOCK_SNAPSHOT_DIR",
+                          os.path.join(os.path.dirname(os.path.abspath(crud.DATABASE_PATH)), "snapshots"))
+
+
+def _epoch(value):
+    value = pd.Timestamp(value)
+    if value.tz is not None:
+        value = value.tz_localize(None)
+    return (value - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return None
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Snapshot in {directory} has format {manifest.get('format')}, expected {FORMAT_VERSION}")
+    return manifest
+
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    os.replace(path + ".tmp", path)
+
+
+def _map(directory, entry):
+    # All columns are 8 bytes wide, so one (columns, rows) float64 map covers the file; ts is reinterpreted below
+    return np.memmap(os.path.join(directory, entry["file"]), dtype="<f8", mode="r",
+                     shape=(len(SNAPSHOT_COLUMNS), entry["rows"]))
+
+
+def _write_series(directory, interval, ticker, generation, ts, values):
+    # Files are never overwritten in place: readers may still have the previous generation mapped.
+    # Written under a temporary name first, so a file only ever appears complete
+    name = os.path.join(interval, f"{ticker}.{generation}.bin")
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.join(directory, interval), exist_ok=True)
+    with open(path + ".tmp", "wb") as file:
+        ts.astype("<i8").tofile(file)
+        np.ascontiguousarray(values, dtype="<f8").tofile(file)
+    os.replace(path + ".tmp", path)
+    return {"file": name.replace(os.sep, "/"), "rows": len(ts), "first": int(ts[0]), "last": int(ts[-1])}
+
+
+def _remove_unreferenced(directory, manifest):
+    referenced = {os.path.normpath(entry["file"]) for series in manifest["series"].values() for entry in series.values()}
+    for interval in os.listdir(directory):
+        folder = os.path.join(directory, interval)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if os.path.join(interval, name) not in referenced:
+                try:
+                    os.remove(os.path.join(folder, name))
+                except OSError:
+                    pass  # still mapped by a reader (Windows); removed by a later refresh
+
+
+def refresh(directory=None):
+    """Bring the snapshot in line with stock_prices and return the number of series rewritten.
+
+    Only series written to since the last refresh are read from SQLite, and only from their earliest
+    changed bar on; the bars before it are carried over from the current files. The first refresh of
+    a directory exports everything.
+    """
+    directory = directory or default_directory()
+
+    # Refreshes run one at a time (the app and the ingest daemon may both start one), but without the
+    # database write lock: price writes carry on meanwhile and bump the version of the changes they
+    # add to, so clearing the changes taken in below leaves theirs for the next refresh
+    lease, owner = f"snapshot:{os.path.abspath(directory)}", uuid.uuid4().hex
+    while not crud.acquire_lease(lease, owner, REFRESH_LEASE_SECONDS):
+        time.sleep(LEASE_POLL_SECONDS)
+    done = threading.Event()
+    keeper = threading.Thread(target=_keep_lease, args=(lease, owner, done), name="snapshot-lease", daemon=True)
+    keeper.start()
+    try:
+        return _refresh(directory)
+    finally:
+        done.set()
+        keeper.join()
+        crud.release_lease(lease, owner)
+
+
+# Function to extend a lease until `done` is set, on its own connection so the export's read
+# transaction never has to become a write
+def _keep_lease(lease, owner, done):
+    try:
+        while not done.wait(REFRESH_LEASE_SECONDS / 4):
+            if not crud.acquire_lease(lease, owner, REFRESH_LEASE_SECONDS):
+                logging.error(f"⚠️ Snapshot lease {lease} was taken over by another refresh")
+    finally:
+        crud.get_db().release()
+
+
+def _refresh(directory):
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        os.makedirs(directory, exist_ok=True)
+        manifest = {"format": FORMAT_VERSION, "columns": SNAPSHOT_COLUMNS, "generation": 0, "series": {}}
+        crud.mark_all_prices_changed()
+    manifest["generation"] += 1
+
+    # One read transaction: the changes and the bars they point to come from the same WAL snapshot
+    with crud.get_db().transaction():
+        changes = crud.get_price_changes()
+        for ticker, interval, since, _ in changes:
+            series = manifest["series"].setdefault(interval, {})
+            bars = crud.read_price_columns(ticker, interval, since)
+            ts, values = bars[:, 0].astype(np.int64), bars[:, 1:].T
+
+            entry = series.get(ticker)
+            if entry is not None:
+                kept = _map(directory, entry)
+                keep = int(np.searchsorted(kept[0].view("<i8"), since))
+                ts = np.concatenate([kept[0].view("<i8")[:keep], ts])
+                values = np.concatenate([kept[1:, :keep], values], axis=1)
+
+            if len(ts):
+                series[ticker] = _write_series(directory, interval, ticker, manifest["generation"], ts, values)
+            else:
+                series.pop(ticker, None)
+    manifest["series"] = {interval: series for interval, series in manifest["series"].items() if series}
+
+    _write_manifest(directory, manifest)
+    crud.clear_price_changes(changes)
+    _remove_unreferenced(directory, manifest)
+    return len(changes)
+
+
+class PriceSnapshot:
+    """Read side of a snapshot: series are memory-mapped on first use and returned as read-only NumPy
+    views, so loading costs no copy and only the pages actually touched are read from disk.
+
+    The manifest is read once; create a new PriceSnapshot to see later refreshes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        manifest = _read_manifest(self.directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot in {self.directory}; run snapshot.refresh() first")
+        self.series = manifest["series"]
+        self._maps = {}
+
+    def intervals(self):
+        return sorted(self.series)
+
+    def tickers(self, interval="1d"):
+        return sorted(self.series.get(interval, {}))
+
+    def rows(self, ticker, interval="1d"):
+        """Number of bars of one series (0 when it is not in the snapshot), without mapping it."""
+        return self.series.get(interval, {}).get(ticker, {}).get("rows", 0)
+
+    def columns(self, ticker, interval="1d", start=None, end=None):
+        """ts (int64 seconds) and OHLCV arrays of the bars in [start, end], as views on the mapped file."""
+        key = (ticker, interval)
+        data = self._maps.get(key)
+        if data is None:
+            entry = self.series.get(interval, {}).get(ticker)
+            if entry is None:
+                raise KeyError(f"{ticker} ({interval}) is not in the snapshot")
+            data = self._maps[key] = _map(self.directory, entry)
+
+        ts = data[0].view("<i8")
+        lo = 0 if start is None else int(np.searchsorted(ts, _epoch(start)))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _epoch(end), side="right"))
+        return {"ts": ts[lo:hi], **{name: data[i, lo:hi] for i, name in enumerate(SNAPSHOT_COLUMNS[1:], 1)}}
+
+    def frame(self, ticker, interval="1d", start=None, end=None):
+        """One series in the yfinance history() layout (a copy)."""
+        columns = self.columns(ticker, interval, start, end)
+        return pd.DataFrame({name.capitalize(): columns[name] for name in SNAPSHOT_COLUMNS[1:]},
+                            index=pd.DatetimeIndex(pd.to_datetime(columns["ts"], unit="s"), name="Date"))
+
+    def panel(self, column="close", interval="1d", tickers=None, start=None, end=None):
+        """One column of many series side by side: a frame indexed by bar time with a column per ticker."""
+        tickers = self.tickers(interval) if tickers is None else tickers
+        series = {}
+        for ticker in tickers:
+            columns = self.columns(ticker, interval, start, end)
+            series[ticker] = pd.Series(columns[column], index=columns["ts"])
+        panel = pd.concat(series, axis=1) if series else pd.DataFrame()
+        panel.index = pd.to_datetime(panel.index, unit="s")
+        return panel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the memory-mapped snapshot of stock_prices.")
+    parser.add_argument("--dir", help="snapshot directory (default: snapshots/ next to the database, "
+                                      "or STOCK_SNAPSHOT_DIR)")
+    parser.add_argument("--rebuild", action="store_true", help="export every series again")
+    args = parser.parse_args()
+
+    directory = args.dir or default_directory()
+    if args.rebuild and os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+        os.remove(os.path.join(directory, MANIFEST_NAME))
+    start = time.perf_counter()
+    rewritten = refresh(directory)
+    print(f"{directory}: {rewritten} series rewritten in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app modules from the repo root, however pytest is started
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import crud
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh database at a temporary path, used by every crud function for the test."""
+    db = crud.configure(str(tmp_path / "test.db"))
+    yield db
+    db.close()
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import crud
+from benchmarks.bench_app_reruns import TICKER, store_fixture, widget
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def app(database, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the app writes error_log.txt to the working directory
+    store_fixture()
+    return AppTest.from_file(APP, default_timeout=120).run()
+
+
+def test_sentiment_snapshot_is_stored_under_the_news_ticker(app):
+    widget(app.text_input, "Enter Ticker Symbol for News Scraping:").set_value(f"  {TICKER.lower()} ").run()
+    widget(app.button, "💾 Persist Sentiment Data").click().run()
+    assert set(crud.get_sentiment_data_from_db()["ticker"]) == {TICKER}
+
+    widget(app.text_input, "Filter Sentiment Tickers (comma-separated):").set_value(TICKER.lower()).run()
+    widget(app.button, "🛢 Load Sentiment Data").click().run()
+    assert not app.exception
+    assert "💾 Persisted sentiment snapshots" in [caption.value for caption in app.caption]
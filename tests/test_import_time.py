@@ -0,0 +1,35 @@
+import builtins
+import statistics
+
+import import_timing
+from benchmarks.bench_import_time import DEFERRED, IMPORT_BUDGET_MS, measure, startup_modules
+
+# Cold runs per check; the median absorbs one slow interpreter start
+REPEATS = 3
+
+
+def test_startup_imports_within_budget():
+    modules = startup_modules()
+    runs = [measure(modules) for _ in range(REPEATS)]
+    loaded = sorted({name for run in runs for name in run["deferred_loaded"]})
+    assert loaded == [], f"imported at startup but meant to load on first use (one of {DEFERRED})"
+    total = statistics.median(run["total_ms"] for run in runs)
+    assert total <= IMPORT_BUDGET_MS, f"startup imports take {total:.0f} ms, over the {IMPORT_BUDGET_MS} ms budget"
+
+
+def test_import_after_uninstall_uses_original():
+    # The app installs the hook at startup and keeps it; start from the plain import either way
+    installed = import_timing._original_import is not None
+    import_timing.uninstall()
+    original = builtins.__import__
+    import_timing.install()
+    try:
+        timed_import = builtins.__import__
+        assert timed_import is not original
+    finally:
+        import_timing.uninstall()
+    # What another thread that looked the hook up before uninstall() ends up calling
+    assert builtins.__import__ is original
+    assert timed_import("os").sep
+    if installed:
+        import_timing.install()
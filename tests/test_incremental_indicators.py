@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_indicators import SPECS
+from benchmarks.common import random_walk_ohlcv
+from indicators import IncrementalIndicators, compute_indicators, load_incremental, save_incremental
+
+
+def appended(engine_for, data, sizes, seed=0):
+    """Indicator values of `data` fed in appends of random sizes drawn from `sizes`; the engine
+    comes from engine_for() before and goes to its second return value after every append."""
+    rng = np.random.default_rng(seed)
+    parts, position = [], 0
+    while position < len(data):
+        position += int(rng.choice(sizes))
+        engine, done = engine_for()
+        parts.append(engine.update(data.iloc[:position]))
+        done(engine)
+    return pd.concat(parts)
+
+
+def assert_equal_to_full(actual, data, specs=SPECS):
+    expected = compute_indicators(data, specs)
+    assert actual.index.equals(expected.index)
+    for column in expected.columns:
+        np.testing.assert_allclose(actual[column].to_numpy(), expected[column].to_numpy(),
+                                   rtol=1e-9, atol=1e-9, err_msg=column)
+
+
+@pytest.mark.parametrize("sizes", [[1], [1, 2, 7], [100, 1_000], [2_000]])
+def test_appends_equal_full_recomputation(sizes):
+    data = random_walk_ohlcv(2_000, freq="min", seed=1)
+    engine = IncrementalIndicators(SPECS)
+    assert_equal_to_full(appended(lambda: (engine, lambda _: None), data, sizes), data)
+
+
+def test_state_round_trip_in_memory():
+    data = random_walk_ohlcv(3_000, freq="min", seed=2)
+    state = {"engine": IncrementalIndicators(SPECS)}
+
+    def resume():
+        return IncrementalIndicators.from_state(state["engine"].to_state()), lambda engine: state.update(engine=engine)
+
+    assert_equal_to_full(appended(resume, data, [1, 7, 100]), data)
+
+
+def test_save_load_round_trip(database):
+    # Every append resumes from the database, as a restarted process would
+    data = random_walk_ohlcv(3_000, freq="min", seed=3)
+
+    def resume():
+        return load_incremental("TEST", "1m", SPECS), lambda engine: save_incremental("TEST", "1m", engine)
+
+    assert_equal_to_full(appended(resume, data, [1, 2, 7, 100, 1_000]), data)
+
+
+def test_load_only_resumes_the_same_series(database):
+    data = random_walk_ohlcv(500, freq="min", seed=4)
+    engine = IncrementalIndicators(SPECS)
+    engine.update(data.iloc[:300])
+    save_incremental("TEST", "1m", engine)
+
+    resumed = load_incremental("TEST", "1m", SPECS, data.index)
+    assert (resumed.first_index, resumed.last_index) == (data.index[0], data.index[299])
+    assert_equal_to_full(pd.concat([compute_indicators(data.iloc[:300], SPECS), resumed.update(data)]), data)
+
+    # Another start (the warm-up and VWAP depend on it), a last bar outside the series, other specs
+    assert load_incremental("TEST", "1m", SPECS, data.index[1:]).last_index is None
+    assert load_incremental("TEST", "1m", SPECS, data.index[:200]).last_index is None
+    assert load_incremental("TEST", "1m", SPECS[:2], data.index).last_index is None
+    assert load_incremental("OTHER", "1m", SPECS, data.index).last_index is None
+
+
+def test_empty_update_keeps_state():
+    data = random_walk_ohlcv(100, seed=5)
+    engine = IncrementalIndicators(SPECS)
+    engine.update(data)
+    assert engine.update(data).empty
+    assert engine.last_index == data.index[-1]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_indicators import SPECS, exact_rolling_std, pandas_reference
+from benchmarks.common import random_walk_ohlcv
+from indicators import compute_indicators
+
+# Relative tolerance per indicator: the block-wise EWM and the running window sums round differently
+# from pandas, and more so on long series; absolute differences below 1e-7 are ignored throughout
+RTOL = {"SMA": 1e-9, "EMA": 1e-9, "BB": 1e-9, "RSI": 1e-7, "ATR": 1e-7, "VWAP": 1e-9}
+ATOL = 1e-7
+
+
+def expected_columns(data, specs=SPECS):
+    reference = pandas_reference(data, specs)
+    # pandas' online rolling std drifts on long series: the widths come from exact windows instead
+    for spec in specs:
+        if spec[0] == "bollinger":
+            width = spec[2] * exact_rolling_std(data["Close"].to_numpy(), spec[1])
+            reference["BB_Upper"] = reference["BB_Middle"] + width
+            reference["BB_Lower"] = reference["BB_Middle"] - width
+    return reference
+
+
+def assert_matches_reference(data, specs=SPECS):
+    engine = compute_indicators(data, specs)
+    reference = expected_columns(data, specs)
+    assert list(engine.columns) == list(reference.columns)
+    for column in reference.columns:
+        # NaN where pandas has NaN (warm-up, division by zero) and nowhere else
+        np.testing.assert_allclose(engine[column].to_numpy(), reference[column].to_numpy(),
+                                   rtol=RTOL[column.split("_")[0]], atol=ATOL, equal_nan=True, err_msg=column)
+
+
+@pytest.mark.parametrize("n_bars, freq", [(5_000, "D"), (300_000, "min")])
+def test_matches_pandas(n_bars, freq):
+    assert_matches_reference(random_walk_ohlcv(n_bars, freq=freq, seed=n_bars))
+
+
+def test_warm_up_is_nan():
+    engine = compute_indicators(random_walk_ohlcv(300, seed=1), SPECS)
+    for column, warm_up in [("SMA_5", 4), ("SMA_200", 199), ("BB_Upper", 19), ("RSI_14", 14), ("ATR_14", 13)]:
+        assert engine[column].iloc[:warm_up].isna().all(), column
+        assert engine[column].iloc[warm_up:].notna().all(), column
+    assert engine[["EMA_12", "VWAP"]].notna().all().all()
+
+
+@pytest.mark.parametrize("n_bars", [0, 1, 2, 13, 14, 15, 19, 20, 199])
+def test_short_series(n_bars):
+    assert_matches_reference(random_walk_ohlcv(n_bars, seed=2))
+
+
+def test_constant_prices():
+    # Zero variance (Bollinger bands collapse onto the mean) and no gains or losses (RSI is 0 / 0)
+    data = random_walk_ohlcv(500, seed=3)
+    data[["Open", "High", "Low", "Close"]] = 123.456789
+    assert_matches_reference(data)
+    engine = compute_indicators(data, SPECS)
+    assert (engine["BB_Upper"].dropna() == 123.456789).all()
+    assert (engine["BB_Lower"].dropna() == 123.456789).all()
+    assert engine["RSI_14"].isna().all()
+    assert (engine["ATR_14"].dropna() == 0).all()
+
+
+def test_flat_stretch_after_moves():
+    # The running window sums must come back to exactly zero variance once the window is flat
+    data = random_walk_ohlcv(400, seed=4)
+    data.iloc[300:, :4] = data["Close"].iloc[299]
+    assert_matches_reference(data)
+    engine = compute_indicators(data, SPECS)
+    assert (engine["BB_Upper"].iloc[320:] == engine["BB_Middle"].iloc[320:]).all()
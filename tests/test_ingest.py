@@ -0,0 +1,52 @@
+import threading
+
+import crud
+from benchmarks.bench_ingest_daemon import fixtures
+from benchmarks.fixture_server import FixtureServer
+from ingest import IngestDaemon, Schedule
+from page_fetcher import HttpFetcher
+
+TICKERS = ["AAA", "BBB"]
+
+
+def fail_first_history(provider, ticker):
+    history = provider.history
+
+    def flaky(*args):
+        if args[0] == ticker and not any(call[:2] == ("history", ticker) for call in provider.calls):
+            provider.calls.append(("history", *map(str, args)))
+            raise ConnectionError("connection reset")
+        return history(*args)
+
+    provider.history = flaky
+
+
+def test_run_once_saves_bars_and_records_runs(database):
+    provider, pages = fixtures(TICKERS, latency=0)
+    fail_first_history(provider, "BBB")
+    schedule = Schedule(tickers=TICKERS, lookback_days=365)
+
+    with FixtureServer(pages) as server:
+        fetcher = HttpFetcher()
+        try:
+            daemon = IngestDaemon(schedule, provider=provider, fetcher=fetcher, news_base_url=server.base_url,
+                                  max_workers=3, news_rate=100.0, retry_delay=0.01)
+            runs = daemon.run_once()
+            history_calls = [call[1] for call in provider.calls if call[0] == "history"]
+            again = daemon.run_once(force=True)
+        finally:
+            fetcher.close()
+
+    assert sorted(runs) == sorted(job.name for job in daemon.jobs)
+    assert {run["status"] for run in runs.values()} == {"ok"}
+    assert runs["prices:BBB:1d"]["failures"] == 0
+    assert sorted(history_calls) == ["AAA", "BBB", "BBB"]
+
+    stored = crud.query_stock_data(tickers=TICKERS)
+    assert set(stored["ticker"]) == set(TICKERS)
+    assert len(crud.query_news()) > 0
+    assert daemon.due_jobs() == []
+
+    # Only the main thread's connection is left once the workers (and their pools) have stopped
+    assert {run["runs"] for run in again.values()} == {2}
+    assert list(database._connections) == [threading.main_thread()]
@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import crud
+from database import Database, table_columns
+
+# stock_prices as the first version of crud.py created it, and after the interval column was added
+BASELINE_STOCK_PRICES = '''
+    CREATE TABLE stock_prices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        date TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        UNIQUE(ticker, date)
+    )
+'''
+INTERVAL_STOCK_PRICES = '''
+    CREATE TABLE stock_prices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        interval TEXT NOT NULL DEFAULT '1d',
+        date TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        UNIQUE(ticker, interval, date)
+    );
+    CREATE INDEX idx_stock_prices_covering ON stock_prices (ticker, interval, date, open, high, low, close, volume);
+'''
+
+BARS = [("MSFT", "2024-01-03", 2.0), ("AAPL", "2024-01-02", 1.0), ("MSFT", "2024-01-02", 3.0)]
+
+
+def legacy_database(path, table, bars=BARS):
+    conn = sqlite3.connect(path)
+    conn.executescript(table)
+    conn.executemany("INSERT INTO stock_prices (ticker, date, open, high, low, close, volume) "
+                     "VALUES (?, ?, ?, ?, ?, ?, 100)", [(ticker, date, *[price] * 4) for ticker, date, price in bars])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.mark.parametrize("table", [BASELINE_STOCK_PRICES, INTERVAL_STOCK_PRICES], ids=["baseline", "interval"])
+def test_migrates_legacy_stock_prices(tmp_path, table):
+    db = crud.configure(legacy_database(str(tmp_path / "legacy.db"), table))
+    try:
+        assert table_columns(db.connection(), "stock_prices") == [
+            "ticker_id", "interval", "ts", "open", "high", "low", "close", "volume"]
+        stored = crud.query_stock_data()
+        assert stored[["ticker", "interval", "close"]].values.tolist() == [
+            ["AAPL", "1d", 1.0], ["MSFT", "1d", 3.0], ["MSFT", "1d", 2.0]]
+        assert list(stored["date"]) == list(pd.to_datetime(["2024-01-02", "2024-01-02", "2024-01-03"]))
+        assert not db.connection().in_transaction
+
+        # New bars go into the migrated table
+        crud.save_stock_data_bulk(pd.DataFrame({"Open": [4.0], "High": [4.0], "Low": [4.0], "Close": [4.0],
+                                                "Volume": [1]}, index=pd.to_datetime(["2024-01-04"])), ticker="MSFT")
+        assert len(crud.query_stock_data(tickers=["MSFT"])) == 3
+    finally:
+        db.close()
+
+
+def test_failed_migration_is_rolled_back(tmp_path):
+    path = legacy_database(str(tmp_path / "legacy.db"), BASELINE_STOCK_PRICES, BARS + [("MSFT", "not a date", 5.0)])
+    db = crud.configure(path)
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            db.connection()
+        conn = db._local.conn
+        assert not conn.in_transaction
+        assert "ts" not in table_columns(conn, "stock_prices")
+        assert conn.execute("SELECT count(*) FROM stock_prices").fetchone()[0] == 4
+
+        # Nothing is left locked: once the row is fixed, the next use migrates
+        conn.execute("DELETE FROM stock_prices WHERE date = 'not a date'")
+        assert len(crud.query_stock_data()) == 3
+    finally:
+        db.close()
+
+
+def test_concurrent_migrations_copy_once(tmp_path):
+    path = legacy_database(str(tmp_path / "legacy.db"), INTERVAL_STOCK_PRICES)
+    Database(path, schema=crud.SCHEMA[:1]).connection().close()  # only the tickers table
+    # Held until both migrations have seen the legacy columns and wait for the write lock
+    lock = sqlite3.connect(path, isolation_level=None)
+    lock.execute("PRAGMA journal_mode=WAL")
+    lock.execute("BEGIN IMMEDIATE")
+    errors = []
+
+    def migrate():
+        conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        try:
+            crud._migrate_stock_prices(conn)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=migrate) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    lock.execute("ROLLBACK")
+    lock.close()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db = crud.configure(path)
+    try:
+        assert len(crud.query_stock_data()) == 3
+    finally:
+        db.close()
+
+
+# news_articles before publication times were parsed at ingest
+NEWS_ARTICLES_WITHOUT_PUBLISHED_AT = '''
+    CREATE TABLE news_articles (
+        id INTEGER PRIMARY KEY,
+        link_hash TEXT NOT NULL UNIQUE,
+        title TEXT,
+        description TEXT,
+        source TEXT,
+        published TEXT,
+        tickers TEXT,
+        link TEXT,
+        sentiment TEXT,
+        compound REAL,
+        first_seen REAL NOT NULL
+    );
+    INSERT INTO news_articles (link_hash, title, published, first_seen) VALUES
+        ('a', 'two hours old', '2 hours ago', 1700000000), ('b', 'no date', 'N/A', 1700000000);
+'''
+
+
+def news_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(NEWS_ARTICLES_WITHOUT_PUBLISHED_AT)
+    conn.close()
+    return path
+
+
+def test_adds_news_published_at(tmp_path):
+    db = crud.configure(news_database(str(tmp_path / "news.db")))
+    try:
+        news = crud.query_news().set_index("Title")
+        assert news.loc["two hours old", "Published At"] == 1700000000 - 2 * 3600
+        assert pd.isna(news.loc["no date", "Published At"])
+    finally:
+        db.close()
+
+
+def test_failed_published_at_backfill_is_rolled_back(tmp_path, monkeypatch):
+    # Values that can't be stored: the update fails after the column was added
+    monkeypatch.setattr(crud, "parse_published", lambda published, first_seen: np.array([object()] * len(published)))
+    db = crud.configure(news_database(str(tmp_path / "news.db")))
+    try:
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.connection()
+        conn = db._local.conn
+        assert not conn.in_transaction
+        assert "published_at" not in table_columns(conn, "news_articles")
+
+        monkeypatch.undo()
+        assert len(crud.query_news()) == 2
+    finally:
+        db.close()
@@ -0,0 +1,84 @@
+import threading
+
+import crud
+import news_clusters
+from benchmarks.common import random_headlines
+
+
+def store(n, offset=0):
+    crud.save_news_articles(
+        [{"link_hash": f"h{offset + i}", "title": title, "description": description,
+          "sentiment": "Bullish" if i % 3 == 0 else "Bearish", "compound": 0.5 if i % 3 == 0 else -0.5}
+         for i, (title, description) in enumerate(random_headlines(n, seed=offset))],
+        [("AAA", f"h{offset + i}") for i in range(n)])
+
+
+def clustered():
+    return crud.get_db().execute("SELECT count(*) FROM news_clusters").fetchone()[0]
+
+
+def test_updates_only_new_articles(database):
+    store(300)
+    assert news_clusters.update_clusters(chunk_articles=100) == 300
+    assert news_clusters.update_clusters() == 0
+
+    store(50, offset=300)
+    assert news_clusters.update_clusters() == 50
+    assert news_clusters.load_model()[1] == 350
+    summary = news_clusters.cluster_summary()
+    assert summary["articles"].sum() == 350
+    assert summary["bullish"].sum() == 117
+
+    # Reassigning fits nothing
+    assert news_clusters.update_clusters(reassign=True) == 350
+    assert news_clusters.load_model()[1] == 350
+
+
+def test_too_few_articles_for_a_first_fit(database):
+    store(news_clusters.N_CLUSTERS - 1)
+    assert news_clusters.update_clusters() == 0
+    assert news_clusters.load_model() == (None, 0)
+
+
+def test_concurrent_updates_keep_every_fitted_chunk(database):
+    # Each thread has its own connection, like the app and the ingest daemon in separate processes
+    store(2_000)
+    errors, assigned = [], []
+
+    def update():
+        try:
+            assigned.append(news_clusters.update_clusters(chunk_articles=100))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=update) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sum(assigned) == 2_000 == clustered()
+    # Every chunk was fitted into the model exactly once: no update overwrote another's model
+    assert news_clusters.load_model()[1] == 2_000
+
+
+def test_update_saved_while_fitting_is_not_overwritten(database, monkeypatch):
+    store(300)
+    article_texts = news_clusters.article_texts
+    other = []
+
+    def texts_then_update(articles):
+        # Another update runs to the end while this one is about to fit its first chunk
+        if not other:
+            other.append(None)
+            thread = threading.Thread(target=lambda: other.append(news_clusters.update_clusters()))
+            thread.start()
+            thread.join(timeout=10)
+            assert not thread.is_alive(), "update blocked by the one that is fitting"
+        return article_texts(articles)
+
+    monkeypatch.setattr(news_clusters, "article_texts", texts_then_update)
+    assert news_clusters.update_clusters(chunk_articles=100) == 0
+    assert other == [None, 300]
+    assert news_clusters.load_model()[1] == 300 == clustered()
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+import newsData
+
+# Yahoo Finance news pages saved as served, one news stream each
+PAGES = sorted((Path(__file__).parent / "fixtures" / "yahoo_news").glob("*.html"))
+
+
+def reference(page):
+    return newsData.extract_articles(BeautifulSoup(page, "html.parser"))
+
+
+@pytest.mark.parametrize("path", PAGES, ids=[path.stem for path in PAGES])
+def test_fast_extraction_matches_reference(path):
+    page = path.read_text(encoding="utf-8")
+    expected = reference(page)
+    assert newsData.extract_articles_fast(page) == expected
+
+
+@pytest.mark.parametrize("path", PAGES, ids=[path.stem for path in PAGES])
+def test_strainer_fallback_matches_reference(path, monkeypatch):
+    monkeypatch.setattr(newsData, "lxml", None)
+    page = path.read_text(encoding="utf-8")
+    assert newsData.extract_articles_fast(page) == reference(page)
+
+
+def test_fixture_pages_have_articles():
+    rows = {path.stem: reference(path.read_text(encoding="utf-8")) for path in PAGES}
+    assert len(rows["quote_latest_news"]) == 8
+    assert rows["general_news_xml_declaration"] == rows["quote_latest_news"]
+    assert rows["no_articles"] == []
+
+
+def test_empty_page():
+    assert newsData.extract_articles_fast("") == [] == reference("")
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import crud
+from news_pipeline import run_news_pipeline
+
+PAGE = (Path(__file__).parent / "fixtures" / "yahoo_news" / "quote_latest_news.html").read_text(encoding="utf-8")
+
+
+def fetch_page(url):
+    return PAGE
+
+
+def stored_for(ticker):
+    return set(crud.query_news(tickers=[ticker])["Link"])
+
+
+def test_second_run_stores_nothing_new(database):
+    first = run_news_pipeline("MSFT", fetch_page=fetch_page)
+    assert (len(first.articles), first.known) == (8, 0)
+    again = run_news_pipeline("MSFT", fetch_page=fetch_page)
+    assert (len(again.articles), again.known) == (0, 8)
+    assert "score" not in again.timings
+
+
+def test_known_articles_are_linked_to_the_scraped_ticker(database):
+    run_news_pipeline(None, fetch_page=fetch_page)
+    general = set(crud.query_news()["Link"])
+    assert stored_for("NVDA") == set()
+
+    # Same page scraped for a ticker none of its articles is tagged with
+    run = run_news_pipeline("NVDA", fetch_page=fetch_page)
+    assert run.articles.empty
+    assert run.known == 8
+    assert stored_for("NVDA") == general
+    assert crud.get_sentiment_daily(tickers=["NVDA"])["articles"].sum() == 8
+
+
+def test_known_counts_only_stored_articles(database):
+    # The page repeats its article without a link: kept once, and not counted as already stored
+    start = PAGE.rindex('<li class="stream-item story-item')
+    page = PAGE.replace("</ul>", PAGE[start:PAGE.index("</li>", start) + 5] + "</ul>")
+    run = run_news_pipeline("MSFT", fetch_page=lambda url: page)
+    assert (len(run.articles), run.known) == (8, 0)
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+
+import crud
+from news_pipeline import run_news_pipeline
+
+PAGE = (Path(__file__).parent / "fixtures" / "yahoo_news" / "quote_latest_news.html").read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def news(database):
+    run_news_pipeline("MSFT", fetch_page=lambda url: PAGE)
+    return crud.query_news()
+
+
+def test_filters_match_word_prefixes(news):
+    found = crud.query_news(filters={"Title": "microso", "Source": "reut"})
+    assert list(found["Title"]) == ["Microsoft's Azure growth beats estimates as AI demand surges"]
+    assert crud.query_news(filters={"Title": "azure", "Source": "bloomberg"}).empty
+
+
+def test_filter_without_words_matches_nothing(news):
+    assert crud.news_match({"Title": "-"}) is None
+    assert crud.news_match({"Title": "microsoft", "Source": " — "}) is None
+    found = crud.query_news(filters={"Title": "-"})
+    assert found.empty
+    assert list(found.columns) == list(news.columns)
+    assert crud.query_news(filters={"Title": "microsoft", "Source": "&"}).empty
+
+
+def test_unknown_filter_column(news):
+    with pytest.raises(ValueError):
+        crud.query_news(filters={"Link": "yahoo"})
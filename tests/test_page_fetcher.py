@@ -0,0 +1,131 @@
+from pathlib import Path
+
+import pytest
+import requests
+
+import newsData
+from benchmarks.fixture_server import FixtureServer
+from page_fetcher import HttpFetcher, SeleniumFetcher, fetch_many
+
+PAGE = (Path(__file__).parent / "fixtures" / "yahoo_news" / "quote_latest_news.html").read_text(encoding="utf-8")
+
+
+class FakeDriver:
+    """A news feed that renders `batches` of article links, one more batch per scroll."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.loaded = 0
+        self.scrolls = 0
+        self.current_url = None
+
+    def get(self, url):
+        self.current_url = url
+        self.loaded = 1 if self.batches else 0
+
+    def links(self):
+        return [link for batch in self.batches[:self.loaded] for link in batch]
+
+    def execute_script(self, script, *args):
+        if "scrollTo" in script:
+            self.scrolls += 1
+            self.loaded = min(self.loaded + 1, len(self.batches))
+        elif "getAttribute" in script:
+            return self.links()[args[1]:]
+        else:
+            return len(self.links())
+
+    @property
+    def page_source(self):
+        return "".join(f'<div class="content yf-82qtw3"><a href="{link}"></a></div>' for link in self.links())
+
+    def quit(self):
+        pass
+
+
+FEED = [["/a1", "/a2"], ["/b1", "/b2"], ["/c1", "/c2"]]
+
+
+def selenium_fetcher(driver, **kwargs):
+    return SeleniumFetcher(pool_size=1, load_timeout=0.5, scroll_timeout=0.2, factory=lambda: driver, **kwargs)
+
+
+def test_scrolls_until_no_new_articles_load():
+    driver = FakeDriver(FEED)
+    page = selenium_fetcher(driver, max_scrolls=10).fetch("https://example.com/news")
+    # Two scrolls load the other batches, the third finds nothing new
+    assert driver.scrolls == 3
+    assert page.count("yf-82qtw3") == 6
+
+
+def test_scrolls_at_most_max_scrolls():
+    driver = FakeDriver(FEED)
+    selenium_fetcher(driver, max_scrolls=1).fetch("https://example.com/news")
+    assert driver.scrolls == 1
+
+
+def test_stops_at_known_links():
+    driver = FakeDriver(FEED)
+    fetcher = selenium_fetcher(driver, max_scrolls=10)
+    # Already stored articles on the first screen: no scrolling at all
+    fetcher.fetch("https://example.com/news", known_links={"/a2"})
+    assert driver.scrolls == 0
+
+    # Reached with the second batch: no further scroll
+    page = fetcher.fetch("https://example.com/news", known_links={"/b1", "/zz"})
+    assert driver.scrolls == 1
+    assert page.count("yf-82qtw3") == 4
+
+
+def test_page_without_articles():
+    driver = FakeDriver([])
+    assert selenium_fetcher(driver).fetch("https://example.com/news") == ""
+    assert driver.scrolls == 0
+
+
+def test_browser_sessions_are_reused():
+    created = []
+
+    def factory():
+        created.append(FakeDriver(FEED))
+        return created[-1]
+
+    fetcher = SeleniumFetcher(pool_size=2, scroll_timeout=0.1, max_scrolls=0, factory=factory)
+    fetch_many([f"https://example.com/{i}" for i in range(6)], fetcher)
+    assert 1 <= len(created) <= 2
+
+
+def test_http_fetcher_returns_recorded_pages():
+    pages = {f"/quote/T{i}/latest-news/": PAGE.replace("Microsoft", f"Company {i}") for i in range(4)}
+    with FixtureServer(pages) as server:
+        fetcher = HttpFetcher(pool_size=2)
+        try:
+            assert fetcher.fetch(server.url("/quote/T0/latest-news/")) == pages["/quote/T0/latest-news/"]
+            with pytest.raises(requests.HTTPError):
+                fetcher.fetch(server.url("/missing/"))
+
+            urls = [server.url(path) for path in pages] + [server.url("/missing/")]
+            fetched = fetch_many(urls + urls[:1], fetcher)
+        finally:
+            fetcher.close()
+
+    assert list(fetched) == urls
+    assert [fetched[server.url(path)] for path in pages] == list(pages.values())
+    assert isinstance(fetched[server.url("/missing/")], requests.HTTPError)
+
+
+def test_scrape_tickers_from_recorded_pages(caplog):
+    pages = {"/quote/AAA/latest-news/": PAGE}
+    with FixtureServer(pages) as server:
+        fetcher = HttpFetcher()
+        try:
+            scraped = newsData.scrape_tickers(["AAA", "BBB"], fetcher,
+                                              url_template=server.url("/quote/{ticker}/latest-news/"))
+        finally:
+            fetcher.close()
+
+    assert scraped["AAA"] == newsData.extract_articles_fast(PAGE)
+    assert len(scraped["AAA"]) == 8
+    assert scraped["BBB"] == []
+    assert [record.getMessage() for record in caplog.records if record.levelname == "ERROR"] == [
+        f"Error scraping BBB: 404 Client Error: Not Found for url: {server.url('/quote/BBB/latest-news/')}"]
@@ -0,0 +1,78 @@
+import pandas as pd
+
+import crud
+from benchmarks.common import random_walk_ohlcv
+from price_cache import PriceCache, missing_ranges
+from providers import InMemoryPriceProvider
+
+
+def make_cache(frames=None):
+    provider = InMemoryPriceProvider(frames or {("AAA", "1d"): random_walk_ohlcv(400, start="2020-01-01")})
+    return PriceCache(provider), provider
+
+
+def history_calls(provider):
+    return [call[2:4] for call in provider.calls if call[0] == "history"]
+
+
+def test_missing_ranges():
+    covered = [("2020-02-01", "2020-03-01"), ("2020-04-01", "2020-05-01")]
+    assert missing_ranges("2020-01-01", "2020-06-01", covered) == [
+        ("2020-01-01", "2020-02-01"), ("2020-03-01", "2020-04-01"), ("2020-05-01", "2020-06-01")]
+    assert missing_ranges("2020-02-10", "2020-02-20", covered) == []
+
+
+def test_hits_misses_and_gaps(database):
+    cache, provider = make_cache()
+
+    first = cache.get("AAA", "2020-01-01", "2020-03-01")
+    assert len(first) == 60
+    assert cache.stats == {"hits": 0, "misses": 1, "gaps_fetched": 1, "bars_fetched": 60}
+
+    # Repeated and contained requests are served from the database
+    pd.testing.assert_frame_equal(cache.get("AAA", "2020-01-01", "2020-03-01"), first)
+    cache.get("AAA", "2020-01-15", "2020-02-15")
+    assert cache.stats["hits"] == 2
+    assert len(history_calls(provider)) == 1
+
+    # Widening on both sides fetches exactly the two missing ranges
+    widened = cache.get("AAA", "2019-12-01", "2020-04-01")
+    assert history_calls(provider)[1:] == [("2019-12-01", "2020-01-01"), ("2020-03-01", "2020-04-01")]
+    assert cache.stats == {"hits": 2, "misses": 2, "gaps_fetched": 3, "bars_fetched": 91}
+    assert len(widened) == 91
+    assert crud.get_price_coverage("AAA", "1d") == [("2019-12-01", "2020-04-01")]
+
+
+def test_empty_answer_is_fetched_again(database):
+    cache, provider = make_cache()
+    cache.get("AAA", "2020-01-01", "2020-02-01")
+
+    # Stands in for an error or rate limit: the provider knows nothing about these dates this time
+    frames = provider.frames
+    provider.frames = {}
+    assert cache.get("AAA", "2020-02-01", "2020-03-01").empty
+    assert crud.get_price_coverage("AAA", "1d") == [("2020-01-01", "2020-02-01")]
+
+    provider.frames = frames
+    assert len(cache.get("AAA", "2020-02-01", "2020-03-01")) == 29
+    assert cache.stats["gaps_fetched"] == 3
+    assert crud.get_price_coverage("AAA", "1d") == [("2020-01-01", "2020-03-01")]
+
+
+def test_empty_range_before_first_bar_is_covered(database):
+    cache, provider = make_cache()
+    cache.get("AAA", "2020-01-01", "2020-02-01")
+
+    # Nothing before the listing: covered once, never asked again
+    assert cache.get("AAA", "2019-01-01", "2020-02-01").index.min() == pd.Timestamp("2020-01-01")
+    cache.get("AAA", "2019-01-01", "2020-02-01")
+    assert len(history_calls(provider)) == 2
+    assert cache.stats["hits"] == 1
+
+
+def test_uncacheable_interval_goes_to_provider(database):
+    cache, provider = make_cache({("AAA", "4h"): random_walk_ohlcv(10, start="2020-01-01")})
+    cache.get("AAA", "2020-01-01", "2020-01-05", "4h")
+    cache.get("AAA", "2020-01-01", "2020-01-05", "4h")
+    assert len(history_calls(provider)) == 2
+    assert cache.stats["misses"] == 2
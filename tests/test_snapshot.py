@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+import crud
+import snapshot
+from benchmarks.common import random_walk_ohlcv
+
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+def store(start, bars=300):
+    for i, ticker in enumerate(TICKERS):
+        crud.save_stock_data_bulk(random_walk_ohlcv(bars, start=start, seed=i), ticker=ticker, upsert=True)
+
+
+def assert_matches_database(directory):
+    prices = snapshot.PriceSnapshot(directory)
+    assert prices.tickers() == TICKERS
+    for ticker in TICKERS:
+        np.testing.assert_array_equal(np.column_stack(list(prices.columns(ticker).values())),
+                                      crud.read_price_columns(ticker, "1d"))
+
+
+def files(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+
+def test_refresh_carries_over_unchanged_bars(database, tmp_path):
+    directory = str(tmp_path / "snapshots")
+    store("2020-01-01")
+    assert snapshot.refresh(directory) == len(TICKERS)
+    assert snapshot.refresh(directory) == 0
+
+    crud.save_stock_data_bulk(random_walk_ohlcv(10, start="2021-01-01", seed=9), ticker="BBB")
+    assert snapshot.refresh(directory) == 1
+    assert_matches_database(directory)
+    assert files(directory) == ["AAA.1.bin", "BBB.3.bin", "CCC.1.bin", snapshot.MANIFEST_NAME]
+
+
+def test_concurrent_refreshes_run_one_at_a_time(database, tmp_path):
+    directory = str(tmp_path / "snapshots")
+    store("2020-01-01")
+    errors = []
+
+    def run(step):
+        try:
+            step()
+        except Exception as e:
+            errors.append(e)
+
+    # Refreshes racing each other and new bars written meanwhile
+    threads = [threading.Thread(target=run, args=(lambda: snapshot.refresh(directory),)) for _ in range(4)]
+    threads.append(threading.Thread(target=run, args=(lambda: store("2020-06-01"),)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    snapshot.refresh(directory)
+    with open(os.path.join(directory, snapshot.MANIFEST_NAME), encoding="utf-8") as file:
+        assert json.load(file)["generation"] == 5
+    assert crud.get_price_changes() == []
+    assert_matches_database(directory)
+    assert not [name for name in files(directory) if name.endswith(".tmp")]
+
+
+def test_price_writes_go_through_during_a_refresh(database, tmp_path, monkeypatch):
+    directory = str(tmp_path / "snapshots")
+    store("2020-01-01")
+    write_series = snapshot._write_series
+    written = []
+
+    def write_while_exporting(*args):
+        # A writer on another thread finishes while the refresh is still exporting
+        if not written:
+            writer = threading.Thread(target=store, args=("2021-01-01", 10))
+            writer.start()
+            writer.join(timeout=5)
+            written.append(not writer.is_alive())
+            writer.join()
+        return write_series(*args)
+
+    monkeypatch.setattr(snapshot, "_write_series", write_while_exporting)
+    assert snapshot.refresh(directory) == len(TICKERS)
+    assert written == [True]
+
+    # The bars written meanwhile are left for the next refresh
+    assert len(crud.get_price_changes()) == len(TICKERS)
+    monkeypatch.setattr(snapshot, "_write_series", write_series)
+    assert snapshot.refresh(directory) == len(TICKERS)
+    assert_matches_database(directory)